@@ -13,7 +13,9 @@
 #
 import csv
 
+from cliboa.adapter.file import File
 from cliboa.util.base import _BaseObject
+from cliboa.util.csv_row import CsvRowEngine
 from cliboa.util.exception import CliboaException
 
 
@@ -79,17 +81,21 @@ class Csv(_BaseObject):
             enc: Encoding
         """
         with (
-            open(input_file, mode="r", encoding=enc) as in_f,
-            open(output_file, mode="w", encoding=enc) as out_f,
+            File().open(input_file, mode="r", encoding=enc) as in_f,
+            File().open(output_file, mode="w", encoding=enc) as out_f,
         ):
-            reader = csv.DictReader(in_f)
+            reader = csv.reader(in_f)
             writer = csv.writer(out_f)
             writer.writerow(remain_column_names)
-            for row in reader:
-                contents = []
-                for c in remain_column_names:
-                    contents.append(row[c])
-                writer.writerow(contents)
+            header = next(reader, None)
+            if header is not None:
+                getter = CsvRowEngine.getter(
+                    CsvRowEngine.column_indexes(header, remain_column_names)
+                )
+                CsvRowEngine.write_rows(
+                    writer,
+                    map(getter, CsvRowEngine.records(reader, len(header), allow_longer=True)),
+                )
             out_f.flush()
 
     @staticmethod
@@ -104,18 +110,22 @@ class Csv(_BaseObject):
             enc: Encoding
         """
         with (
-            open(input_file, mode="r", encoding=enc) as in_f,
-            open(output_file, mode="w", encoding=enc) as out_f,
+            File().open(input_file, mode="r", encoding=enc) as in_f,
+            File().open(output_file, mode="w", encoding=enc) as out_f,
         ):
             reader = csv.reader(in_f)
             writer = csv.writer(out_f)
-            for i, row in enumerate(reader):
-                contents = []
-                for j, r in enumerate(row):
-                    if (j + 1) not in remain_column_numbers:
-                        continue
-                    contents.append(r)
-                writer.writerow(contents)
+            # Columns are written in the order of the file, not of remain_column_numbers
+            indexes = sorted({n - 1 for n in remain_column_numbers if n >= 1})
+            getter = CsvRowEngine.getter(indexes)
+            width = indexes[-1] + 1 if indexes else 0
+
+            def extract(row):
+                if len(row) >= width:
+                    return getter(row)
+                return [row[i] for i in indexes if i < len(row)]
+
+            CsvRowEngine.write_rows(writer, map(extract, reader))
             out_f.flush()
 
     @staticmethod
@@ -124,7 +134,7 @@ class Csv(_BaseObject):
         Returns csv column names
         """
         columns = []
-        with open(src, "r", encoding=enc) as f:
+        with File().open(src, "r", encoding=enc) as f:
             reader = csv.DictReader(f)
             columns = reader.fieldnames
         return columns
@@ -17,10 +17,37 @@ import os
 import re
 from typing import List
 
+from chardet.universaldetector import UniversalDetector
+
 from cliboa.util.base import _BaseObject
+from cliboa.util.compression import CompressionUtil
+from cliboa.util.csv_row import CsvRowEngine
+
+# Directory listings shared by the steps in a scenario. {dir: (st_mtime_ns, files, dirs)}
+_LISTING_CACHE = {}
 
 
 class File(_BaseObject):
+    def open(self, path, mode="r", **kwargs):
+        """
+        Open a file in the same way as builtin open.
+        Files which have a compression extension (.gz, .bz2, .xz, .zst) are opened as
+        streams which decompress on reading and compress on writing transparently.
+
+        Args:
+            path (str): File path
+            mode="r" (str): Mode to open the file
+            kwargs: Same as builtin open. e.g. encoding, errors, newline
+
+        Returns:
+            file object
+        """
+        if CompressionUtil.format_of(path):
+            if "b" not in mode and "t" not in mode:
+                mode += "t"
+            return CompressionUtil().open(path, mode, **kwargs)
+        return open(path, mode, **kwargs)
+
     def remove_csv_col(self, input_file, output_file, remains, enc="utf-8"):
         """
         Extract only the necessary columns from the CSV data and output a new CSV
@@ -35,51 +62,184 @@ class File(_BaseObject):
             codecs.open(input_file, mode="r", encoding=enc) as in_f,
             codecs.open(output_file, mode="w", encoding="utf-8") as out_f,
         ):
-            reader = csv.DictReader(in_f)
+            reader = csv.reader(in_f)
             writer = csv.writer(out_f)
             writer.writerow(remains)
 
-            for row in reader:
-                contents = []
-                for col in remains:
-                    contents.append(row[col])
-                writer.writerow(contents)
+            header = next(reader, None)
+            if header is not None:
+                getter = CsvRowEngine.getter(CsvRowEngine.column_indexes(header, remains))
+                CsvRowEngine.write_rows(
+                    writer,
+                    map(getter, CsvRowEngine.records(reader, len(header), allow_longer=True)),
+                )
             out_f.flush()
 
-    def get_target_files(self, src_dir: str, src_pattern: str, tree=True) -> List[str]:
+    def get_target_files(
+        self, src_dir: str, src_pattern: str, tree=True, max_depth=None, cache=False
+    ) -> List[str]:
         """
-        Get files which matches to the regular expression
+        Get files which matches to the regular expression.
+        Names which do not start with the literal prefix of the regular expression
+        are skipped without matching.
 
         Args:
             src_dir (str): Directory to search
             src_pattern (str): Regular expression
             tree=True (bool): Set True(by default)
                               to search files include sub directories.
+            max_depth=None (int): Depth of sub directories to search. Unlimited if None.
+                                  0 searches only src_dir, same as tree=False.
+            cache=False (bool): Reuse the listing of a directory which was listed before
+                                in the process, unless the directory has been modified.
 
         Returns:
             list: Matched file list
         """
         r = re.compile(src_pattern)
+        prefix = self._literal_prefix(src_pattern)
+        if tree is False:
+            max_depth = 0
         target_files = []
-        for dir, dirs, files in os.walk(src_dir):
-            if tree is False and dir not in src_dir:
-                continue
+        for dir, files in self._walk(src_dir, max_depth, cache):
             for file in files:
-                if r.fullmatch(file):
+                if file.startswith(prefix) and r.fullmatch(file):
                     target_files.append(os.path.join(dir, file))
         return sorted(target_files)
 
-    def convert_encoding(self, src, dest, encoding_from, encoding_to, errors=None):
+    def clear_listing_cache(self, src_dir=None):
+        """
+        Clear cached directory listings of src_dir and its sub directories.
+        All the listings are cleared if src_dir is None.
+        """
+        if src_dir is None:
+            _LISTING_CACHE.clear()
+            return
+        top = os.path.join(src_dir, "")
+        for dir in list(_LISTING_CACHE.keys()):
+            if dir == src_dir or dir.startswith(top):
+                del _LISTING_CACHE[dir]
+
+    def _walk(self, top, max_depth, cache):
+        """
+        Yields a directory and names of the files in it, in the same way as os.walk.
+        Errors are ignored and symbolic links to directories are not followed.
+        """
+        stack = [(top, 0)]
+        while stack:
+            dir, depth = stack.pop()
+            listing = self._scandir(dir, cache)
+            if listing is None:
+                continue
+            files, dirs = listing
+            yield dir, files
+            if max_depth is None or depth < max_depth:
+                stack.extend((os.path.join(dir, d), depth + 1) for d in dirs)
+
+    def _scandir(self, dir, cache):
+        try:
+            if cache:
+                mtime = os.stat(dir).st_mtime_ns
+                cached = _LISTING_CACHE.get(dir)
+                if cached is not None and cached[0] == mtime:
+                    return cached[1], cached[2]
+            files = []
+            dirs = []
+            with os.scandir(dir) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry.name)
+                    elif not entry.is_symlink():
+                        dirs.append(entry.name)
+        except OSError:
+            return None
+        if cache:
+            _LISTING_CACHE[dir] = (mtime, files, dirs)
+        return files, dirs
+
+    @staticmethod
+    def _literal_prefix(pattern: str) -> str:
+        """
+        Returns the literal string which all the names matching the pattern start with.
+        """
+        if "|" in pattern:
+            return ""
+        prefix = []
+        i = 1 if pattern.startswith("^") else 0
+        while i < len(pattern):
+            c = pattern[i]
+            if c == "\\":
+                # Only escaped symbols are literal, e.g. \. but not \d
+                if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                    break
+                c = pattern[i + 1]
+                step = 2
+            elif c in ".^$*+?{}[]()":
+                break
+            else:
+                step = 1
+            quantifier = pattern[i + step : i + step + 1]
+            if quantifier in ("*", "?", "{"):
+                break
+            prefix.append(c)
+            if quantifier == "+":
+                break
+            i += step
+        return "".join(prefix)
+
+    def convert_encoding(
+        self, src, dest, encoding_from, encoding_to, errors=None, chunk_size=8388608
+    ):
         """
-        Copy file with specified encoding
+        Copy file with specified encoding.
+        The file is streamed with incremental decoder/encoder by chunk_size bytes,
+        so multibyte characters across chunk boundaries are converted correctly.
 
         Args:
             src (str): Copy source file name
             dest (str): Copy destination file name
             enc_from (str): Encoding of source file
             enc_to (str): Encoding of destination file
+            errors=None (str): How encoding and decoding errors are to be handled
+            chunk_size=8388608 (int): Bytes to read from the source file at once
+        """
+        decoder = codecs.getincrementaldecoder(encoding_from)(errors or "strict")
+        encoder = codecs.getincrementalencoder(encoding_to)(errors or "strict")
+        with self.open(src, "rb") as input, self.open(dest, "wb") as output:
+            while True:
+                buf = input.read(chunk_size)
+                final = buf == b""
+                output.write(encoder.encode(decoder.decode(buf, final), final))
+                if final:
+                    break
+
+    def detect_encoding(self, src, sample_size=1048576):
+        """
+        Detect file encoding from the head of the file.
+
+        Args:
+            src (str): File name
+            sample_size=1048576 (int): Maximum bytes to read for detection
+
+        Returns:
+            str: Detected encoding. None if it could not be detected.
         """
-        with open(src, "r", encoding=encoding_from, errors=errors) as input:
-            with open(dest, "w", encoding=encoding_to, errors=errors) as output:
-                for i in input:
-                    output.write(i)
+        detector = UniversalDetector()
+        with self.open(src, "rb") as f:
+            remains = sample_size
+            while remains > 0 and not detector.done:
+                buf = f.read(min(65536, remains))
+                if not buf:
+                    break
+                detector.feed(buf)
+                remains -= len(buf)
+        detector.close()
+        encoding = detector.result.get("encoding")
+        if encoding and encoding.lower() == "ascii":
+            # The sample may not contain non-ascii characters even if the rest of file does.
+            return "utf-8"
+        return encoding
@@ -1,9 +1,18 @@
 import pymysql
+import pymysql.cursors
 
 from cliboa.adapter.rdbms import RdbmsSupport
+from cliboa.util.exception import DatabaseException, LocalInfileDisabled
 
 
 class MysqlAdaptor(RdbmsSupport):
+    # Errors when LOAD DATA LOCAL is disabled on the server or the client
+    LOCAL_INFILE_DISABLED = (1148, 2068, 3948)
+
+    def __init__(self, *args, local_infile=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._local_infile = local_infile
+
     def get_connection(self, **kwargs):
         # see https://pymysql.readthedocs.io/en/latest/modules/connections.html
         kwargs["host"] = self._host
@@ -12,7 +21,70 @@ class MysqlAdaptor(RdbmsSupport):
         kwargs["db"] = self._dbname
         if self._port:
             kwargs["port"] = self._port
+        if self._local_infile:
+            kwargs["local_infile"] = True
         return pymysql.connect(**kwargs)
 
     def insert(self, sql, params):
         self._con.cursor().executemany(sql, params)
+
+    def select_stream(self, sql, params=None, itersize=10000):
+        """
+        Execute a query with SSCursor, which reads rows from the server as they are fetched.
+        No other query can be executed on the connection until all the rows are read.
+        """
+        cursor = self._con.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(sql, params)
+        return cursor
+
+    def load_data(
+        self, path, tblname, columns, charset="utf8mb4", delimiter=",", line_terminator="\n"
+    ):
+        """
+        Load csv into a table by LOAD DATA LOCAL INFILE.
+        The adaptor must be created with local_infile=True.
+        The first line is skipped as header.
+        The server skips duplicate-key rows and truncates invalid values with warnings
+        instead of errors, so any warning is raised as an error.
+
+        Args:
+            path (str): csv file path
+            tblname (str): table name
+            columns (str[]): columns of the table in the order of the csv
+            charset="utf8mb4" (str): MySQL character set of the csv
+            delimiter="," (str): delimiter of the csv
+            line_terminator="\\n" (str): line terminator of the csv
+
+        Returns:
+            int: Number of loaded rows
+
+        Raises:
+            LocalInfileDisabled: LOAD DATA LOCAL is not allowed
+            DatabaseException: The server reported warnings
+        """
+        sql = (
+            "LOAD DATA LOCAL INFILE %%s INTO TABLE %s CHARACTER SET %s"
+            " FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '\"' ESCAPED BY ''"
+            " LINES TERMINATED BY %s IGNORE 1 LINES (%s)"
+        ) % (
+            tblname,
+            charset,
+            self._con.escape(delimiter).replace("%", "%%"),
+            self._con.escape(line_terminator),
+            ",".join(columns),
+        )
+        try:
+            with self._con.cursor() as cursor:
+                rows = cursor.execute(sql, (path,))
+                if cursor.warning_count:
+                    count = cursor.warning_count
+                    cursor.execute("SHOW WARNINGS LIMIT 10")
+                    raise DatabaseException(
+                        "LOAD DATA of %s reported %d warnings. %s"
+                        % (path, count, [w[2] for w in cursor.fetchall()])
+                    )
+                return rows
+        except pymysql.MySQLError as e:
+            if e.args and e.args[0] in self.LOCAL_INFILE_DISABLED:
+                raise LocalInfileDisabled("LOAD DATA LOCAL is not allowed. %s" % str(e))
+            raise
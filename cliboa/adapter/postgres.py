@@ -1,3 +1,5 @@
+import uuid
+
 import psycopg2
 from psycopg2.extras import execute_values
 
@@ -26,3 +28,37 @@ class PostgresqlAdaptor(RdbmsSupport):
         sql = sql[:pos]
         sql += " VALUES %s"
         execute_values(self._con.cursor(), sql, params)
+
+    def select_stream(self, sql, params=None, itersize=10000):
+        """
+        Execute a query with a named (server side) cursor.
+        Note that the description of the cursor is available after the first fetch.
+        """
+        cursor = self._con.cursor(name="cliboa_%s" % uuid.uuid4().hex)
+        cursor.itersize = itersize
+        cursor.execute(sql, params)
+        return cursor
+
+    def copy_from(self, tblname, columns, file, delimiter=","):
+        """
+        Load csv into a table by COPY FROM STDIN.
+        The file is streamed to the server as it is, and the first line is skipped as header.
+        In csv format of COPY, unquoted empty values are NULL, and "" is an empty string.
+
+        Args:
+            tblname (str): table name
+            columns (str[]): columns of the table in the order of the csv
+            file: file object of the csv to read
+            delimiter="," (str): delimiter of the csv
+
+        Returns:
+            int: Number of loaded rows
+        """
+        sql = "COPY %s (%s) FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER %s)" % (
+            tblname,
+            ",".join(columns),
+            "'%s'" % delimiter.replace("'", "''"),
+        )
+        with self._con.cursor() as cursor:
+            cursor.copy_expert(sql, file, size=1048576)
+            return cursor.rowcount
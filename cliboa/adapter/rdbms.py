@@ -53,6 +53,12 @@ class RdbmsSupport(_BaseObject):
         finally:
             self._end()
 
+    def commit(self):
+        """
+        Commit the current transaction without closing the connection
+        """
+        self._commit()
+
     def _begin(self):
         self._con = self.get_connection()
         self._logger.info(
@@ -106,6 +112,22 @@ class RdbmsSupport(_BaseObject):
             cursor.execute(sql)
         return cursor
 
+    def select_stream(self, sql, params=None, itersize=10000):
+        """
+        Execute a query with a cursor which fetches rows from the server by itersize,
+        instead of loading the whole result into memory.
+        A subclass which supports server side cursors overrides this method.
+
+        Args:
+            sql (str): query to execute
+            params=None (list): query parameters
+            itersize=10000 (int): Number of rows to fetch from the server at once
+
+        Returns:
+            cursor
+        """
+        return self.select(sql, params)
+
     def insert(self, sql, params=None):
         raise Exception("Must be implemented in a sub class")
 
@@ -11,9 +11,16 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import atexit
 import csv
+import os
+import re
 import sqlite3
+import threading
+from itertools import islice
+from urllib.request import pathname2url
 
+from cliboa.adapter.file import File
 from cliboa.util.base import _BaseObject
 
 
@@ -21,6 +28,31 @@ class SqliteAdapter(_BaseObject):
 
     _COMMIT_COUNT = 500
 
+    # Number of rows to insert at once in bulk import
+    _BULK_COUNT = 100000
+
+    # Values which are stored as INTEGER or REAL by the column affinity without loss
+    _INTEGER = re.compile(r"-?(?:0|[1-9][0-9]{0,17})")
+    _REAL = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+
+    # Pragmas set on connect.
+    # fast: no journal for a database used by one connection at a time.
+    # wal: readers and a writer can access the database concurrently.
+    PROFILES = {
+        "fast": {"synchronous": "OFF", "journal_mode": "OFF"},
+        "wal": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 30000,
+            "cache_size": -65536,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+    }
+
+    _PRAGMA_NAME = re.compile(r"[a-z_]+")
+    _PRAGMA_VALUE = re.compile(r"-?[0-9]+|[A-Za-z_]+")
+
     """
     Adapter class of sqlite3
     """
@@ -29,25 +61,83 @@ class SqliteAdapter(_BaseObject):
         super().__init__(**kwargs)
         self._cur = None
         self._con = None
+        self._pool_key = None
 
-    def connect(self, dbname):
+    def connect(self, dbname, read_only=False, profile="fast", pragmas=None, pooled=False):
         """
         Get sqlite connection
+
+        Args:
+            dbname (str): Database file path
+            read_only=False (bool): Open the database in read-only mode.
+                                    Read-only connections can read the database in parallel.
+            profile="fast" (str): Name of PROFILES to set pragmas
+            pragmas=None (dict): Pragmas to set in addition to the profile
+            pooled=False (bool): Take an idle connection from the pool shared in the process,
+                                 and return it to the pool on close.
         """
-        self._con = sqlite3.connect(dbname)
-        self._con.execute("PRAGMA synchronous = OFF")
-        self._con.execute("PRAGMA journal_mode = OFF")
+        if profile not in self.PROFILES:
+            raise ValueError(
+                "Unknown profile %s. One of %s is allowed." % (profile, list(self.PROFILES))
+            )
+        settings = dict(self.PROFILES[profile])
+        settings.update(pragmas or {})
+        if read_only is True:
+            # The journal mode can not be changed in read-only connections
+            settings.pop("journal_mode", None)
+        for name, value in settings.items():
+            if not self._PRAGMA_NAME.fullmatch(name) or not self._PRAGMA_VALUE.fullmatch(
+                str(value)
+            ):
+                raise ValueError("Invalid pragma %s = %s" % (name, value))
+
+        if pooled is True:
+            self._pool_key = (
+                os.path.abspath(dbname),
+                read_only,
+                tuple(sorted(settings.items())),
+            )
+            self._con = _POOL.acquire(self._pool_key)
+            if self._con is not None:
+                return
+        else:
+            self._pool_key = None
+
+        # Pooled connections are passed between threads, but never used by two at once
+        check_same_thread = pooled is not True
+        if read_only is True:
+            uri = "file:%s?mode=ro" % pathname2url(os.path.abspath(dbname))
+            self._con = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+        else:
+            self._con = sqlite3.connect(dbname, check_same_thread=check_same_thread)
+        for name, value in settings.items():
+            self._con.execute("PRAGMA %s = %s" % (name, value))
 
     def close(self):
         """
-        Release sqlite connection
+        Release sqlite connection.
+        A pooled connection is returned to the pool.
         """
         if self._cur:
             self._cur.close()
             self._cur = None
 
         if self._con:
-            self._con.close()
+            if self._pool_key is not None:
+                _POOL.release(self._pool_key, self._con)
+                self._con = None
+            else:
+                self._con.close()
+
+    @staticmethod
+    def close_pool(dbname=None):
+        """
+        Close the idle connections in the pool
+
+        Args:
+            dbname=None (str): Database file path. All the connections are closed if None.
+        """
+        _POOL.close_all(dbname)
 
     def fetch(self, sql, row_factory=None):
         """
@@ -68,6 +158,32 @@ class SqliteAdapter(_BaseObject):
         self._cur.execute(sql)
         return self._cur
 
+    def referenced_columns(self, sql):
+        """
+        Get the columns which a query reads, without running it.
+
+        Args:
+            sql (str): SQL
+
+        Returns:
+            dict: table name and set of the column names.
+                  An empty column name means that the table is read, but no column is used.
+                  e.g. SELECT COUNT(*) FROM tbl
+        """
+        columns = {}
+
+        def authorizer(action, table, column, db, source):
+            if action == sqlite3.SQLITE_READ and table is not None:
+                columns.setdefault(table, set()).add(column)
+            return sqlite3.SQLITE_OK
+
+        self._con.set_authorizer(authorizer)
+        try:
+            self._con.execute("EXPLAIN " + sql).fetchall()
+        finally:
+            self._con.set_authorizer(None)
+        return columns
+
     def create_user_func(self, dict):
         """
         Create function
@@ -132,7 +248,7 @@ class SqliteAdapter(_BaseObject):
                 )
         self._con.executemany(sql, values)
 
-    def create_table(self, tblname, columns, primary_key=None):
+    def create_table(self, tblname, columns, primary_key=None, types=None):
         """
         Create table, if it is not exist.
 
@@ -140,16 +256,21 @@ class SqliteAdapter(_BaseObject):
             tblname (str): table name
             columns (str[]): column names
             primary_key=None (str) primary key
+            types=None (dict) column name and type. TEXT for the columns not given.
         """
         self._logger.info("Create table [%s]" % tblname)
 
-        columns = self.escape_columns(columns)
+        types = types or {}
+        definitions = ", ".join(
+            "%s %s" % (escaped, types.get(column, "TEXT"))
+            for column, escaped in zip(columns, self.escape_columns(columns))
+        )
         if primary_key is None:
             sql = "CREATE TABLE IF NOT EXISTS %s (%s)"
-            self.execute(sql % (tblname, " TEXT, ".join(columns) + " TEXT"))
+            self.execute(sql % (tblname, definitions))
         else:
             sql = "CREATE TABLE IF NOT EXISTS %s (%s, PRIMARY KEY(%s))"
-            self.execute(sql % (tblname, " TEXT, ".join(columns) + " TEXT", primary_key))
+            self.execute(sql % (tblname, definitions, primary_key))
         self.commit()
 
     def drop_table(self, tblname):
@@ -188,6 +309,46 @@ class SqliteAdapter(_BaseObject):
         self.execute(sql)
         self.commit()
 
+    def drop_indexes(self, tblname):
+        """
+        Drop indexes of the table which are created by CREATE INDEX and are not unique.
+        Unique indexes are kept, because REPLACE INTO depends on them.
+
+        Args:
+            tblname (str): target table
+
+        Returns:
+            list: SQL to create the dropped indexes again. See restore_indexes.
+        """
+        names = [
+            row[1]
+            for row in self._con.execute("PRAGMA INDEX_LIST(%s)" % tblname)
+            if row[2] == 0 and row[3] == "c"
+        ]
+        sqls = []
+        for name in names:
+            (sql,) = self._con.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+            ).fetchone()
+            self._logger.info("Drop index during import: %s" % name)
+            self.execute('DROP INDEX "%s"' % name.replace('"', '""'))
+            sqls.append(sql)
+        self.commit()
+        return sqls
+
+    def restore_indexes(self, sqls):
+        """
+        Create indexes which were dropped by drop_indexes.
+
+        Args:
+            sqls (str[]): Returned value of drop_indexes
+        """
+        if not sqls:
+            return
+        for sql in sqls:
+            self.execute(sql)
+        self.commit()
+
     def get_column_names(self, tblname):
         """
         Returns column names.
@@ -198,7 +359,9 @@ class SqliteAdapter(_BaseObject):
         cur = self.fetch("PRAGMA TABLE_INFO(%s)" % tblname)
         return [x[1] for x in cur]
 
-    def import_table(self, src, tblname, refresh=True, encoding="utf-8", delimiter=","):
+    def import_table(
+        self, src, tblname, refresh=True, encoding="utf-8", delimiter=",", bulk=False, types=None
+    ):
         """
         Create new table and import all data from csv(tsv).
 
@@ -208,23 +371,37 @@ class SqliteAdapter(_BaseObject):
             refresh=True (bool): Drop table in advance, if table already exists
             encoding="utf-8" (str) Encoding
             delimiter="," (str) Set \t if src file is tsv
+            bulk=False (bool): If True, rows are inserted as lists in large batches,
+                               and committed once at the end of the file, so a load
+                               of several files has one transaction per file.
+                               Indexes of the table are dropped during the import.
+            types=None (dict): Column types of the table when it is created.
+                               Empty values of INTEGER and REAL columns are stored
+                               as NULL. See infer_types.
         """
 
         if refresh is True:
             self.drop_table(tblname)
 
-        with open(src, mode="r", encoding=encoding) as f:
+        if bulk is True:
+            return self._bulk_import(src, tblname, encoding, delimiter, types)
+
+        with File().open(src, mode="r", encoding=encoding) as f:
             reader = csv.DictReader(f, delimiter=delimiter)
             # Table columns will be the same with csv column names.
 
             columns = reader.fieldnames
-            self.create_table(tblname, columns)
+            self.create_table(tblname, columns, types=types)
+            numeric = [c for c in columns if self._is_numeric(types, c)]
 
             # Put all csv records into the table.
             self._logger.info("Insert all csv records into table[%s]" % tblname)
             params = []
             count = 0
             for row in reader:
+                for c in numeric:
+                    if row[c] == "":
+                        row[c] = None
                 params.append(row)
                 count = count + 1
                 if len(params) == self._COMMIT_COUNT:
@@ -237,6 +414,140 @@ class SqliteAdapter(_BaseObject):
 
             self._logger.info("Insert finished. total record: %s" % count)
 
+    def _bulk_import(self, src, tblname, encoding, delimiter, types):
+        batches = self.read_batches(src, encoding=encoding, delimiter=delimiter)
+        columns = next(batches)
+        if columns is None:
+            return
+        self.create_table(tblname, columns, types=types)
+        indexes = self.drop_indexes(tblname)
+
+        self._logger.info("Insert all csv records into table[%s]" % tblname)
+        count = 0
+        try:
+            for batch in batches:
+                self.insert_rows(tblname, columns, batch, types=types)
+                count += len(batch)
+                self._logger.debug("Inserted %s records" % count)
+            self.commit()
+        except Exception:
+            self._con.rollback()
+            raise
+        finally:
+            self.restore_indexes(indexes)
+        self._logger.info("Insert finished. total record: %s" % count)
+
+    def read_batches(self, src, encoding="utf-8", delimiter=",", batch_size=None):
+        """
+        Read csv(tsv) for insert_rows.
+        Yields the header first (None if the file is empty), and then lists of rows.
+
+        Args:
+            src (str): csv file path
+            encoding="utf-8" (str) Encoding
+            delimiter="," (str) Set \t if src file is tsv
+            batch_size=None (int): Number of rows in a list
+        """
+        batch_size = batch_size or self._BULK_COUNT
+        with File().open(src, mode="r", encoding=encoding, newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            columns = next(reader, None)
+            yield columns
+            if columns is None:
+                return
+            rows = self._fit_rows(reader, len(columns))
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    return
+                yield batch
+
+    def insert_rows(self, tblname, columns, rows, types=None):
+        """
+        Execute REPLACE INTO with rows as lists. Not committed.
+
+        Args:
+            tblname (str): target table
+            columns (str[]): column names
+            rows (list[]): values of the columns
+            types=None (dict): column name and type.
+                               Empty values of INTEGER and REAL columns are inserted as NULL,
+                               so that they do not sort as text after the numbers.
+        """
+        sql = "REPLACE INTO %s (%s) VALUES (%s)" % (
+            tblname,
+            ",".join(self.escape_columns(columns)),
+            ",".join("?" * len(columns)),
+        )
+        numeric = [i for i, c in enumerate(columns) if self._is_numeric(types, c)]
+        if numeric:
+            rows = self._null_blanks(rows, numeric)
+        self._con.executemany(sql, rows)
+
+    @staticmethod
+    def _is_numeric(types, column):
+        return bool(types) and types.get(column) in ("INTEGER", "REAL")
+
+    @staticmethod
+    def _null_blanks(rows, indexes):
+        for row in rows:
+            row = list(row)
+            for i in indexes:
+                if row[i] == "":
+                    row[i] = None
+            yield row
+
+    @staticmethod
+    def _fit_rows(reader, width):
+        """
+        Yields rows which have the same length as the header, same as the values which
+        csv.DictReader gives. Short rows are filled with None, and extra fields are dropped.
+        """
+        for row in reader:
+            if len(row) == width:
+                yield row
+            elif not row:
+                continue
+            elif len(row) > width:
+                yield row[:width]
+            else:
+                yield row + [None] * (width - len(row))
+
+    def infer_types(self, src, encoding="utf-8", delimiter=",", sample_size=10000):
+        """
+        Infer column types from the first rows of csv(tsv).
+        A column is INTEGER or REAL if all the non-empty values in the sample are
+        integers or numbers which SQLite stores as they are, TEXT otherwise.
+        Values after the sample which are not numbers are stored as TEXT by SQLite,
+        but numeric text like "007" is converted to a number.
+
+        Args:
+            src (str): csv file path
+            encoding="utf-8" (str) Encoding
+            delimiter="," (str) Set \t if src file is tsv
+            sample_size=10000 (int): Number of rows to see
+
+        Returns:
+            dict: column name and type. Columns which have only empty values are not included.
+        """
+        with File().open(src, mode="r", encoding=encoding, newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            columns = next(reader, None)
+            if columns is None:
+                return {}
+            types = {}
+            for row in islice(reader, sample_size):
+                for i, value in enumerate(row[: len(columns)]):
+                    type = types.get(i, "INTEGER")
+                    if value == "" or type == "TEXT":
+                        continue
+                    if type == "INTEGER" and not self._INTEGER.fullmatch(value):
+                        type = "REAL"
+                    if type == "REAL" and not self._REAL.fullmatch(value):
+                        type = "TEXT"
+                    types[i] = type
+        return {columns[i]: type for i, type in types.items()}
+
     def export_table(
         self,
         tblname,
@@ -266,15 +577,130 @@ class SqliteAdapter(_BaseObject):
         if order and len(order) > 0:
             sql += " ORDER BY " + ",".join(order)
 
-        with open(dest, "wt", encoding=encoding, newline="") as f:
-            cur = self.fetch(sql)
-            fieldnames = [d[0] for d in cur.description]
-            writer = csv.writer(f, quoting=quoting, delimiter=delimiter)
-            writer.writerow(fieldnames)
+        self.export_query(sql, dest, quoting=quoting, encoding=encoding, delimiter=delimiter)
 
-            for row in cur:
-                writer.writerow(row)
-            f.flush()
+    def export_query(
+        self,
+        sql,
+        dest,
+        params=(),
+        quoting=csv.QUOTE_ALL,
+        encoding="utf-8",
+        delimiter=",",
+        split_rows=None,
+        suffix_format=".{:02d}",
+    ):
+        """
+        Export the result of a query as csv.
+        Rows are fetched by fetchmany and written by writerows in large batches.
+
+        Args:
+            sql (str): SQL
+            dest (str): output csv file path
+            params=() (tuple): Parameters of the SQL
+            quoting=csv.QUOTE_ALL (int): Quoting of csv
+            encoding="utf-8" (str) Encoding
+            delimiter="," (str) Set \t if src file is tsv
+            split_rows=None (int): If given, a new file is created every split_rows rows,
+                                   and suffix_format with the index of the file is added
+                                   to the file name. e.g. result.00.csv, result.01.csv
+            suffix_format=".{:02d}" (str): Suffix of the split files
+
+        Returns:
+            list: Pairs of the written file path and the number of rows
+        """
+        root, ext = os.path.splitext(dest)
+        outputs = []
+        files = []
+
+        def open_next(header):
+            path = dest
+            if split_rows:
+                path = root + suffix_format.format(len(outputs)) + ext
+            if files:
+                files.pop().close()
+            files.append(File().open(path, mode="w", encoding=encoding, newline=""))
+            writer = csv.writer(files[0], quoting=quoting, delimiter=delimiter)
+            writer.writerow(header)
+            outputs.append([path, 0])
+            return writer
+
+        cur = self._con.cursor()
+        try:
+            cur.execute(sql, params)
+            header = [d[0] for d in cur.description]
+            writer = open_next(header)
+            while True:
+                rows = cur.fetchmany(self._BULK_COUNT)
+                if not rows:
+                    break
+                if not split_rows:
+                    writer.writerows(rows)
+                    outputs[-1][1] += len(rows)
+                    continue
+                while rows:
+                    if outputs[-1][1] >= split_rows:
+                        writer = open_next(header)
+                    batch = rows[: split_rows - outputs[-1][1]]
+                    writer.writerows(batch)
+                    outputs[-1][1] += len(batch)
+                    rows = rows[len(batch) :]
+        finally:
+            if files:
+                files.pop().close()
+            cur.close()
+        return [tuple(output) for output in outputs]
 
     def escape_columns(self, columns):
         return ["`%s`" % column for column in columns]
+
+
+class _ConnectionPool(object):
+    """
+    Idle sqlite connections shared by the adapters in a process.
+    A scenario runs in one process, and each child process of parallel steps has its own pool.
+    """
+
+    def __init__(self, size=8):
+        self._size = size
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self, key):
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def release(self, key, con):
+        if con.in_transaction:
+            con.rollback()
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._size:
+                idle.append(con)
+                return
+        con.close()
+
+    def close_all(self, dbname=None):
+        path = os.path.abspath(dbname) if dbname else None
+        with self._lock:
+            self._check_pid()
+            idle = {k: v for k, v in self._idle.items() if path is None or k[0] == path}
+            for key in idle:
+                del self._idle[key]
+        for cons in idle.values():
+            for con in cons:
+                con.close()
+
+    def _check_pid(self):
+        # Connections must not be used across fork. A child process starts with an empty pool.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = {}
+
+
+_POOL = _ConnectionPool()
+atexit.register(_POOL.close_all)
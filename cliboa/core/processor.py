@@ -17,6 +17,7 @@ import cloudpickle
 from multiprocessing_logging import install_mp_handler
 
 from cliboa import state
+from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.core.interface import _IExecute
 from cliboa.core.model import ParallelConfigModel
 from cliboa.util.base import _BaseObject
@@ -55,6 +56,9 @@ class _ParallelProcessor(_BaseObject, _IExecute):
         except Exception as e:
             _get_logger(__name__).exception(e)
             return "NG"
+        finally:
+            # Worker processes are terminated without exit handlers
+            SqliteAdapter.close_pool()
 
     def execute(self) -> int | None:
         state.set("_ProcessParallel")
@@ -12,6 +12,7 @@
 # all copies or substantial portions of the Software.
 #
 from cliboa import state
+from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.listener.base import BaseScenarioListener
 
 
@@ -34,6 +35,8 @@ class ScenarioStatusListener(BaseScenarioListener):
 
     def completion(self) -> None:
         state.set("_ExecuteScenario")
+        # Sqlite connections pooled by the steps are shared until the scenario ends
+        SqliteAdapter.close_pool()
         self.logger.info(
             f"Complete scenario execution. StepQueue size is {self.executor.current_steps_size}"
         )
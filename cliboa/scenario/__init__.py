@@ -59,6 +59,7 @@ from .transform.csv import (
     CsvRowDelete,
     CsvSort,
     CsvSplit,
+    CsvSqlQuery,
     CsvToJsonl,
     CsvTypeConvert,
     CsvValueExtract,
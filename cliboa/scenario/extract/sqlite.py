@@ -12,20 +12,51 @@
 # all copies or substantial portions of the Software.
 #
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from pydantic import Field
+from pydantic import Field, model_validator
 
+from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.scenario.sqlite import BaseSqlite
 from cliboa.util.base import _warn_deprecated_args
+from cliboa.util.exception import CliboaException, InvalidParameter
 
 
 class SqliteExport(BaseSqlite):
+    """
+    Export a table or the result of a query to csv.
+
+    If split_rows is given, a new file is created every split_rows rows.
+    If split_column is given, rows are exported to a file per value of the column,
+    and rows whose value is empty or NULL are exported to a file named with EMPTY_PARTITION.
+    Each file is exported with its own read-only connection, in parallel threads
+    when threads is more than 1.
+    """
+
+    # File name part of the partition of empty or NULL values of split_column
+    EMPTY_PARTITION = "_empty"
+
     class Arguments(BaseSqlite.Arguments):
-        tblname: str
+        tblname: str | None = None
+        query: str | None = None
         dest_path: str
         encoding: str = "utf-8"
         order: list[str] = Field(default_factory=list)
         no_duplicate: bool = False
+        split_rows: int | None = None
+        split_column: str | None = None
+        suffix_format: str = ".{:02d}"
+        threads: int = 1
+
+        @model_validator(mode="after")
+        def validate_source(self) -> "SqliteExport.Arguments":
+            if (self.tblname is None) == (self.query is None):
+                raise InvalidParameter("Either tblname or query is required.")
+            if self.split_rows is not None and self.split_column is not None:
+                raise InvalidParameter("split_rows and split_column can not be used together.")
+            if self.split_rows is not None and self.split_rows < 1:
+                raise InvalidParameter("split_rows must be 1 or more.")
+            return self
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -57,14 +88,106 @@ class SqliteExport(BaseSqlite):
         if dest_dir:
             os.makedirs(dest_dir, exist_ok=True)
 
-        self._sqlite_adptr.connect(self.args.dbname)
+        self._connect()
         try:
-            self._sqlite_adptr.export_table(
-                self.args.tblname,
-                self.args.dest_path,
-                encoding=self.args.encoding,
-                order=self.args.order,
-                no_duplicate=self.args.no_duplicate,
-            )
+            if self.args.split_column:
+                self._export_partitions()
+            elif self.args.query is None and self.args.split_rows is None:
+                self._sqlite_adptr.export_table(
+                    self.args.tblname,
+                    self.args.dest_path,
+                    encoding=self.args.encoding,
+                    order=self.args.order,
+                    no_duplicate=self.args.no_duplicate,
+                )
+            else:
+                outputs = self._sqlite_adptr.export_query(
+                    self._select() + self._order_by(),
+                    self.args.dest_path,
+                    encoding=self.args.encoding,
+                    split_rows=self.args.split_rows,
+                    suffix_format=self.args.suffix_format,
+                )
+                for path, count in outputs:
+                    self.logger.info("Exported %s rows to %s" % (count, path))
         finally:
             self._close_database()
+
+    def _select(self):
+        if self.args.query is None:
+            sql = "SELECT * FROM '%s'" % self.args.tblname
+        else:
+            sql = self.args.query.strip().rstrip(";")
+        if self.args.no_duplicate:
+            sql = "SELECT DISTINCT * FROM (%s)" % sql
+        return sql
+
+    def _order_by(self):
+        if self.args.order:
+            return " ORDER BY " + ",".join(self.args.order)
+        return ""
+
+    def _export_partitions(self):
+        column = '"%s"' % self.args.split_column.replace('"', '""')
+        source = "(%s)" % self._select()
+        cur = self._sqlite_adptr.fetch(
+            "SELECT DISTINCT %s FROM %s WHERE %s IS NOT NULL AND %s != ''"
+            % (column, source, column, column)
+        )
+        values = [row[0] for row in cur.fetchall()]
+        (empty,) = self._sqlite_adptr.fetch(
+            "SELECT COUNT(*) FROM %s WHERE %s IS NULL OR %s = ''" % (source, column, column)
+        ).fetchone()
+
+        def select(condition):
+            return "SELECT * FROM %s WHERE %s%s" % (source, condition, self._order_by())
+
+        root, ext = os.path.splitext(self.args.dest_path)
+        partitions = []
+        for value in values:
+            name = str(value)
+            if os.sep in name or (os.altsep and os.altsep in name) or name in (".", ".."):
+                raise CliboaException("%s can not be a part of file name." % name)
+            partitions.append(
+                (repr(value), select("%s = ?" % column), (value,), "%s.%s%s" % (root, name, ext))
+            )
+        if empty > 0:
+            partitions.append(
+                (
+                    "empty or NULL",
+                    select("%s IS NULL OR %s = ''" % (column, column)),
+                    (),
+                    "%s.%s%s" % (root, self.EMPTY_PARTITION, ext),
+                )
+            )
+
+        # Values like 1 and "1", or names which differ only in case, are the same file
+        paths = {}
+        for label, _, _, path in partitions:
+            key = os.path.normcase(path).lower()
+            if key in paths:
+                raise CliboaException(
+                    "Partitions %s and %s are written to the same file %s."
+                    % (paths[key], label, path)
+                )
+            paths[key] = label
+
+        def export(partition):
+            _, sql, params, path = partition
+            adapter = self._resolve("adapter_sqlite", SqliteAdapter)
+            self._connect(adapter, read_only=True)
+            try:
+                ((_, count),) = adapter.export_query(
+                    sql, path, params=params, encoding=self.args.encoding
+                )
+            finally:
+                adapter.close()
+            self.logger.info("Exported %s rows to %s" % (count, path))
+
+        if self.args.threads <= 1:
+            for partition in partitions:
+                export(partition)
+            return
+        with ThreadPoolExecutor(max_workers=self.args.threads) as executor:
+            for _ in executor.map(export, partitions):
+                pass
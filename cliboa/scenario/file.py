@@ -11,6 +11,8 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+from typing import Literal
+
 from pydantic import BaseModel
 
 from cliboa.adapter.file import File
@@ -29,6 +31,9 @@ class FileRead(BaseStep):
         src_pattern: str
         encoding: str = "utf-8"
         nonfile_error: bool = False
+        tree: bool = True
+        max_depth: int | None = None
+        listing_cache: bool = False
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -50,11 +55,29 @@ class FileRead(BaseStep):
     def _nonfile_error(self):
         return self.args.nonfile_error
 
-    def get_src_files(self, *args, **kwargs) -> list[str]:
+    def get_src_files(self, *args, src_pattern: str | None = None, **kwargs) -> list[str]:
+        """
+        Find files in src_dir which match src_pattern of the arguments,
+        or src_pattern if it is given.
+        """
+        # Only non-default options are given, for adapters which do not accept them
+        if self.args.tree is False:
+            kwargs.setdefault("tree", False)
+        if self.args.max_depth is not None:
+            kwargs.setdefault("max_depth", self.args.max_depth)
+        if self.args.listing_cache is True:
+            kwargs.setdefault("cache", True)
         return self._resolve("adapter_file", File).get_target_files(
-            self.args.src_dir, self.args.src_pattern, *args, **kwargs
+            self.args.src_dir, src_pattern or self.args.src_pattern, *args, **kwargs
         )
 
+    def open_file(self, path: str, mode: str = "r", **kwargs):
+        """
+        Open a file in the same way as builtin open.
+        Compressed files (.gz, .bz2, .xz, .zst) are read and written as streams.
+        """
+        return self._resolve("adapter_file", File).open(path, mode, **kwargs)
+
     def check_file_existence(self, files: list[str]) -> bool:
         """
         Check whether files exist.
@@ -80,6 +103,9 @@ class FileWrite(BaseStep):
         dest_dir: str | None = None
         dest_name: str | None = None
         encoding: str = "utf-8"
+        output_compression: (
+            Literal["gz", "gzip", "bz2", "bzip2", "xz", "zst", "zstd", "none"] | None
+        ) = None
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -11,11 +11,45 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import codecs
+import csv
+import os
+import tempfile
+from typing import Literal
+
 from cliboa.adapter.mysql import MysqlAdaptor
 from cliboa.scenario.rdbms import BaseRdbmsWrite
+from cliboa.util.compression import CompressionUtil
+from cliboa.util.exception import InvalidParameter, LocalInfileDisabled
 
 
 class MysqlWrite(BaseRdbmsWrite):
+    """
+    Import csv files into a table.
+    With load_method "load_data", each file is loaded by LOAD DATA LOCAL INFILE.
+    If the server does not allow it, rows are inserted by chunk_size instead.
+    Rows the server would skip or truncate with warnings fail the step as INSERT does.
+    """
+
+    # Python codec names and MySQL character sets
+    CHARSETS = {
+        "utf-8": "utf8mb4",
+        "utf-8-sig": "utf8mb4",
+        "ascii": "ascii",
+        "iso8859-1": "latin1",
+        "cp932": "cp932",
+        "shift_jis": "sjis",
+        "euc_jp": "ujis",
+    }
+
+    class Arguments(BaseRdbmsWrite.Arguments):
+        load_method: Literal["insert", "load_data"] = "insert"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # not parameter
+        self._load_data_disabled = False
+
     def get_adaptor(self):
         return self._resolve(
             "adaptor_db",
@@ -25,4 +59,43 @@ class MysqlWrite(BaseRdbmsWrite):
             self.args.password,
             self.args.dbname,
             self.args.port,
+            local_infile=self.args.load_method == "load_data",
         )
+
+    def insert_file(self, adaptor, query, file):
+        if self.args.load_method != "load_data" or self._load_data_disabled:
+            return super().insert_file(adaptor, query, file)
+
+        charset = self.CHARSETS.get(codecs.lookup(self.args.encoding).name)
+        if charset is None:
+            raise InvalidParameter(
+                "encoding %s is not supported by load_data. One of %s is allowed."
+                % (self.args.encoding, list(self.CHARSETS))
+            )
+        # Columns are mapped by the header of each file
+        with self.open_file(file, mode="r", encoding=self.args.encoding, newline="") as f:
+            columns = next(csv.reader(f), None)
+        if columns is None:
+            return 0
+
+        temp = None
+        if CompressionUtil.format_of(file):
+            # The server reads the file as it is, so it is decompressed beforehand.
+            fd, temp = tempfile.mkstemp(suffix=".csv")
+            os.close(fd)
+            CompressionUtil().decompress_file(file, temp)
+        try:
+            path = temp or file
+            with open(path, "rb") as f:
+                line_terminator = "\r\n" if f.readline().endswith(b"\r\n") else "\n"
+            try:
+                return adaptor.load_data(
+                    path, self.args.tblname, columns, charset, line_terminator=line_terminator
+                )
+            except LocalInfileDisabled as e:
+                self.logger.warning("%s Rows are inserted by chunk_size instead." % str(e))
+                self._load_data_disabled = True
+                return super().insert_file(adaptor, query, file)
+        finally:
+            if temp:
+                os.remove(temp)
@@ -11,11 +11,22 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import csv
+from typing import Literal
+
 from cliboa.adapter.postgres import PostgresqlAdaptor
 from cliboa.scenario.rdbms import BaseRdbmsWrite
 
 
 class PostgresqlWrite(BaseRdbmsWrite):
+    """
+    Import csv files into a table.
+    With load_method "copy", each file is streamed into COPY FROM STDIN.
+    """
+
+    class Arguments(BaseRdbmsWrite.Arguments):
+        load_method: Literal["insert", "copy"] = "insert"
+
     def get_adaptor(self):
         return self._resolve(
             "adaptor_db",
@@ -26,3 +37,15 @@ class PostgresqlWrite(BaseRdbmsWrite):
             self.args.dbname,
             self.args.port,
         )
+
+    def insert_file(self, adaptor, query, file):
+        if self.args.load_method != "copy":
+            return super().insert_file(adaptor, query, file)
+
+        # Columns are mapped by the header of each file
+        with self.open_file(file, mode="r", encoding=self.args.encoding, newline="") as f:
+            columns = next(csv.reader(f), None)
+        if columns is None:
+            return 0
+        with self.open_file(file, mode="r", encoding=self.args.encoding, newline="") as f:
+            return adaptor.copy_from(self.args.tblname, columns, f)
@@ -11,6 +11,10 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Full, Queue
+
 from pydantic import Field
 
 from cliboa.adapter.csv import Csv
@@ -27,6 +31,9 @@ class SqliteImport(SqliteTransaction, FileRead):
         index: list[str] = Field(default_factory=list)
         refresh: bool = True
         force_insert: bool = False
+        bulk: bool = False
+        infer_types: bool = False
+        concurrent_files: int = 1
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -61,16 +68,21 @@ class SqliteImport(SqliteTransaction, FileRead):
         files.sort()
         # Find csv columns from all csv files
         csv_columns = []
-        for file in files:
-            csv_columns.extend(Csv.get_column_names(file))
+        for columns in self._map_files(Csv.get_column_names, files):
+            csv_columns.extend(columns)
         csv_columns = sorted(set(csv_columns), key=csv_columns.index)
+        types = self._infer_types(files) if self.args.infer_types is True else None
 
         if self.args.refresh is True:
             # Drop table in advance, If refresh is True
             self._sqlite_adptr.drop_table(self.args.tblname)
-            self._sqlite_adptr.create_table(self.args.tblname, csv_columns, self.args.primary_key)
+            self._sqlite_adptr.create_table(
+                self.args.tblname, csv_columns, self.args.primary_key, types=types
+            )
         else:
-            self._sqlite_adptr.create_table(self.args.tblname, csv_columns, self.args.primary_key)
+            self._sqlite_adptr.create_table(
+                self.args.tblname, csv_columns, self.args.primary_key, types=types
+            )
 
             if self.args.force_insert is True:
                 db_columns = self._sqlite_adptr.get_column_names(self.args.tblname)
@@ -87,10 +99,24 @@ class SqliteImport(SqliteTransaction, FileRead):
                         % (csv_columns, db_columns)
                     )
 
-        for file in files:
-            self._sqlite_adptr.import_table(
-                file, self.args.tblname, refresh=False, encoding=self.args.encoding
-            )
+        indexes = []
+        if self.args.bulk is True:
+            # Indexes are created again after all the files are imported
+            indexes = self._sqlite_adptr.drop_indexes(self.args.tblname)
+        try:
+            if self.args.bulk is True:
+                self._import_pipelined(files, types)
+            else:
+                for file in files:
+                    self._sqlite_adptr.import_table(
+                        file,
+                        self.args.tblname,
+                        refresh=False,
+                        encoding=self.args.encoding,
+                        types=types,
+                    )
+        finally:
+            self._sqlite_adptr.restore_indexes(indexes)
 
         if self.args.index and len(self.args.index) > 0:
             """
@@ -98,3 +124,84 @@ class SqliteImport(SqliteTransaction, FileRead):
             better performance when insert data is large)
             """
             self._sqlite_adptr.add_index(self.args.tblname, self.args.index)
+
+    def _infer_types(self, files):
+        """
+        Merge column types inferred from each file. A column is INTEGER or REAL
+        only if it is so in all the files which have the column.
+        """
+        types = {}
+        inferred = self._map_files(
+            lambda file: self._sqlite_adptr.infer_types(file, encoding=self.args.encoding), files
+        )
+        for file_types in inferred:
+            for column, type in file_types.items():
+                if types.get(column, type) != type:
+                    type = "REAL" if {type, types[column]} == {"INTEGER", "REAL"} else "TEXT"
+                types[column] = type
+        return types
+
+    def _map_files(self, func, files):
+        """
+        Apply func to the files, in threads if bulk is True.
+        """
+        if self.args.bulk is not True or self.args.concurrent_files <= 1:
+            return list(map(func, files))
+        with ThreadPoolExecutor(max_workers=self.args.concurrent_files) as executor:
+            return list(executor.map(func, files))
+
+    def _import_pipelined(self, files, types=None):
+        """
+        Parse files in threads, and insert the rows in this thread.
+        SQLite allows only one writer, so the parsed rows are passed through bounded queues,
+        and parsing overlaps with inserting.
+        Each file has its own queue, and files are inserted in order, so that a later file
+        replaces the rows of the same primary key as the sequential import does.
+        """
+        workers = max(self.args.concurrent_files, 1)
+        queues = [Queue(maxsize=2) for _ in files]
+        stop = threading.Event()
+
+        def put(batches, item):
+            # Give up when the writer has stopped
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    continue
+            return False
+
+        def parse(file, batches):
+            try:
+                reader = self._sqlite_adptr.read_batches(file, encoding=self.args.encoding)
+                columns = next(reader)
+                for batch in reader:
+                    if not put(batches, (columns, batch)):
+                        return
+            except Exception as e:
+                put(batches, e)
+                return
+            put(batches, None)
+
+        self.logger.info("Insert all csv records into table[%s]" % self.args.tblname)
+        count = 0
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # Threads take the files in order, so the file being inserted is always parsed.
+            for file, batches in zip(files, queues):
+                executor.submit(parse, file, batches)
+            for batches in queues:
+                while True:
+                    item = batches.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    columns, batch = item
+                    self._sqlite_adptr.insert_rows(self.args.tblname, columns, batch, types=types)
+                    count += len(batch)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.logger.info("Insert finished. total record: %s" % count)
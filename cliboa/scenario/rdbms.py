@@ -13,9 +13,13 @@
 #
 import csv
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
 
 from pydantic import BaseModel
 
+from cliboa.adapter.file import File
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.file import FileRead
 from cliboa.util.exception import FileNotFound, InvalidParameter
@@ -74,31 +78,25 @@ class BaseRdbms(BaseStep):
         """
         Divide csv records into small-blocked parameter.
         Basically it uses for paramer of insert query.
+        Blocks are read from the file one by one, so that only one block is in memory.
 
         Arguments:
             path (str): Csv file path
             chunk_size=100 (int): Number of row in a single block
 
-        Returns:
-            array: [
-                    [(row1), (row2), (row3)]
-                    [(row4), (row5), (row6)]
-                    [(row7), (row8)]
-                ]
+        Yields:
+            list: [(row1), (row2), (row3)], [(row4), (row5), (row6)], [(row7), (row8)]
         """
-        tuples = []
-        with open(path, mode="r", encoding=encoding) as f:
+        with self._resolve("adapter_file", File).open(
+            path, mode="r", encoding=encoding, newline=""
+        ) as f:
             reader = csv.reader(f)
-            next(reader)  # ignore header
-            rows = []
-            for i, row in enumerate(reader, 1):
-                rows.append(tuple(row))
-                if i % chunk_size == 0:
-                    tuples.append(rows)
-                    rows = []
-        if rows:
-            tuples.append(rows)
-        return tuples
+            next(reader, None)  # ignore header
+            while True:
+                rows = [tuple(row) for row in islice(reader, chunk_size)]
+                if not rows:
+                    return
+                yield rows
 
 
 class BaseRdbmsRead(BaseRdbms):
@@ -107,6 +105,8 @@ class BaseRdbmsRead(BaseRdbms):
         query: str | None = None
         tblname: str | None = None
         encoding: str = "UTF-8"
+        fetch_size: int = 10000
+        writer_thread: bool = False
 
     def _property_path_reader(self, src, encoding="utf-8"):
         """
@@ -144,26 +144,72 @@ class BaseRdbmsRead(BaseRdbms):
                             "the `query` will be changed to accept only dictionary types. "
                         )
                     )
-                    query = self.args.property_path_reader(self.args.query)
+                    query = self._property_path_reader(self.args.query)
                 else:
                     query_filepath = self.args.source_path_reader(self.args.query)
                     with open(query_filepath, "r") as qf:
                         query = qf.read()
-                cur = adaptor.select(query)
-                writer = None
-                for i, row in enumerate(cur):
-                    if i == 0:
-                        if type(row) is tuple:
-                            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-                            columns = [i[0] for i in cur.description]
-                            writer.writerow(columns)
-                        elif type(row) is dict:
-                            writer = csv.DictWriter(f, list(row.keys()), quoting=csv.QUOTE_ALL)
-                            writer.writeheader()
-                    if writer:
-                        writer.writerow(self.callback_handler(row))
-                    else:
-                        f.write(self.callback_handler(row))
+                cur = adaptor.select_stream(query, itersize=self.args.fetch_size)
+                count = self._write_rows(f, cur)
+        self.logger.info("Wrote %s rows to %s" % (count, self.args.dest_path))
+
+    def _write_rows(self, f, cur):
+        """
+        Write rows of the cursor by fetch_size.
+        If writer_thread is True, a batch is written in another thread while the next
+        batch is fetched. At most two batches wait to be written.
+
+        Returns:
+            int: Number of written rows
+        """
+        batches = self._fetch_batches(cur)
+        rows = next(batches, None)
+        if rows is None:
+            return 0
+
+        if type(rows[0]) is tuple:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow([d[0] for d in cur.description])
+        elif type(rows[0]) is dict:
+            writer = csv.DictWriter(f, list(rows[0].keys()), quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+        else:
+            writer = None
+
+        def write(rows):
+            if writer:
+                writer.writerows(map(self.callback_handler, rows))
+            else:
+                f.write("".join(map(self.callback_handler, rows)))
+
+        count = 0
+        if self.args.writer_thread is False:
+            for rows in chain([rows], batches):
+                write(rows)
+                count += len(rows)
+            return count
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futures = deque()
+            try:
+                for rows in chain([rows], batches):
+                    futures.append(executor.submit(write, rows))
+                    count += len(rows)
+                    while len(futures) > 2 or (futures and futures[0].done()):
+                        futures.popleft().result()
+                while futures:
+                    futures.popleft().result()
+            finally:
+                for future in futures:
+                    future.cancel()
+        return count
+
+    def _fetch_batches(self, cur):
+        while True:
+            rows = cur.fetchmany(self.args.fetch_size)
+            if not rows:
+                return
+            yield rows
 
     def callback_handler(self, row):
         if type(row) is tuple:
@@ -178,6 +224,7 @@ class BaseRdbmsWrite(BaseRdbms, FileRead):
         tblname: str
         encoding: str = "UTF-8"
         chunk_size: int = 100
+        commit_interval: int | None = None
 
     def execute(self):
         # Plural files are allowed to insert at the same time,
@@ -186,18 +233,34 @@ class BaseRdbmsWrite(BaseRdbms, FileRead):
         if not self.check_file_existence(files):
             raise FileNotFound("No csv file was found.")
 
-        with open(files[0], mode="r", encoding=self.args.encoding) as f:
-            reader = csv.DictReader(f)
-            fieldnames = reader.fieldnames
+        with self.open_file(files[0], mode="r", encoding=self.args.encoding, newline="") as f:
+            fieldnames = next(csv.reader(f), None)
 
         query = self.insert_sql(self.args.tblname, fieldnames)
         self.logger.info("query: %s" % query)
         for file in files:
             with self.get_adaptor() as adaptor:
-                tuples = self.csv_as_params(
-                    file, chunk_size=self.args.chunk_size, encoding=self.args.encoding
-                )
-                self.logger.info("tuples: %s" % tuples)
-                for params in tuples:
-                    self.logger.info("params: %s" % params)
-                    adaptor.insert(query, params)
+                count = self.insert_file(adaptor, query, file)
+            self.logger.info("Inserted %s rows from %s" % (count, file))
+
+    def insert_file(self, adaptor, query, file):
+        """
+        Insert csv rows by chunk_size, and commit every commit_interval rows.
+        Rows after the last commit are committed when the adaptor is closed.
+
+        Returns:
+            int: Number of inserted rows
+        """
+        count = 0
+        uncommitted = 0
+        for params in self.csv_as_params(
+            file, chunk_size=self.args.chunk_size, encoding=self.args.encoding
+        ):
+            adaptor.insert(query, params)
+            count += len(params)
+            uncommitted += len(params)
+            if self.args.commit_interval and uncommitted >= self.args.commit_interval:
+                adaptor.commit()
+                uncommitted = 0
+                self.logger.info("Committed %s rows of %s" % (count, file))
+        return count
@@ -11,7 +11,9 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.scenario.base import BaseStep
@@ -31,6 +33,9 @@ class BaseSqlite(BaseStep):
     class Arguments(BaseModel):
         dbname: str
         vacuum: bool = False
+        profile: Literal["fast", "wal"] = "fast"
+        pragmas: dict[str, int | str] = Field(default_factory=dict)
+        pool: bool = False
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -48,6 +53,19 @@ class BaseSqlite(BaseStep):
             d[col[0]] = row[i]
         return d
 
+    def _connect(self, adapter=None, read_only=False, pooled=None):
+        """
+        Connect sqlite database with the profile and pragmas of the arguments
+        """
+        adapter = adapter or self._sqlite_adptr
+        adapter.connect(
+            self.args.dbname,
+            read_only=read_only,
+            profile=self.args.profile,
+            pragmas=self.args.pragmas,
+            pooled=self.args.pool if pooled is None else pooled,
+        )
+
     def _close_database(self):
         """
         Disconnect sqlite database (execute vacuum if necessary)
@@ -55,7 +73,7 @@ class BaseSqlite(BaseStep):
         self._sqlite_adptr.close()
         if self.args.vacuum is True:
             try:
-                self._sqlite_adptr.connect(self.args.dbname)
+                self._connect(pooled=False)
                 self._sqlite_adptr.execute("VACUUM")
             finally:
                 self._sqlite_adptr.close()
@@ -77,7 +95,7 @@ class SqliteTransaction(BaseSqlite):
         # TODO
         # Add to handle to select DB transaction seperation level
         self.logger.info("Start DB Transaction")
-        self._sqlite_adptr.connect(self.args.dbname)
+        self._connect()
         try:
             self.process()
             self._sqlite_adptr.commit()
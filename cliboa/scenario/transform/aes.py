@@ -1,15 +1,44 @@
+import base64
 import os
+import struct
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar, Literal
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 from cliboa.adapter.file import File
 from cliboa.scenario.transform.file import FileBaseTransform
+from cliboa.util.exception import CliboaException, InvalidParameter
 
 
 class AesBase(FileBaseTransform):
+    """
+    Segmented AES-GCM format ("gcm" mode) is as follows.
+
+    header: magic(8 bytes) | segment size(4 bytes) | salt(16 bytes) | nonce prefix(7 bytes)
+    segments: ciphertext and 16 bytes tag of each segment_size bytes of the plain text
+
+    Each file is encrypted with a key derived from the key file and the random salt by HKDF.
+    Nonce of a segment is nonce prefix | segment index(4 bytes) | last segment flag(1 byte),
+    and the header is authenticated as associated data of every segment.
+    Hence reordered, truncated or modified segments and header are detected on decryption.
+    """
+
+    MAGIC = b"CLBAESG1"
+    HEADER = struct.Struct(">8sI16s7s")
+    TAG_SIZE = 16
+
     class Arguments(FileBaseTransform.Arguments):
         key_dir: str
         key_pattern: str
+        threads: int = 1
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -34,9 +63,83 @@ class AesBase(FileBaseTransform):
     def _process(self, file, dest_path, key) -> None:
         raise NotImplementedError()
 
+    def _gcm(self, key, salt) -> AESGCM:
+        raw_key = base64.urlsafe_b64decode(key.strip())
+        if len(raw_key) != 32:
+            raise InvalidParameter("Key must be 32 url-safe base64-encoded bytes.")
+        file_key = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=salt, info=b"cliboa aes-gcm segments"
+        ).derive(raw_key)
+        return AESGCM(file_key)
+
+    @staticmethod
+    def _nonce(prefix, index, last) -> bytes:
+        if index >= 2**32:
+            raise CliboaException("Too many segments. Increase segment_size.")
+        return prefix + struct.pack(">IB", index, 1 if last else 0)
+
+    @staticmethod
+    def _segments(reader, size):
+        """
+        Yields (index, data, last) of each segment. The last segment may be empty.
+        """
+        index = 0
+        data = reader.read(size)
+        while True:
+            following = reader.read(size)
+            last = following == b""
+            yield index, data, last
+            if last:
+                return
+            data = following
+            index += 1
+
+    def _map_segments(self, func, segments, writer) -> None:
+        """
+        Apply func to segments in parallel threads, and write the results in order.
+        Only threads * 2 segments are kept in memory at once.
+        """
+        if self.args.threads <= 1:
+            for segment in segments:
+                writer.write(func(*segment))
+            return
+
+        with ThreadPoolExecutor(max_workers=self.args.threads) as executor:
+            futures = deque()
+            for segment in segments:
+                futures.append(executor.submit(func, *segment))
+                if len(futures) >= self.args.threads * 2:
+                    writer.write(futures.popleft().result())
+            while futures:
+                writer.write(futures.popleft().result())
+
+    def _stream(self, func, file, dest_path) -> None:
+        """
+        Call func(reader, writer), and replace dest_path with the output.
+        The output is written to a temporary file first, since the source file and
+        the destination file can be the same, and a partial output must not be left on error.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path) or None)
+        try:
+            with open(file, "rb") as i, os.fdopen(fd, "wb") as o:
+                func(i, o)
+            os.replace(tmp_path, dest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
 
 class AesEncrypt(AesBase):
+    class Arguments(AesBase.Arguments):
+        mode: Literal["fernet", "gcm"] = "fernet"
+        segment_size: int = 1048576
+
     def _process(self, file, dest_path, key) -> None:
+        if self.args.mode == "gcm":
+            self._stream(lambda i, o: self._encrypt_gcm(i, o, key), file, dest_path)
+            return
+
         with open(file, "r") as f:
             data = f.read()
 
@@ -44,9 +147,33 @@ class AesEncrypt(AesBase):
         with open(dest_path, "wb") as w:
             w.write(encrypt_data)
 
+    def _encrypt_gcm(self, reader, writer, key) -> None:
+        if not 0 < self.args.segment_size < 2**32:
+            raise InvalidParameter("segment_size must be between 1 and 4294967295.")
+        salt = os.urandom(16)
+        prefix = os.urandom(7)
+        header = self.HEADER.pack(self.MAGIC, self.args.segment_size, salt, prefix)
+        gcm = self._gcm(key, salt)
+
+        def encrypt(index, data, last):
+            return gcm.encrypt(self._nonce(prefix, index, last), data, header)
+
+        writer.write(header)
+        self._map_segments(encrypt, self._segments(reader, self.args.segment_size), writer)
+
 
 class AesDecrypt(AesBase):
+    """
+    Decrypt files encrypted by AesEncrypt. The mode is detected by the file header.
+    """
+
     def _process(self, file, dest_path, key) -> None:
+        with open(file, "rb") as f:
+            is_gcm = f.read(len(self.MAGIC)) == self.MAGIC
+        if is_gcm:
+            self._stream(lambda i, o: self._decrypt_gcm(i, o, key, file), file, dest_path)
+            return
+
         with open(file, "rb") as f:
             data = f.read()
 
@@ -54,3 +181,20 @@ class AesDecrypt(AesBase):
 
         with open(dest_path, "wb") as w:
             w.write(decrypt_data)
+
+    def _decrypt_gcm(self, reader, writer, key, file) -> None:
+        header = reader.read(self.HEADER.size)
+        if len(header) != self.HEADER.size:
+            raise CliboaException("Failed to decrypt %s. The header is broken." % file)
+        _, segment_size, salt, prefix = self.HEADER.unpack(header)
+        gcm = self._gcm(key, salt)
+
+        def decrypt(index, data, last):
+            try:
+                return gcm.decrypt(self._nonce(prefix, index, last), data, header)
+            except InvalidTag:
+                raise CliboaException(
+                    "Failed to decrypt %s. The file is broken or the key is wrong." % file
+                )
+
+        self._map_segments(decrypt, self._segments(reader, segment_size + self.TAG_SIZE), writer)
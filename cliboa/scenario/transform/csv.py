@@ -14,16 +14,25 @@
 import csv
 import glob
 import hashlib
+import hmac
+import multiprocessing
+import operator
 import os
 import re
 import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from functools import cached_property
-from typing import Literal, Set, Tuple
+from functools import cached_property, partial
+from typing import ClassVar, Literal, Set, Tuple
 
 import dask.dataframe as dask_df
 import jsonlines
+import numpy
 import pandas
+import pyarrow
+import pyarrow.parquet
 from pydantic import ConfigDict, Field, computed_field, model_validator
 
 from cliboa.adapter.csv import Csv
@@ -32,6 +41,8 @@ from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.scenario.transform.file import FileBaseTransform
 from cliboa.scenario.validator import EssentialParameters
 from cliboa.util.base import _BaseObject, _warn_deprecated  # _warn_deprecated_args
+from cliboa.util.compression import CompressionUtil
+from cliboa.util.csv_row import CsvRowEngine
 from cliboa.util.exception import CliboaException, FileNotFound, InvalidCount, InvalidParameter
 from cliboa.util.string import StringUtil
 
@@ -39,13 +50,24 @@ from cliboa.util.string import StringUtil
 class CsvColumnHash(FileBaseTransform):
     """
     Hash(SHA256) specific columns from csv file.
+
+    Each chunk hashes only the unique values of a column.
+    Chunks are hashed in parallel processes when processes is more than 1,
+    since hashing short values holds the GIL.
     """
 
     class Arguments(FileBaseTransform.Arguments):
         columns: list[str]
+        algorithm: Literal["sha256", "blake2b", "hmac-sha256"] = "sha256"
+        salt: str | None = None
+        key: str | None = None
+        processes: int = 1
 
-    def _stringToHash(self, string):
-        return hashlib.sha256(string.encode()).hexdigest()
+        @model_validator(mode="after")
+        def validate_key(self) -> "CsvColumnHash.Arguments":
+            if self.algorithm == "hmac-sha256" and not self.key:
+                raise InvalidParameter("key is required when algorithm is 'hmac-sha256'.")
+            return self
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -66,9 +88,7 @@ class CsvColumnHash(FileBaseTransform):
             chunksize=chunksize,
             na_filter=False,
         )
-        for df in tfr:
-            for c in self.args.columns:
-                df[c] = df[c].apply(self._stringToHash)
+        for df in self._hash_chunks(tfr):
             df.to_csv(
                 fo,
                 encoding=self.args.encoding,
@@ -78,6 +98,66 @@ class CsvColumnHash(FileBaseTransform):
             )
             first_write = False
 
+    def _hash_chunks(self, chunks):
+        """
+        Yields hashed chunks in order.
+        """
+        params = (self.args.columns, self.args.algorithm, self.args.salt, self.args.key)
+        processes = self.args.processes
+        if processes > 1 and multiprocessing.current_process().daemon:
+            # e.g. the step is executed in a parallel step, which is a daemon process
+            self.logger.warning("Daemon process can not create processes. Hash in one process.")
+            processes = 1
+        if processes <= 1:
+            for df in chunks:
+                yield _hash_columns(df, *params)
+            return
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # Keep the number of chunks in memory bounded
+            futures = deque()
+            for df in chunks:
+                futures.append(executor.submit(_hash_columns, df, *params))
+                if len(futures) >= processes * 2:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+
+def _hash_columns(df, columns, algorithm, salt=None, key=None):
+    """
+    Hash columns of the DataFrame. Only unique values of each column are hashed.
+    Defined at the module level to be called in other processes.
+    """
+    hash_value = _hasher(algorithm, salt, key)
+    for c in columns:
+        codes, uniques = pandas.factorize(df[c])
+        hashed = numpy.array([hash_value(v) for v in uniques], dtype=object)
+        df[c] = hashed[codes]
+    return df
+
+
+def _hasher(algorithm, salt=None, key=None):
+    """
+    Returns a function which hashes a string into a hex digest.
+    salt is prepended to every value, and key is the secret key of hmac-sha256 and blake2b.
+    """
+    if algorithm == "hmac-sha256":
+        base = hmac.new(key.encode(), digestmod=hashlib.sha256)
+    elif algorithm == "blake2b":
+        base = hashlib.blake2b(digest_size=32, key=key.encode() if key else b"")
+    else:
+        base = hashlib.sha256()
+    if salt:
+        base.update(salt.encode())
+
+    def hash_value(value):
+        h = base.copy()
+        h.update(value.encode())
+        return h.hexdigest()
+
+    return hash_value
+
 
 class CsvColumnExtract(FileBaseTransform):
     """
@@ -102,15 +182,53 @@ class CsvColumnExtract(FileBaseTransform):
         super().io_files(files, func=self.convert)
 
     def convert(self, fi, fo):
-        if self.args.columns:
-            Csv.extract_columns_with_names(fi, fo, self.args.columns)
-        elif self.args.column_numbers:
-            if isinstance(self.args.column_numbers, int) is True:
-                remain_column_numbers = [self.args.column_numbers]
+        with self.open_file(fi, mode="r", encoding="utf-8", newline="") as i:
+            header = next(csv.reader(i), None)
+        positions = self._positions(header) if header else []
+        if not positions:
+            # Nothing to read by columns
+            if self.args.columns:
+                Csv.extract_columns_with_names(fi, fo, self.args.columns)
             else:
-                column_numbers = self.args.column_numbers.split(",")
-                remain_column_numbers = [int(n) for n in column_numbers]
-            Csv.extract_columns_with_numbers(fi, fo, remain_column_numbers)
+                Csv.extract_columns_with_numbers(fi, fo, [])
+            return
+
+        chunk_size_handling(self._read_csv_func, fi, fo, header, positions)
+
+    def _read_csv_func(self, chunksize, fi, fo, header, positions):
+        # Used in chunk_size_handling
+        # Read only the columns to extract, and arrange them in the output order
+        usecols = sorted(set(positions))
+        order = [usecols.index(p) for p in positions]
+        tfr = pandas.read_csv(
+            fi,
+            dtype=str,
+            chunksize=chunksize,
+            na_filter=False,
+            usecols=usecols,
+        )
+        first_write = True
+        with self.open_file(fo, mode="w", encoding="utf-8", newline="") as o:
+            for df in tfr:
+                df = df.iloc[:, order]
+                df.columns = [header[p] for p in positions]
+                df.to_csv(o, header=first_write, index=False, lineterminator="\r\n")
+                first_write = False
+
+    def _positions(self, header):
+        """
+        Returns column positions to extract in the output order.
+        """
+        if self.args.columns:
+            return CsvRowEngine.column_indexes(header, self.args.columns)
+
+        if isinstance(self.args.column_numbers, int) is True:
+            remain_column_numbers = [self.args.column_numbers]
+        else:
+            column_numbers = self.args.column_numbers.split(",")
+            remain_column_numbers = [int(n) for n in column_numbers]
+        # Columns are extracted in the order of the file, and numbers out of range are ignored
+        return sorted({n - 1 for n in remain_column_numbers if 1 <= n <= len(header)})
 
 
 class CsvColumnDelete(FileBaseTransform):
@@ -133,14 +251,19 @@ class CsvColumnDelete(FileBaseTransform):
     def _read_csv_func(self, chunksize, fi, fo):
         # Used in chunk_size_handling
         first_write = True
+        pattern = re.compile(self.args.regex_pattern)
+        header = pandas.read_csv(fi, dtype=str, encoding=self.args.encoding, nrows=0)
+        remains = [i for i, c in enumerate(header.columns) if not pattern.fullmatch(c)]
         tfr = pandas.read_csv(
             fi,
             dtype=str,
             encoding=self.args.encoding,
             chunksize=chunksize,
             na_filter=False,
+            # Read only the remaining columns. All columns are read when all are deleted,
+            # so that the number of rows is kept.
+            usecols=remains or None,
         )
-        pattern = re.compile(self.args.regex_pattern)
         for df in tfr:
             for column in df.columns.values:
                 if pattern.fullmatch(column):
@@ -166,24 +289,47 @@ class CsvValueExtract(FileBaseTransform):
     class Arguments(FileBaseTransform.Arguments):
         column_regex_pattern: dict[str, str]
 
+        @computed_field
+        @property
+        def column_regex_compile(self) -> dict[str, re.Pattern]:
+            return {
+                column: re.compile(regex_pattern)
+                for column, regex_pattern in self.column_regex_pattern.items()
+            }
+
     def execute(self, *args):
         files = self.get_src_files()
         self.check_file_existence(files)
         super().io_files(files, func=self.convert)
 
     def convert(self, fi, fo):
-        with open(fi, mode="rt") as i:
-            reader = csv.DictReader(i)
-            with open(fo, mode="wt") as o:
-                writer = csv.DictWriter(o, reader.fieldnames)
-                writer.writeheader()
-                for line in reader:
-                    for column, regex_pattern in self.args.column_regex_pattern.items():
-                        if re.search(regex_pattern, line[column]):
-                            line[column] = re.search(regex_pattern, line[column]).group()
-                        else:
-                            line[column] = ""
-                    writer.writerow(dict(line))
+        chunk_size_handling(self._read_csv_func, fi, fo)
+
+    def _read_csv_func(self, chunksize, fi, fo):
+        # Used in chunk_size_handling
+        with (
+            self.open_file(fi, mode="rt", encoding=self.args.encoding, newline="") as i,
+            self.open_file(fo, mode="wt", encoding=self.args.encoding, newline="") as o,
+        ):
+            tfr = pandas.read_csv(i, dtype=str, chunksize=chunksize, na_filter=False)
+            first_write = True
+            for df in tfr:
+                for column, pattern in self.args.column_regex_compile.items():
+                    df[column] = df[column].map(partial(_first_match, pattern))
+                df.to_csv(o, header=first_write, index=False, lineterminator="\r\n")
+                first_write = False
+
+
+def _first_match(pattern, value):
+    """
+    Returns the first match of the whole pattern, or empty if not matched.
+    Patterns may contain groups, backreferences and inline flags,
+    so the search is done per value.
+    """
+    match = pattern.search(value)
+    if match is None:
+        return ""
+    return match.group(0)
 
 
 class CsvColumnConcat(FileBaseTransform):
@@ -349,19 +495,39 @@ class CsvMergeExclusive(FileBaseTransform):
 
     def _csv_write(self, fi, fo):
         # Used in chunk_size_handling
-        df = pandas.read_csv(fi, dtype=str, na_filter=False)
         if self.args.all_column:
+            df = pandas.read_csv(fi, dtype=str, na_filter=False)
             df_target_set = {hash(tuple(row)) for row in self.df_target_list}
             df = df.drop(self._all_elements_match(df.values.tolist(), df_target_set))
-        else:
-            df = df[~df[self.args.src_column].isin(self.df_target_list)]
-        df.to_csv(
-            fo,
-            encoding=self.args.encoding,
-            header=True,
-            index=False,
-            mode="a",
-        )
+            df.to_csv(
+                fo,
+                encoding=self.args.encoding,
+                header=True,
+                index=False,
+                mode="a",
+            )
+            return
+
+        # Copy the rows whose value of the column to compare does not match.
+        # The value is taken from the same row as is written.
+        targets = set(self.df_target_list)
+        with (
+            self.open_file(fi, mode="r", encoding="utf-8-sig", newline="") as i,
+            self.open_file(fo, mode="a", encoding=self.args.encoding, newline="") as o,
+        ):
+            reader = csv.reader(i)
+            header = next(reader)
+            position = header.index(self.args.src_column)
+            writer = csv.writer(o, lineterminator=os.linesep)
+            writer.writerow(header)
+            CsvRowEngine.write_rows(
+                writer,
+                (
+                    row
+                    for row in CsvRowEngine.records(reader, len(header))
+                    if row[position] not in targets
+                ),
+            )
 
     def _all_elements_match(self, df_src_list, df_target_set):
         return [i for i, row in enumerate(df_src_list) if hash(tuple(row)) in df_target_set]
@@ -379,19 +545,29 @@ class ColumnLengthAdjust(FileBaseTransform):
         files = self.get_src_files()
         self.check_file_existence(files)
 
-        self.io_writers(files, encoding=self.args.encoding)
-
         for fi, fo in super().io_writers(files, encoding=self.args.encoding):
-            reader = csv.DictReader(fi)
-            writer = csv.DictWriter(fo, reader.fieldnames)
-            writer.writeheader()
-
-            for row in reader:
-                for k, v in self.args.adjust.items():
-                    f1 = row.get(k)
-                    if len(f1) > v:
-                        row[k] = f1[:v]
-                writer.writerow(row)
+            reader = csv.reader(fi)
+            header = next(reader, None)
+            if header is None:
+                continue
+            writer = csv.writer(fo)
+            writer.writerow(header)
+
+            adjust = list(
+                zip(
+                    CsvRowEngine.column_indexes(header, self.args.adjust.keys()),
+                    self.args.adjust.values(),
+                )
+            )
+
+            def adjust_row(row):
+                for i, length in adjust:
+                    row[i] = row[i][:length]
+                return row
+
+            CsvRowEngine.write_rows(
+                writer, map(adjust_row, CsvRowEngine.records(reader, len(header)))
+            )
             fo.flush()
 
 
@@ -411,6 +587,7 @@ class CsvMerge(FileBaseTransform):
         join_on: str
         engine: Literal["pandas", "dask"] = "pandas"
         dtype: str | dict = "str"
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self):
         self.args.resolve_dest_dir()
@@ -504,19 +681,21 @@ class CsvColumnSelect(FileBaseTransform):
     def _read_csv_func(self, chunksize, fi, fo):
         # Used in chunk_size_handling
         first_write = True
+        header = pandas.read_csv(fi, dtype=str, encoding=self.args.encoding, nrows=0)
+        if set(self.args.column_order) - set(header.columns.values):
+            raise InvalidParameter(
+                "column_order define not included target file's column : %s"
+                % (set(self.args.column_order) - set(header.columns.values))
+            )
         tfr = pandas.read_csv(
             fi,
             dtype=str,
             encoding=self.args.encoding,
             chunksize=chunksize,
             na_filter=False,
+            usecols=self.args.column_order,
         )
         for df in tfr:
-            if set(self.args.column_order) - set(df.columns.values):
-                raise InvalidParameter(
-                    "column_order define not included target file's column : %s"
-                    % (set(self.args.column_order) - set(df.columns.values))
-                )
             df = df.loc[:, self.args.column_order]
             df.to_csv(
                 fo,
@@ -538,6 +717,7 @@ class CsvConcat(FileBaseTransform):
         src_filenames: list[str] | None = None
         dest_dir: str
         mode: Literal["all", "group"] = "all"
+        output_compression_supported: ClassVar[bool] = False
 
         @model_validator(mode="before")
         @classmethod
@@ -711,7 +891,7 @@ class CsvConvert(FileBaseTransform):
         self.io_files(files, ext=self.args.after_format, func=self.convert)
 
     def convert(self, fi, fo):
-        with open(fi, mode="rt", encoding=self.args.before_enc) as i:
+        with self.open_file(fi, mode="rt", encoding=self.args.before_enc) as i:
             reader = csv.reader(
                 i,
                 delimiter=Csv.delimiter_convert(self.args.before_format),
@@ -719,7 +899,7 @@ class CsvConvert(FileBaseTransform):
                 escapechar=self.args.before_escapechar,
                 doublequote=False if self.args.before_escapechar else True,
             )
-            with open(fo, mode="wt", newline="", encoding=self.args.after_enc) as o:
+            with self.open_file(fo, mode="wt", newline="", encoding=self.args.after_enc) as o:
                 writer = csv.writer(
                     o,
                     delimiter=Csv.delimiter_convert(self.args.after_format),
@@ -771,6 +951,7 @@ class CsvSort(FileBaseTransform):
         order: list = []
         quote: str = "QUOTE_MINIMAL"
         no_duplicate: bool = False
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         self.args.resolve_dest_dir()
@@ -789,7 +970,7 @@ class CsvSort(FileBaseTransform):
                 _, filename = os.path.split(file)
                 dest_file = os.path.join(self.args.dest_dir, filename)
 
-                sqlite.import_table(file, tblname, encoding=self.args.encoding)
+                sqlite.import_table(file, tblname, encoding=self.args.encoding, bulk=True)
                 sqlite.export_table(
                     tblname,
                     dest_file,
@@ -803,13 +984,204 @@ class CsvSort(FileBaseTransform):
             os.remove(dbname)
 
 
+class CsvSqlQuery(FileBaseTransform):
+    """
+    Run a SQL query over csv or parquet files, and write the result to a csv file.
+
+    Each item of tables registers the files which match the pattern in src_dir as a table.
+    Only the tables and the columns which the query reads are loaded into a temporary
+    sqlite database, and the result is written by batches.
+    """
+
+    class Arguments(FileBaseTransform.Arguments):
+        src_pattern: str | None = None
+        tables: dict[str, str]
+        query: str
+        dest_dir: str
+        dest_name: str
+        quote: str = "QUOTE_MINIMAL"
+        delimiter: str = ","
+        infer_types: bool = False
+        database: Literal["memory", "file"] = "memory"
+        output_compression_supported: ClassVar[bool] = False
+
+        @model_validator(mode="after")
+        def validate_tables(self) -> "CsvSqlQuery.Arguments":
+            if not self.tables:
+                raise InvalidParameter("tables is required.")
+            for tblname in self.tables:
+                if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", tblname):
+                    raise InvalidParameter("%s can not be a table name." % tblname)
+            return self
+
+    def execute(self, *args):
+        dest_dir = self.args.resolve_dest_dir()
+
+        sources = {}
+        for tblname, pattern in self.args.tables.items():
+            files = self.get_src_files(src_pattern=pattern)
+            if not self.check_file_existence(files):
+                return
+            sources[tblname] = files
+
+        if self.args.database == "memory":
+            dbname = ":memory:"
+        else:
+            fd, dbname = tempfile.mkstemp(suffix=".db", dir=dest_dir)
+            os.close(fd)
+
+        sqlite = self._resolve("adapter_sqlite", SqliteAdapter)
+        sqlite.connect(dbname)
+        try:
+            definitions = {}
+            for tblname, files in sources.items():
+                columns, types = self._definition(sqlite, files)
+                sqlite.create_table(tblname, columns, types=types)
+                definitions[tblname] = (columns, types)
+
+            referenced = sqlite.referenced_columns(self.args.query)
+            for tblname, files in sources.items():
+                if tblname not in referenced:
+                    continue
+                columns, types = definitions[tblname]
+                # At least one column is needed to count rows, e.g. SELECT COUNT(*)
+                columns = [c for c in columns if c in referenced[tblname]] or columns[:1]
+                sqlite.drop_table(tblname)
+                sqlite.create_table(tblname, columns, types=types)
+                count = 0
+                for file in files:
+                    count += self._load(sqlite, tblname, columns, types, file)
+                sqlite.commit()
+                self.logger.info("Loaded %s rows of %s into %s" % (count, columns, tblname))
+
+            ((path, count),) = sqlite.export_query(
+                self.args.query,
+                os.path.join(dest_dir, self.args.dest_name),
+                quoting=Csv.quote_convert(self.args.quote),
+                encoding=self.args.encoding,
+                delimiter=self.args.delimiter,
+            )
+            self.logger.info("Wrote %s rows to %s" % (count, path))
+        finally:
+            sqlite.close()
+            if dbname != ":memory:":
+                os.remove(dbname)
+
+    def _definition(self, sqlite, files):
+        """
+        Returns column names and types of the table.
+        All the files of a table must have the same columns.
+        """
+        definition = None
+        for file in files:
+            if self._is_parquet(file):
+                schema = pyarrow.parquet.read_schema(file)
+                columns = schema.names
+                types = {f.name: _sqlite_type(f.type) for f in schema}
+            else:
+                batches = sqlite.read_batches(
+                    file, encoding=self.args.encoding, delimiter=self.args.delimiter
+                )
+                columns = next(batches)
+                batches.close()
+                if columns is None:
+                    raise CliboaException("%s has no header." % file)
+                types = None
+                if definition is None and self.args.infer_types:
+                    types = sqlite.infer_types(
+                        file, encoding=self.args.encoding, delimiter=self.args.delimiter
+                    )
+            if definition is None:
+                definition = (columns, types)
+            elif columns != definition[0]:
+                raise CliboaException("Columns of %s differ from %s." % (file, files[0]))
+        return definition
+
+    def _load(self, sqlite, tblname, columns, types, file):
+        count = 0
+        if self._is_parquet(file):
+            for batch in pyarrow.parquet.ParquetFile(file).iter_batches(columns=columns):
+                rows = list(zip(*[_sqlite_values(array) for array in batch.columns]))
+                sqlite.insert_rows(tblname, columns, rows)
+                count += len(rows)
+            return count
+
+        batches = sqlite.read_batches(
+            file, encoding=self.args.encoding, delimiter=self.args.delimiter
+        )
+        header = next(batches)
+        pick = operator.itemgetter(*[header.index(c) for c in columns])
+        for rows in batches:
+            if len(columns) == 1:
+                rows = [(pick(row),) for row in rows]
+            else:
+                rows = [pick(row) for row in rows]
+            sqlite.insert_rows(tblname, columns, rows, types=types)
+            count += len(rows)
+        return count
+
+    @staticmethod
+    def _is_parquet(file):
+        return file.lower().endswith(".parquet")
+
+
+def _sqlite_type(t):
+    if pyarrow.types.is_integer(t) or pyarrow.types.is_boolean(t):
+        return "INTEGER"
+    elif pyarrow.types.is_floating(t):
+        return "REAL"
+    elif pyarrow.types.is_binary(t) or pyarrow.types.is_large_binary(t):
+        return "BLOB"
+    return "TEXT"
+
+
+def _sqlite_values(array):
+    """
+    Values of a pyarrow array which sqlite accepts.
+    Types which sqlite does not have, like timestamps and decimals, are stored as strings.
+    """
+    values = array.to_pylist()
+    t = array.type
+    if pyarrow.types.is_dictionary(t):
+        t = t.value_type
+    if (
+        pyarrow.types.is_integer(t)
+        or pyarrow.types.is_floating(t)
+        or pyarrow.types.is_boolean(t)
+        or pyarrow.types.is_string(t)
+        or pyarrow.types.is_large_string(t)
+        or pyarrow.types.is_binary(t)
+        or pyarrow.types.is_large_binary(t)
+        or pyarrow.types.is_null(t)
+    ):
+        return values
+    return [None if v is None else str(v) for v in values]
+
+
 class CsvToJsonl(FileBaseTransform):
     """
     Transform csv to jsonlines.
+
+    engine "pandas" reads the file by chunks, and serializes each chunk at once.
+    If typed is True, the type of each column is inferred from the first chunk, and
+    numbers and booleans are written as json values. Empty values of those columns are null.
     """
 
+    # Values which conform to the json number grammar
+    INTEGER = r"-?(?:0|[1-9][0-9]*)"
+    NUMBER = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+    BOOLEANS = {"true": True, "false": False}
+
     class Arguments(FileBaseTransform.Arguments):
-        pass
+        engine: Literal["python", "pandas"] = "python"
+        typed: bool = False
+        chunk_size: int = 100000
+
+        @model_validator(mode="after")
+        def validate_typed(self) -> "CsvToJsonl.Arguments":
+            if self.typed and self.engine != "pandas":
+                raise InvalidParameter("typed is available only when engine is 'pandas'.")
+            return self
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -818,13 +1190,82 @@ class CsvToJsonl(FileBaseTransform):
         super().io_files(files, ext="jsonl", func=self.convert)
 
     def convert(self, fi, fo):
+        if self.args.engine == "pandas":
+            return self._convert_by_pandas(fi, fo)
+
+        with (
+            self.open_file(fi, mode="r", encoding=self.args.encoding, newline="") as i,
+            self.open_file(fo, mode="w", encoding="utf-8") as o,
+            jsonlines.Writer(o) as writer,
+        ):
+            reader = csv.reader(i)
+            header = next(reader, None)
+            if header is not None:
+                writer.write_all(CsvRowEngine.dicts(reader, header))
+
+    def _convert_by_pandas(self, fi, fo):
+        types = None
         with (
-            open(fi, mode="r", encoding=self.args.encoding, newline="") as i,
-            jsonlines.open(fo, mode="w") as writer,
+            self.open_file(fi, mode="r", encoding=self.args.encoding, newline="") as i,
+            self.open_file(fo, mode="w", encoding="utf-8") as o,
         ):
-            reader = csv.DictReader(i)
-            for row in reader:
-                writer.write(row)
+            try:
+                chunks = pandas.read_csv(
+                    i, dtype=str, keep_default_na=False, chunksize=self.args.chunk_size
+                )
+                for df in chunks:
+                    if df.empty:
+                        continue
+                    if self.args.typed:
+                        if types is None:
+                            types = self._infer_types(df)
+                        self._apply_types(df, types)
+                    lines = df.to_json(
+                        orient="records", lines=True, force_ascii=False, double_precision=15
+                    )
+                    # pandas escapes every "/" as "\/", which is valid but not necessary
+                    o.write(lines.replace("\\/", "/"))
+            except pandas.errors.EmptyDataError:
+                # No header, same as engine "python"
+                pass
+
+    def _infer_types(self, df):
+        """
+        Returns json types of the columns in which all the non-empty values are
+        integers, numbers or booleans. Other columns are written as strings.
+        """
+        types = {}
+        for column in df.columns:
+            values = df[column][df[column].notna() & (df[column] != "")]
+            if values.empty:
+                continue
+            if values.str.lower().isin(self.BOOLEANS.keys()).all():
+                types[column] = "boolean"
+            elif values.str.fullmatch(self.INTEGER).all() and values.str.len().max() <= 18:
+                types[column] = "Int64"
+            elif values.str.fullmatch(self.NUMBER).all():
+                types[column] = "Float64"
+        return types
+
+    def _apply_types(self, df, types):
+        for column, type in types.items():
+            values = df[column]
+            empty = values.isna() | (values == "")
+            if type == "boolean":
+                lowered = values.str.lower()
+                valid = lowered.isin(self.BOOLEANS.keys()) | empty
+            else:
+                pattern = self.INTEGER if type == "Int64" else self.NUMBER
+                valid = values.str.fullmatch(pattern, na=False) | empty
+            if not valid.all():
+                raise CliboaException(
+                    "Column %s has a value '%s' which does not match the type %s "
+                    "inferred from the first rows." % (column, values[~valid].iloc[0], type)
+                )
+            if type == "boolean":
+                df[column] = lowered.map(self.BOOLEANS).astype("boolean")
+            else:
+                df[column] = pandas.to_numeric(values.mask(empty)).astype(type)
 
 
 class CsvColumnCopy(FileBaseTransform):
@@ -894,8 +1335,8 @@ class CsvColumnReplace(FileBaseTransform):
         def regex_compile(self) -> re.Pattern:
             return re.compile(self.regex_pattern)
 
-    def _replace_string(self, string):
-        return self.args.regex_compile.sub(self.args.rep_str, string)
+    def _replace_column(self, values):
+        return values.str.replace(self.args.regex_compile, self.args.rep_str, regex=True)
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -924,7 +1365,7 @@ class CsvColumnReplace(FileBaseTransform):
         )
 
         for df in tfr:
-            df[self.args.column] = df[self.args.column].apply(self._replace_string)
+            df[self.args.column] = self._replace_column(df[self.args.column])
             df.to_csv(
                 fo,
                 header=True if first_write else False,
@@ -1051,22 +1492,32 @@ class CsvRowDelete(FileBaseTransform):
 
     def convert(self, fi, fo):
         s = set()
-        with open(self.args.alter_path, "r") as al:
-            alt_reader = csv.DictReader(al, delimiter=self.args.delimiter)
-            for alt_row in alt_reader:
-                s.add(alt_row[self.args.alter_key_column])
-        with open(fi, "r") as i:
-            reader = csv.DictReader(i, delimiter=self.args.delimiter)
-            with open(fo, "w", newline="") as o:
-                writer = csv.DictWriter(
-                    o, fieldnames=reader.fieldnames, delimiter=self.args.delimiter
+        with self.open_file(self.args.alter_path, "r") as al:
+            alt_reader = csv.reader(al, delimiter=self.args.delimiter)
+            alt_header = next(alt_reader, None)
+            if alt_header is not None:
+                (alt_key,) = CsvRowEngine.column_indexes(alt_header, [self.args.alter_key_column])
+                for alt_row in CsvRowEngine.records(alt_reader, len(alt_header), allow_longer=True):
+                    s.add(alt_row[alt_key])
+        with self.open_file(fi, "r") as i:
+            reader = csv.reader(i, delimiter=self.args.delimiter)
+            header = next(reader, None)
+            with self.open_file(fo, "w", newline="") as o:
+                if header is None:
+                    return
+                writer = csv.writer(o, delimiter=self.args.delimiter)
+                writer.writerow(header)
+                (key,) = CsvRowEngine.column_indexes(header, [self.args.src_key_column])
+                # has_match: write rows whose key is not in the alter file, and vice versa
+                has_match = self.args.has_match
+                CsvRowEngine.write_rows(
+                    writer,
+                    (
+                        row
+                        for row in CsvRowEngine.records(reader, len(header))
+                        if (row[key] in s) is not has_match
+                    ),
                 )
-                writer.writeheader()
-                for row in reader:
-                    if self.args.has_match is True and row[self.args.src_key_column] not in s:
-                        writer.writerow(row)
-                    elif self.args.has_match is False and row[self.args.src_key_column] in s:
-                        writer.writerow(row)
 
 
 class CsvSplit(FileBaseTransform):
@@ -1084,14 +1535,20 @@ class CsvSplit(FileBaseTransform):
         rows: int | None = None
         suffix_format: str = ".{:02d}"
 
+        @model_validator(mode="after")
+        def validate_grouped_output_compression(self) -> "CsvSplit.Arguments":
+            if self.method == "grouped" and self.output_compression:
+                raise InvalidParameter("output_compression is not supported by method grouped.")
+            return self
+
     def execute(self, *args) -> None:
         files = self.get_src_files()
         self.check_file_existence(files)
 
         if self.args.method == "rows":
-            executeInstance = _CsvSplitMethodRows(self.args)
+            executeInstance = _CsvSplitMethodRows(self)
         elif self.args.method == "grouped":
-            executeInstance = _CsvSplitMethodGrouped(self.args)
+            executeInstance = _CsvSplitMethodGrouped(self)
         else:
             raise NotImplementedError(
                 f"Defined {self.args.method} is not implemented logic in execute."
@@ -1100,9 +1557,10 @@ class CsvSplit(FileBaseTransform):
 
 
 class _CsvSplitMethodBase(_BaseObject):
-    def __init__(self, args):
+    def __init__(self, step):
         super().__init__()
-        self.args = args
+        self.step = step
+        self.args = step.args
 
     def execute(self, files: list[str]) -> None:
         raise NotImplementedError("Please implement execute method.")
@@ -1122,8 +1580,10 @@ class _CsvSplitMethodRows(_CsvSplitMethodBase):
 
     def _split_one(self, filepath: str) -> None:
         self._logger.info("Split {:s} per {:d} rows".format(filepath, self.args.rows))
-        file_name, ext = os.path.splitext(os.path.basename(filepath))
-        with open(filepath, "r", encoding=self.args.encoding, newline="") as f_in:
+        name, compression = self.step.split_compression(os.path.basename(filepath))
+        file_name, ext = os.path.splitext(name)
+        ext += compression
+        with self.step.open_file(filepath, "r", encoding=self.args.encoding, newline="") as f_in:
             reader = csv.reader(f_in)
             try:
                 header = next(reader)
@@ -1152,7 +1612,9 @@ class _CsvSplitMethodRows(_CsvSplitMethodBase):
                     output_filepath = os.path.join(
                         self.args.resolve_dest_dir(), f"{file_name}{suffix}{ext}"
                     )
-                    f_out = open(output_filepath, "w", encoding=self.args.encoding, newline="")
+                    f_out = self.step.open_file(
+                        output_filepath, "w", encoding=self.args.encoding, newline=""
+                    )
                     writer = csv.writer(f_out)
                     writer.writerow(header)
                     file_index += 1
@@ -1238,7 +1700,9 @@ class _CsvSplitMethodGrouped(_CsvSplitMethodBase):
         output_path = os.path.join(self.args.resolve_dest_dir(), output_filename)
 
         write_mode = "w"
-        if found_empty is False:
+        is_first_write = True
+        # Compressed input is written decompressed, so it can not be copied as it is.
+        if found_empty is False and not CompressionUtil.format_of(files[-1]):
             files = files.copy()
             first_file = files.pop()
             shutil.copy2(first_file, output_path)
@@ -1246,8 +1710,8 @@ class _CsvSplitMethodGrouped(_CsvSplitMethodBase):
                 # When single input file and single key and not found empty value, very fast.
                 return
             write_mode = "a"
+            is_first_write = False
 
-        is_first_write = True
         with open(output_path, write_mode, newline="", encoding=self.args.encoding) as f_out:
             for file_path in files:
                 with pandas.read_csv(
@@ -1259,8 +1723,12 @@ class _CsvSplitMethodGrouped(_CsvSplitMethodBase):
                     for chunk in reader:
                         if found_empty is False:
                             chunk.to_csv(
-                                f_out, header=False, index=False, encoding=self.args.encoding
+                                f_out,
+                                header=is_first_write,
+                                index=False,
+                                encoding=self.args.encoding,
                             )
+                            is_first_write = False
                         else:
                             filtered_chunk = chunk[chunk[self.args.key_column].astype(str) == key]
                             if not filtered_chunk.empty:
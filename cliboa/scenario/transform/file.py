@@ -11,22 +11,30 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-import bz2
 import csv
-import gzip
+import multiprocessing
 import os
 import re
 import shutil
+import struct
 import tarfile
 import tempfile
+import warnings
 import zipfile
-from typing import Literal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import ClassVar, Literal
 
 import pandas
+from pandas.tseries.api import guess_datetime_format
+from pydantic import model_validator
 
 from cliboa.adapter.file import File
 from cliboa.scenario.file import FileRead, FileWrite
 from cliboa.util.base import _warn_deprecated_args
+from cliboa.util.compression import CompressionUtil
+from cliboa.util.csv_row import CsvRowEngine
 from cliboa.util.date import DateUtil
 from cliboa.util.exception import CliboaException, InvalidParameter
 
@@ -51,6 +59,15 @@ class FileBaseTransform(FileRead, FileWrite):
     class Arguments(FileRead.Arguments, FileWrite.Arguments):
         force_continue: bool = False
 
+        # Steps whose output files do not follow the input files set this to False
+        output_compression_supported: ClassVar[bool] = True
+
+        @model_validator(mode="after")
+        def validate_output_compression(self) -> "FileBaseTransform.Arguments":
+            if self.output_compression and not self.output_compression_supported:
+                raise InvalidParameter("output_compression is not supported by this step.")
+            return self
+
         def resolve_dest_dir(self) -> str:
             if self.dest_dir:
                 os.makedirs(self.dest_dir, exist_ok=True)
@@ -66,8 +83,25 @@ class FileBaseTransform(FileRead, FileWrite):
     def execute(self):
         pass
 
+    def split_compression(self, name):
+        """
+        Split a file name into the name without the compression extension
+        and the extension of the output file, e.g. ("test.csv", ".gz") for "test.csv.gz".
+        Compressed input files are read as decompressed streams.
+        Output is compressed as the input, unless output_compression is given.
+        """
+        compression = CompressionUtil.format_of(name)
+        if compression:
+            name = os.path.splitext(name)[0]
+        if self.args.output_compression == "none":
+            compression = None
+        elif self.args.output_compression:
+            compression = CompressionUtil.normalize_format(self.args.output_compression)
+        return name, "." + compression if compression else ""
+
     def check_output_path(self, input_path, ext):
         root, name = os.path.split(input_path)
+        name, suffix = self.split_compression(name)
 
         if ext:
             if ext.startswith("."):
@@ -77,6 +111,8 @@ class FileBaseTransform(FileRead, FileWrite):
         else:
             output_name = name
 
+        output_name += suffix
+
         if self.args.dest_dir:
             os.makedirs(self.args.dest_dir, exist_ok=True)
             output_dir = self.args.dest_dir
@@ -85,7 +121,8 @@ class FileBaseTransform(FileRead, FileWrite):
 
         output_path = os.path.join(output_dir, output_name)
 
-        fd, temp_file = tempfile.mkstemp()
+        # The temporary file has the same extension so that it is written compressed.
+        fd, temp_file = tempfile.mkstemp(suffix=suffix)
         os.close(fd)
         return output_path, temp_file
 
@@ -100,6 +137,7 @@ class FileBaseTransform(FileRead, FileWrite):
         If the parameter "dest_dir" was given, the output file will be created under
         the given directory and returns input and output path.
         If not, the output file will be created to the same directory to the input file.
+        When the input or output is compressed, use open_file to read and write the paths.
 
         Arguments:
             iterable (list): Input file list
@@ -146,16 +184,34 @@ class FileBaseTransform(FileRead, FileWrite):
 
             if mode == "t":
                 with (
-                    open(input_path, mode="r", encoding=encoding, newline="") as i,
-                    open(temp_file, mode="w", encoding=encoding, newline="") as o,
+                    self.open_file(input_path, mode="r", encoding=encoding, newline="") as i,
+                    self.open_file(temp_file, mode="w", encoding=encoding, newline="") as o,
                 ):
                     yield i, o
             elif mode == "b":
-                with open(input_path, mode="rb") as i, open(temp_file, mode="wb") as o:
+                with (
+                    self.open_file(input_path, mode="rb") as i,
+                    self.open_file(temp_file, mode="wb") as o,
+                ):
                     yield i, o
 
             self.overwrite_output_path(input_path, output_path, temp_file)
 
+    def map_files(self, func, files, workers=1):
+        """
+        Apply func to each file and returns the results in the order of files.
+        Files are processed in parallel threads when workers is more than 1.
+
+        Arguments:
+            func (callable): Function which receives a file path
+            files (list): Input file list
+            workers=1 (int): Number of files processed at the same time
+        """
+        if workers <= 1 or len(files) <= 1:
+            return [func(f) for f in files]
+        with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
+            return list(executor.map(func, files))
+
     def handle_error(self, e: Exception, input_path: str):
         # Please implement in a subclass if you would like to do something.
         self.logger.warning(
@@ -174,47 +230,80 @@ class FileDecompress(FileBaseTransform):
     class Arguments(FileBaseTransform.Arguments):
         chunk_size: int | None = None
         password: str | None = None
+        concurrent_files: int = 1
+        member_pattern: str | None = None
+        threads: int = 1
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         files = self.get_src_files()
         self.check_file_existence(files)
 
-        for f in files:
-            _, ext = os.path.splitext(f)
-            if ext == ".zip":
-                self.logger.info("Decompress zip file %s" % f)
-                if self.args.password is not None:
-                    pwd = self.args.password.encode(self.args.encoding)
-                else:
-                    pwd = self.args.password
-                with zipfile.ZipFile(f) as zp:
-                    zp.extractall(self.args.resolve_dest_dir(), pwd=pwd),  # nosec
-            elif ext == ".tar":
-                self.logger.info("Decompress tar file %s" % f)
-                with tarfile.open(f, "r:*") as tf:
-                    tf.extractall(self.args.resolve_dest_dir())  # nosec
-            elif ext == ".bz2":
-                self.logger.info("Decompress bz2 file %s" % f)
-                dcom_name = os.path.splitext(os.path.basename(f))[0]
-                decom_path = os.path.join(self.args.resolve_dest_dir(), dcom_name)
-                with bz2.open(f, mode="rb") as i, open(decom_path, mode="wb") as o:
-                    while True:
-                        buf = i.read(self.args.chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
-            elif ext == ".gz":
-                self.logger.info("Decompress gz file %s" % f)
-                dcom_name = os.path.splitext(os.path.basename(f))[0]
-                decom_path = os.path.join(self.args.resolve_dest_dir(), dcom_name)
-                with gzip.open(f, "rb") as i, open(decom_path, "wb") as o:
-                    while True:
-                        buf = i.read(self.args.chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
+        self.args.resolve_dest_dir()
+        self.map_files(self._decompress, files, self.args.concurrent_files)
+
+    def _decompress(self, f):
+        _, ext = os.path.splitext(f)
+        if ext == ".zip":
+            self.logger.info("Decompress zip file %s" % f)
+            if self.args.password is not None:
+                pwd = self.args.password.encode(self.args.encoding)
             else:
-                raise CliboaException("Unmatched any available decompress type %s" % f)
+                pwd = self.args.password
+            self._extract_zip(f, pwd)
+        elif ext == ".tar":
+            self.logger.info("Decompress tar file %s" % f)
+            self._extract_tar(f)
+        elif CompressionUtil.format_of(f):
+            self.logger.info("Decompress %s file %s" % (CompressionUtil.format_of(f), f))
+            dcom_name = os.path.splitext(os.path.basename(f))[0]
+            decom_path = os.path.join(self.args.resolve_dest_dir(), dcom_name)
+            CompressionUtil().decompress_file(f, decom_path, chunk_size=self.args.chunk_size)
+        else:
+            raise CliboaException("Unmatched any available decompress type %s" % f)
+
+    def _match_member(self, name):
+        if self.args.member_pattern is None:
+            return True
+        return re.fullmatch(self.args.member_pattern, name) is not None
+
+    def _extract_zip(self, f, pwd):
+        dest_dir = self.args.resolve_dest_dir()
+        with zipfile.ZipFile(f) as zp:
+            members = [n for n in zp.namelist() if self._match_member(n)]
+            if self.args.member_pattern is not None:
+                self.logger.info("%s members are matched in %s" % (len(members), f))
+            if self.args.threads <= 1 or len(members) <= 1:
+                zp.extractall(dest_dir, members=members, pwd=pwd)  # nosec
+                return
+
+        # Zip members are compressed independently, so they can be extracted in parallel.
+        # Each thread opens its own ZipFile not to share the file position.
+        def _extract(names):
+            with zipfile.ZipFile(f) as zp:
+                for name in names:
+                    try:
+                        zp.extract(name, dest_dir, pwd=pwd)  # nosec
+                    except FileExistsError:
+                        # The parent directory was created by another thread at the same time.
+                        zp.extract(name, dest_dir, pwd=pwd)  # nosec
+
+        threads = min(self.args.threads, len(members))
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(_extract, [members[i::threads] for i in range(threads)]))
+
+    def _extract_tar(self, f):
+        dest_dir = self.args.resolve_dest_dir()
+        if self.args.member_pattern is None:
+            with tarfile.open(f, "r:*") as tf:
+                tf.extractall(dest_dir)  # nosec
+            return
+
+        # Read as a stream, and unmatched members are skipped without being written.
+        with tarfile.open(f, "r|*") as tf:
+            for member in tf:
+                if self._match_member(member.name):
+                    tf.extract(member, dest_dir)  # nosec
 
 
 class FileCompress(FileBaseTransform):
@@ -223,95 +312,311 @@ class FileCompress(FileBaseTransform):
     """
 
     class Arguments(FileBaseTransform.Arguments):
-        format: Literal["zip", "gz", "gzip", "bz2", "bzip2"]
+        format: Literal["zip", "gz", "gzip", "bz2", "bzip2", "xz", "zst", "zstd"]
         chunk_size: int = 1048576
+        level: int | None = None
+        threads: int = 1
+        block_size: int = 4194304
+        concurrent_files: int = 1
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         files = self.get_src_files()
         self.check_file_existence(files)
 
+        self.args.resolve_dest_dir()
+        self.map_files(self._compress, files, self.args.concurrent_files)
+
+    def _compress(self, f):
         dest_dir = self.args.resolve_dest_dir()
-        for f in files:
-            if self.args.format == "zip":
-                self.logger.info("Compress file %s to zip." % f)
-                with zipfile.ZipFile(
-                    os.path.join(dest_dir, (os.path.basename(f) + ".zip")),
-                    "w",
-                    zipfile.ZIP_DEFLATED,
-                ) as o:
-                    o.write(f, arcname=os.path.basename(f))
-            elif self.args.format in ("gz", "gzip"):
-                self.logger.info("Compress file %s to gzip." % f)
-                com_path = os.path.join(dest_dir, (os.path.basename(f) + ".gz"))
-                with open(f, "rb") as i, gzip.open(com_path, "wb") as o:
-                    while True:
-                        buf = i.read(self.args.chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
-            elif self.args.format in ("bz2", "bzip2"):
-                self.logger.info("Compress file %s to bzip2." % f)
-                com_path = os.path.join(dest_dir, (os.path.basename(f) + ".bz2"))
-                with open(f, "rb") as i, bz2.open(com_path, "wb") as o:
-                    while True:
-                        buf = i.read(self.args.chunk_size)
-                        if buf == b"":
-                            break
-                        o.write(buf)
+        if self.args.format == "zip":
+            self.logger.info("Compress file %s to zip." % f)
+            with zipfile.ZipFile(
+                os.path.join(dest_dir, (os.path.basename(f) + ".zip")),
+                "w",
+                zipfile.ZIP_DEFLATED,
+                compresslevel=self.args.level,
+            ) as o:
+                o.write(f, arcname=os.path.basename(f))
+        else:
+            fmt = CompressionUtil.normalize_format(self.args.format)
+            self.logger.info("Compress file %s to %s." % (f, fmt))
+            com_path = os.path.join(dest_dir, os.path.basename(f) + "." + fmt)
+            CompressionUtil().compress_file(
+                f,
+                com_path,
+                fmt,
+                level=self.args.level,
+                chunk_size=self.args.chunk_size,
+                threads=self.args.threads,
+                block_size=self.args.block_size,
+            )
 
 
 class DateFormatConvert(FileBaseTransform):
     """
     Convert csv (tsv) date field columns to another date field format columns
+
+    engine "pandas" reads the file by chunks, and converts each column at once
+    with the date format inferred from the sample values of the column.
+    Values which do not conform to the inferred format are parsed one by one
+    in the same way as engine "python".
     """
 
+    # Number of converted date strings to remember
+    CACHE_SIZE = 65536
+
+    # Number of unique values to infer and validate the date format of a column
+    SAMPLE_SIZE = 100
+
     class Arguments(FileBaseTransform.Arguments):
         columns: list[str]
         formatter: str
+        engine: Literal["python", "pandas"] = "python"
+        chunk_size: int = 100000
 
     def execute(self, *args):
         files = self.get_src_files()
         self.check_file_existence(files)
 
-        _, ext = os.path.splitext(files[0])
+        root, ext = os.path.splitext(files[0])
+        if CompressionUtil.format_of(files[0]):
+            _, ext = os.path.splitext(root)
         if ext == ".csv":
             delimiter = ","
         elif ext == ".tsv":
             delimiter = "\t"
 
+        convert = self._converter()
         for ins, ous in self.io_writers(files, encoding=self.args.encoding):
-            reader = csv.DictReader(ins, delimiter=delimiter)
-            writer = csv.DictWriter(ous, reader.fieldnames)
-            writer.writeheader()
-            date_util = DateUtil()
-            for row in reader:
-                for column in self.args.columns:
-                    r = row.get(column)
-                    if not r:
-                        continue
-                    row[column] = date_util.convert_date_format(r, self.args.formatter)
-                writer.writerow(row)
+            if self.args.engine == "pandas":
+                self._convert_by_pandas(ins, ous, delimiter, convert)
+                continue
+
+            reader = csv.reader(ins, delimiter=delimiter)
+            header = next(reader, None)
+            if header is None:
+                continue
+            writer = csv.writer(ous)
+            writer.writerow(header)
+            indexes = CsvRowEngine.column_indexes(header, self.args.columns, ignore_missing=True)
+
+            def convert_row(row):
+                for i in indexes:
+                    if row[i]:
+                        row[i] = convert(row[i])
+                return row
+
+            CsvRowEngine.write_rows(
+                writer, map(convert_row, CsvRowEngine.records(reader, len(header)))
+            )
+
+    def _converter(self):
+        """
+        Returns a function which converts a date string, and memoizes the results.
+        Files usually repeat the same dates many times.
+        """
+        date_util = DateUtil()
+
+        @lru_cache(maxsize=self.CACHE_SIZE)
+        def convert(value):
+            return date_util.convert_date_format(value, self.args.formatter)
+
+        return convert
+
+    def _convert_by_pandas(self, ins, ous, delimiter, convert):
+        formats = {}
+        header = True
+        for df in pandas.read_csv(
+            ins,
+            sep=delimiter,
+            dtype=str,
+            keep_default_na=False,
+            chunksize=self.args.chunk_size,
+        ):
+            for column in self.args.columns:
+                if column not in df.columns:
+                    continue
+                values = df[column]
+                uniques = values[values != ""].dropna().unique()
+                if len(uniques) == 0:
+                    continue
+                if column not in formats:
+                    formats[column] = self._infer_format(uniques, convert)
+                    self.logger.info("Inferred date format of %s: %s" % (column, formats[column]))
+                converted = self._convert_uniques(uniques, formats[column], convert)
+                df[column] = values.map(dict(zip(uniques, converted))).fillna(values)
+            df.to_csv(ous, header=header, index=False, lineterminator="\r\n")
+            header = False
+
+    def _infer_format(self, uniques, convert):
+        """
+        Guess the date format from a sample value, and validate it with the sample values.
+        Returns None if the format could not be guessed, or the result differs from
+        the per-value conversion.
+        """
+        samples = uniques[: self.SAMPLE_SIZE]
+        fmt = guess_datetime_format(samples[0])
+        if fmt is None:
+            return None
+        parsed = self._parse(samples, fmt)
+        if parsed is None:
+            return None
+        for value, dt in zip(samples, parsed):
+            if pandas.isna(dt):
+                continue
+            if dt.strftime(self.args.formatter) != convert(value):
+                return None
+        return fmt
+
+    def _convert_uniques(self, uniques, fmt, convert):
+        parsed = self._parse(uniques, fmt) if fmt else None
+        if parsed is None:
+            return [convert(v) for v in uniques]
+
+        result = pandas.Series(uniques, dtype=object, copy=True)
+        conforming = parsed.notna()
+        result[conforming] = parsed[conforming].dt.strftime(self.args.formatter)
+        result[~conforming] = result[~conforming].map(convert)
+        return result.tolist()
+
+    def _parse(self, values, fmt):
+        """
+        Returns datetime64 Series, or None if values can not be parsed at once
+        (e.g. mixed time zones).
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                parsed = pandas.to_datetime(
+                    pandas.Series(values, dtype=object), format=fmt, errors="coerce"
+                )
+            except (ValueError, TypeError, OverflowError):
+                return None
+        if not pandas.api.types.is_datetime64_any_dtype(parsed):
+            return None
+        return parsed
 
 
 class ExcelConvert(FileBaseTransform):
     """
     Convert excel to other format
+
+    engine "openpyxl" reads xlsx files in read-only mode and writes csv row by row,
+    so the memory usage does not depend on the size of the sheet.
+    If sheet is "all", each sheet is exported to its own file "<name>_<sheet>.csv",
+    in parallel processes when processes is more than 1.
     """
 
     class Arguments(FileBaseTransform.Arguments):
-        pass
+        engine: Literal["pandas", "openpyxl"] = "pandas"
+        sheet: str | int | None = None
+        processes: int = 1
 
     def execute(self, *args):
         files = self.get_src_files()
         self.check_file_existence(files)
 
         # TODO Currently only excel to csv is supported.
-        self.io_files(files, ext="csv", func=self.convert)
+        if self.args.sheet == "all":
+            for file in files:
+                self._convert_all_sheets(file)
+        else:
+            self.io_files(files, ext="csv", func=self.convert)
 
     def convert(self, fi, fo):
         self.logger.info("Convert %s to %s" % (fi, fo))
-        df = pandas.read_excel(fi)
-        df.to_csv(fo, encoding=self.args.encoding)
+        sheet = 0 if self.args.sheet is None else self.args.sheet
+        if self.args.engine == "openpyxl":
+            _export_excel_sheet(fi, fo, sheet, self.args.encoding)
+        else:
+            df = pandas.read_excel(fi, sheet_name=sheet)
+            df.to_csv(fo, encoding=self.args.encoding)
+
+    def _convert_all_sheets(self, fi):
+        root, name = os.path.split(fi)
+        stem, ext = os.path.splitext(name)
+        if self.args.engine == "pandas":
+            sheets = pandas.read_excel(fi, sheet_name=None)
+            names = list(sheets.keys())
+        else:
+            sheets = None
+            names = _excel_sheet_names(fi)
+
+        outputs = []
+        for sheet in names:
+            sheet_path = os.path.join(root, "%s_%s%s" % (stem, sheet, ext))
+            output_path, temp_file = self.check_output_path(sheet_path, "csv")
+            self.logger.info("Convert sheet %s of %s to %s" % (sheet, fi, output_path))
+            outputs.append((sheet, output_path, temp_file))
+
+        try:
+            if sheets is not None:
+                for sheet, _, temp_file in outputs:
+                    sheets[sheet].to_csv(temp_file, encoding=self.args.encoding)
+            else:
+                self._export_sheets(fi, outputs)
+        except Exception as e:
+            for _, _, temp_file in outputs:
+                if os.path.exists(temp_file):
+                    os.remove(temp_file)
+            if self.args.force_continue is True:
+                self.handle_error(e, fi)
+                return
+            raise e
+
+        for _, output_path, temp_file in outputs:
+            self.overwrite_output_path(fi, output_path, temp_file)
+
+    def _export_sheets(self, fi, outputs):
+        processes = min(self.args.processes, len(outputs))
+        if processes > 1 and multiprocessing.current_process().daemon:
+            # e.g. the step is executed in a parallel step, which is a daemon process
+            self.logger.warning("Daemon process can not create processes. Export in one process.")
+            processes = 1
+        if processes <= 1:
+            for sheet, _, temp_file in outputs:
+                _export_excel_sheet(fi, temp_file, sheet, self.args.encoding)
+            return
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_export_excel_sheet, fi, temp_file, sheet, self.args.encoding)
+                for sheet, _, temp_file in outputs
+            ]
+            for future in futures:
+                future.result()
+
+
+def _openpyxl():
+    try:
+        import openpyxl
+
+        return openpyxl
+    except ImportError:
+        raise CliboaException("engine 'openpyxl' requires the openpyxl package installed.")
+
+
+def _excel_sheet_names(path):
+    workbook = _openpyxl().load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def _export_excel_sheet(src, dest, sheet, encoding):
+    """
+    Write cell values of a sheet to csv row by row. sheet is a name or an index.
+    Defined at the module level to be called in other processes.
+    """
+    workbook = _openpyxl().load_workbook(src, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        with File().open(dest, mode="w", encoding=encoding, newline="") as o:
+            CsvRowEngine.write_rows(csv.writer(o), worksheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
 
 
 class FileCopy(FileBaseTransform):
@@ -321,6 +626,7 @@ class FileCopy(FileBaseTransform):
 
     class Arguments(FileBaseTransform.Arguments):
         dest_dir: str
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -355,7 +661,7 @@ class FileDivide(FileBaseTransform):
         self.check_file_existence(files)
 
         for file in files:
-            fname = os.path.basename(file)
+            fname, compression = self.split_compression(os.path.basename(file))
 
             px = ""
             if fname.startswith("."):
@@ -370,11 +676,11 @@ class FileDivide(FileBaseTransform):
                 ext = ""
 
             if self.args.header:
-                with open(file, encoding=self.args.encoding) as i:
+                with self.open_file(file, encoding=self.args.encoding) as i:
                     self._header_row = i.readline()
 
             row = self._ifile_reader(file)
-            newfilename = px + nameonly + self.args.suffix_pattern + ext
+            newfilename = px + nameonly + self.args.suffix_pattern + ext + compression
 
             dest_dir = self.args.resolve_dest_dir()
             has_left = True
@@ -385,7 +691,7 @@ class FileDivide(FileBaseTransform):
                 index = index + 1
 
     def _ifile_reader(self, filepath):
-        with open(filepath, encoding=self.args.encoding) as i:
+        with self.open_file(filepath, encoding=self.args.encoding) as i:
             if self.args.header is True:
                 i.readline()
             for line in i:
@@ -394,7 +700,7 @@ class FileDivide(FileBaseTransform):
     def _ofile_generator(self, filepath, row):
         left = False
         written = False
-        with open(filepath, mode="w", encoding=self.args.encoding) as o:
+        with self.open_file(filepath, mode="w", encoding=self.args.encoding) as o:
             if self.args.header is True:
                 o.write(self._header_row)
             for i, line in enumerate(row):
@@ -420,6 +726,7 @@ class FileRename(FileBaseTransform):
         rep_str: str | None = None
         ext: str = ""
         without_ext: bool = True
+        output_compression_supported: ClassVar[bool] = False
 
     def prefix(self, prefix):
         self._prefix = prefix
@@ -500,6 +807,8 @@ class FileConvert(FileBaseTransform):
         encoding_from: str
         encoding_to: str
         errors: str | None = None
+        chunk_size: int = 8388608
+        detect_sample_size: int = 1048576
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -508,12 +817,21 @@ class FileConvert(FileBaseTransform):
         self.io_files(files, func=self.convert)
 
     def convert(self, fi, fo):
-        File().convert_encoding(
+        file = self._resolve("adapter_file", File)
+        encoding_from = self.args.encoding_from
+        if encoding_from.lower() == "auto":
+            encoding_from = file.detect_encoding(fi, sample_size=self.args.detect_sample_size)
+            if encoding_from is None:
+                raise CliboaException("Failed to detect encoding of %s" % fi)
+            self.logger.info("Detected encoding %s of file %s" % (encoding_from, fi))
+
+        file.convert_encoding(
             fi,
             fo,
-            self.args.encoding_from,
+            encoding_from,
             self.args.encoding_to,
             self.args.errors,
+            chunk_size=self.args.chunk_size,
         )
 
         self.logger.info("Encoded file %s" % fi)
@@ -522,12 +840,35 @@ class FileConvert(FileBaseTransform):
 class FileArchive(FileBaseTransform):
     """
     Create archeve object.a
+
+    zip members are compressed in parallel threads when threads is more than 1,
+    and written into the archive in the order of the source files.
+    Members which are already compressed (e.g. .gz, .parquet, .zip) are always stored.
     """
 
+    # Signature, and lengths of the file name and the extra field of a zip local file header
+    LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+    # Extensions of members which are not worth compressing again
+    STORED_EXTENSIONS = (".gz", ".bz2", ".xz", ".zst", ".zip", ".parquet")
+
+    ZIP_METHODS = {
+        "stored": zipfile.ZIP_STORED,
+        "deflated": zipfile.ZIP_DEFLATED,
+        "bzip2": zipfile.ZIP_BZIP2,
+        "lzma": zipfile.ZIP_LZMA,
+    }
+
     class Arguments(FileBaseTransform.Arguments):
         dest_name: str
-        format: Literal["zip", "tar"]
+        format: Literal["zip", "tar", "tar.gz"]
         create_dir: bool = False
+        compression: Literal["stored", "deflated", "bzip2", "lzma"] = "stored"
+        level: int | None = None
+        threads: int = 1
+        block_size: int = 4194304
+        allow_zip64: bool = True
+        output_compression_supported: ClassVar[bool] = False
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -540,20 +881,203 @@ class FileArchive(FileBaseTransform):
         if self.args.format == "tar":
             with tarfile.open(dest_path, "w") as tar:
                 for file in files:
-                    arcname = (
-                        os.path.join(self.args.dest_name, os.path.basename(file))
-                        if self.args.create_dir
-                        else os.path.basename(file)
-                    )
-                    tar.add(file, arcname=arcname)
+                    tar.add(file, arcname=self._arcname(file))
+        elif self.args.format == "tar.gz":
+            self._create_tar_gz(dest_path, files)
         elif self.args.format == "zip":
-            with zipfile.ZipFile(dest_path, "w") as zp:
-                for file in files:
-                    arcname = (
-                        os.path.join(self.args.dest_name, os.path.basename(file))
-                        if self.args.create_dir
-                        else os.path.basename(file)
-                    )
-                    zp.write(file, arcname=arcname)
+            self._create_zip(dest_path, files)
+        else:
+            raise InvalidParameter("'format' must set one of the followings [tar, tar.gz, zip]")
+
+    def _arcname(self, file):
+        return (
+            os.path.join(self.args.dest_name, os.path.basename(file))
+            if self.args.create_dir
+            else os.path.basename(file)
+        )
+
+    def _create_tar_gz(self, dest_path, files):
+        """
+        Write tar stream directly into the gzip stream without an intermediate tar file.
+        """
+        util = CompressionUtil()
+        if self.args.threads > 1:
+            writer = util.open_parallel_writer(
+                dest_path,
+                "gz",
+                level=self.args.level,
+                threads=self.args.threads,
+                block_size=self.args.block_size,
+            )
         else:
-            raise InvalidParameter("'format' must set one of the followings [tar, zip]")
+            writer = util.open(dest_path, "wb", format="gz", level=self.args.level)
+        with writer as o, tarfile.open(fileobj=o, mode="w|") as tar:
+            for file in files:
+                tar.add(file, arcname=self._arcname(file))
+
+    def _create_zip(self, dest_path, files):
+        if self.args.threads <= 1:
+            with zipfile.ZipFile(
+                dest_path,
+                "w",
+                compression=self.ZIP_METHODS[self.args.compression],
+                compresslevel=self.args.level,
+                allowZip64=self.args.allow_zip64,
+            ) as zp:
+                for file in files:
+                    zp.write(file, arcname=self._arcname(file), compress_type=self._method_of(file))
+            return
+
+        # Each member is compressed into a zip file of its own in a thread.
+        # Their entries are copied into the archive in the order of the files,
+        # followed by the central directory of all the members.
+        members = []
+        with (
+            ThreadPoolExecutor(max_workers=self.args.threads) as executor,
+            open(dest_path, "wb") as o,
+        ):
+            pending = deque()
+            try:
+                for file in files:
+                    pending.append(executor.submit(self._zip_member, file))
+                    # Bound the number of compressed members waiting to be copied
+                    while len(pending) > self.args.threads * 2:
+                        members.append(self._copy_member(o, pending.popleft().result()))
+                while pending:
+                    members.append(self._copy_member(o, pending.popleft().result()))
+            finally:
+                for future in pending:
+                    if not future.cancel() and future.exception() is None:
+                        os.remove(future.result())
+            self._write_central_directory(o, members)
+
+    def _zip_member(self, file):
+        """
+        Write a file into a temporary zip file as the only member.
+
+        Returns:
+            str: temporary zip file path
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".zip")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(
+                tmp_path, "w", compresslevel=self.args.level, allowZip64=self.args.allow_zip64
+            ) as zp:
+                zp.write(file, arcname=self._arcname(file), compress_type=self._method_of(file))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _copy_member(self, o, tmp_path):
+        """
+        Copy the local header and the data of the member of a temporary zip file.
+
+        Returns:
+            tuple: ZipInfo of the member, offset of the member in the archive
+        """
+        try:
+            with zipfile.ZipFile(tmp_path) as zp:
+                zinfo = zp.infolist()[0]
+            offset = o.tell()
+            with open(tmp_path, "rb") as i:
+                header = i.read(self.LOCAL_HEADER.size)
+                _, name_length, extra_length = self.LOCAL_HEADER.unpack(header)
+                o.write(header)
+                left = name_length + extra_length + zinfo.compress_size
+                while left > 0:
+                    buf = i.read(min(left, 1048576))
+                    if not buf:
+                        raise CliboaException("Unexpected end of %s" % tmp_path)
+                    o.write(buf)
+                    left -= len(buf)
+            return zinfo, offset
+        finally:
+            os.remove(tmp_path)
+
+    def _write_central_directory(self, o, members):
+        start = o.tell()
+        for zinfo, offset in members:
+            o.write(self._central_record(zinfo, offset))
+        size = o.tell() - start
+        count = len(members)
+
+        if count >= 0xFFFF or start > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT:
+            if not self.args.allow_zip64:
+                raise zipfile.LargeZipFile("The archive would require ZIP64 extensions")
+            zip64_start = o.tell()
+            o.write(
+                struct.pack(
+                    "<4sQ2H2L4Q", b"PK\x06\x06", 44, 45, 45, 0, 0, count, count, size, start
+                )
+            )
+            o.write(struct.pack("<4sLQL", b"PK\x06\x07", 0, zip64_start, 1))
+            count = min(count, 0xFFFF)
+            size = min(size, 0xFFFFFFFF)
+            start = min(start, 0xFFFFFFFF)
+        o.write(struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, count, count, size, start, 0))
+
+    def _central_record(self, zinfo, offset):
+        """
+        Central directory record of a member at the offset, as ZipFile writes.
+        """
+        file_size = zinfo.file_size
+        compress_size = zinfo.compress_size
+        zip64 = []
+        if file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT:
+            zip64 += [file_size, compress_size]
+            file_size = compress_size = 0xFFFFFFFF
+        if offset > zipfile.ZIP64_LIMIT:
+            zip64.append(offset)
+            offset = 0xFFFFFFFF
+
+        # Replace the ZIP64 extra field of the temporary zip file
+        extra = b""
+        pos = 0
+        while pos + 4 <= len(zinfo.extra):
+            tag, length = struct.unpack("<HH", zinfo.extra[pos : pos + 4])
+            if tag != 1:
+                extra += zinfo.extra[pos : pos + 4 + length]
+            pos += 4 + length
+        version = 0
+        if zip64:
+            if not self.args.allow_zip64:
+                raise zipfile.LargeZipFile("The archive would require ZIP64 extensions")
+            extra = struct.pack("<HH%dQ" % len(zip64), 1, 8 * len(zip64), *zip64) + extra
+            version = 45
+
+        name = zinfo.filename.encode("utf-8" if zinfo.flag_bits & 0x800 else "ascii")
+        y, m, d, hh, mm, ss = zinfo.date_time
+        return (
+            struct.pack(
+                "<4s4B4HL2L5H2L",
+                b"PK\x01\x02",
+                max(version, zinfo.create_version),
+                zinfo.create_system,
+                max(version, zinfo.extract_version),
+                zinfo.reserved,
+                zinfo.flag_bits,
+                zinfo.compress_type,
+                hh << 11 | mm << 5 | ss // 2,
+                (y - 1980) << 9 | m << 5 | d,
+                zinfo.CRC,
+                compress_size,
+                file_size,
+                len(name),
+                len(extra),
+                len(zinfo.comment),
+                0,
+                zinfo.internal_attr,
+                zinfo.external_attr,
+                offset,
+            )
+            + name
+            + extra
+            + zinfo.comment
+        )
+
+    def _method_of(self, file):
+        if file.lower().endswith(self.STORED_EXTENSIONS):
+            return zipfile.ZIP_STORED
+        return self.ZIP_METHODS[self.args.compression]
@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from cliboa.scenario.base import BaseStep
 from cliboa.scenario.validator import EssentialParameters
@@ -17,6 +18,7 @@ class GpgBase(BaseStep):
         self._key_dir = None
         self._key_pattern = None
         self._trust_level = None
+        self._concurrent_files = 1
 
     def gnupghome(self, gnupghome):
         self._gnupghome = gnupghome
@@ -45,6 +47,9 @@ class GpgBase(BaseStep):
     def trust_level(self, trust_level):
         self._trust_level = trust_level
 
+    def concurrent_files(self, concurrent_files):
+        self._concurrent_files = concurrent_files
+
     def execute(self, *args):
         valid = EssentialParameters(self.__class__.__name__, [self._gnupghome])
         valid()
@@ -59,6 +64,27 @@ class GpgBase(BaseStep):
             if trust_level:
                 gpg.trust_key(file, trust_level)
 
+    def run_concurrently(self, func, params):
+        """
+        Call func with each of params.
+        Each call runs a gpg subprocess, so calls are run in threads
+        up to "concurrent_files" at once.
+        """
+        if self._concurrent_files <= 1:
+            for param in params:
+                func(*param)
+            return
+
+        with ThreadPoolExecutor(max_workers=self._concurrent_files) as executor:
+            futures = [executor.submit(func, *param) for param in params]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
 
 class GpgGenerateKey(GpgBase):
     """
@@ -123,19 +149,26 @@ class GpgEncrypt(GpgBase):
             self._logger.info("Keys found %s" % key_files)
             self.key_import(gpg, key_files, self._trust_level)
 
+        if self._dest_dir is not None:
+            os.makedirs(self._dest_dir, exist_ok=True)
+        params = []
         for file in files:
             if self._dest_dir is not None:
-                os.makedirs(self._dest_dir, exist_ok=True)
                 dest_path = os.path.join(self._dest_dir, os.path.basename(file))
             else:
                 dest_path = os.path.join(self._src_dir, os.path.basename(file))
-            gpg.encrypt(
+            params.append((file, dest_path))
+
+        self.run_concurrently(
+            lambda file, dest_path: gpg.encrypt(
                 file,
                 dest_path,
                 recipients=self._recipients,
                 passphrase=self._passphrase,
                 always_trust=self._always_trust,
-            )
+            ),
+            params,
+        )
 
 
 class GpgDecrypt(GpgBase):
@@ -154,25 +187,33 @@ class GpgDecrypt(GpgBase):
             self._logger.info("No files are found. Nothing to do.")
             return
 
+        gpg = Gpg(self._gnupghome)
+
         if self._key_dir and self._key_pattern:
             key_files = super().get_target_files(self._key_dir, self._key_pattern)
             self._logger.info("Keys found %s" % key_files)
-            self.key_import(key_files, self._trust_level)
+            self.key_import(gpg, key_files, self._trust_level)
 
-        gpg = Gpg(self._gnupghome)
+        if self._dest_dir is not None:
+            os.makedirs(self._dest_dir, exist_ok=True)
+        params = []
         for file in files:
             root, ext = os.path.splitext(file)
             if ext == ".gpg":
                 if self._dest_dir is not None:
-                    os.makedirs(self._dest_dir, exist_ok=True)
                     dest_path = os.path.join(self._dest_dir, os.path.basename(root))
                 else:
                     dest_path = os.path.join(self._src_dir, os.path.basename(root))
-                gpg.decrypt(
-                    file,
-                    dest_path,
-                    passphrase=self._passphrase,
-                    always_trust=self._always_trust,
-                )
+                params.append((file, dest_path))
             else:
                 self._logger.warning("Extention was not gpg. %s" % file)
+
+        self.run_concurrently(
+            lambda file, dest_path: gpg.decrypt(
+                file,
+                dest_path,
+                passphrase=self._passphrase,
+                always_trust=self._always_trust,
+            ),
+            params,
+        )
@@ -12,10 +12,12 @@
 # all copies or substantial portions of the Software.
 #
 import csv
+import json
 from abc import abstractmethod
+from itertools import chain, islice
+from typing import Literal
 
 import jsonlines
-import pandas
 
 from cliboa.adapter.csv import Csv
 from cliboa.scenario.transform.file import FileBaseTransform
@@ -25,12 +27,17 @@ from cliboa.util.base import _warn_deprecated_args
 class JsonlToCsvBase(FileBaseTransform):
     """
     Base class of jsonlines transform to csv.
+
+    columns "first" uses the keys of the first converted row as the csv header.
+    columns "union" reads the file twice. The first pass collects the keys of all
+    the converted rows in order of appearance, and missing keys are written as empty.
     """
 
     class Arguments(FileBaseTransform.Arguments):
         quote: str = "QUOTE_MINIMAL"
         after_nl: str = "LF"
         escape_char: str | None = None
+        columns: Literal["first", "union"] = "first"
 
     @property
     @_warn_deprecated_args("3.0", "4.0")
@@ -57,25 +64,53 @@ class JsonlToCsvBase(FileBaseTransform):
         self.io_files(files, ext="csv", func=self.convert)
 
     def convert(self, fi, fo):
-        writer = None
+        fieldnames = self._union_keys(fi) if self.args.columns == "union" else None
+        with (
+            self.open_file(fi, mode="r", encoding="utf-8-sig") as i,
+            jsonlines.Reader(i) as reader,
+            self.open_file(fo, mode="w", encoding=self.args.encoding, newline="") as f,
+        ):
+            rows = self._converted_rows(reader)
+            if fieldnames is None:
+                first = next(rows, None)
+                if first is None:
+                    return
+                fieldnames = first.keys()
+                rows = chain([first], rows)
+            elif not fieldnames:
+                return
+            # Rows stay as dicts for convert_row. Dataframe readers are slower here and
+            # change values (e.g. int with null to float), so rows are streamed as is.
+            writer = csv.DictWriter(
+                f,
+                fieldnames,
+                restval="",
+                quoting=Csv.quote_convert(self.args.quote),
+                lineterminator=Csv.newline_convert(self.args.after_nl),
+                escapechar=self.args.escape_char,
+            )
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def _converted_rows(self, reader):
+        for row in reader:
+            new_rows = self.convert_row(row)
+            if new_rows:
+                yield from new_rows
+
+    def _union_keys(self, fi):
+        """
+        Returns the keys of all the converted rows in order of appearance.
+        Only the keys are kept in memory.
+        """
+        keys = {}
         with (
-            jsonlines.open(fi) as reader,
-            open(fo, mode="w", encoding=self.args.encoding, newline="") as f,
+            self.open_file(fi, mode="r", encoding="utf-8-sig") as i,
+            jsonlines.Reader(i) as reader,
         ):
-            for row in reader:
-                new_rows = self.convert_row(row)
-                if not new_rows:
-                    continue
-                if not writer:
-                    writer = csv.DictWriter(
-                        f,
-                        new_rows[0].keys(),
-                        quoting=Csv.quote_convert(self.args.quote),
-                        lineterminator=Csv.newline_convert(self.args.after_nl),
-                        escapechar=self.args.escape_char,
-                    )
-                    writer.writeheader()
-                writer.writerows(new_rows)
+            for row in self._converted_rows(reader):
+                keys.update(dict.fromkeys(row))
+        return list(keys)
 
 
 class JsonlToCsv(JsonlToCsvBase):
@@ -90,10 +125,19 @@ class JsonlToCsv(JsonlToCsvBase):
 class JsonlAddKeyValue(FileBaseTransform):
     """
     Insert key value to jsonlines.
+
+    Files are processed line by line, so memory usage does not depend on the file size.
+    Each record is parsed and serialized again. If fast is True, the pairs are appended
+    before the closing brace of each line without parsing. In that case, keys which
+    already exist in the record are not overwritten but duplicated.
     """
 
+    # Number of lines to convert and write at once
+    BATCH_SIZE = 10000
+
     class Arguments(FileBaseTransform.Arguments):
         pairs: dict
+        fast: bool = False
 
     def execute(self, *args):
         files = self.get_src_files()
@@ -101,8 +145,39 @@ class JsonlAddKeyValue(FileBaseTransform):
         self.io_files(files, func=self.convert)
 
     def convert(self, fi, fo):
-        with open(fi) as fi, open(fo, mode="w") as fo:
-            df = pandas.read_json(fi, orient="records", lines=True)
-            for key, value in self.args.pairs.items():
-                df[key] = value
-            df.to_json(fo, orient="records", lines=True)
+        convert_line = self._fast_converter() if self.args.fast else self._converter()
+        with (
+            self.open_file(fi, mode="r", encoding="utf-8-sig") as i,
+            self.open_file(fo, mode="w", encoding="utf-8") as o,
+        ):
+            while True:
+                lines = list(islice(i, self.BATCH_SIZE))
+                if not lines:
+                    break
+                o.write("".join(convert_line(line) for line in lines if line.strip()))
+
+    def _converter(self):
+        def convert_line(line):
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("Line is not a json object: %s" % line.rstrip())
+            record.update(self.args.pairs)
+            return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        return convert_line
+
+    def _fast_converter(self):
+        pairs = json.dumps(self.args.pairs, ensure_ascii=False, separators=(",", ":"))[1:-1]
+
+        def convert_line(line):
+            line = line.rstrip()
+            if not line.endswith("}"):
+                raise ValueError("Line is not a json object: %s" % line)
+            body = line[:-1].rstrip()
+            if not pairs:
+                return line + "\n"
+            if body.endswith("{"):
+                return body + pairs + "}\n"
+            return body + "," + pairs + "}\n"
+
+        return convert_line
@@ -0,0 +1,270 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import bz2
+import gzip
+import lzma
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cliboa.util.base import _BaseObject
+from cliboa.util.exception import CliboaException, InvalidParameter
+
+
+class CompressionUtil(_BaseObject):
+    """
+    Stream compression helpers for gz, bz2, xz and zst formats.
+
+    zst requires compression.zstd (python 3.14+) or the zstandard package.
+    """
+
+    FORMATS = {
+        "gz": "gz",
+        "gzip": "gz",
+        "bz2": "bz2",
+        "bzip2": "bz2",
+        "xz": "xz",
+        "zst": "zst",
+        "zstd": "zst",
+    }
+
+    EXTENSIONS = {
+        ".gz": "gz",
+        ".bz2": "bz2",
+        ".xz": "xz",
+        ".zst": "zst",
+    }
+
+    @classmethod
+    def normalize_format(cls, format: str) -> str:
+        """
+        Returns canonical format name, which is also an extension without "."
+        """
+        fmt = cls.FORMATS.get(format.lower())
+        if fmt is None:
+            raise InvalidParameter(
+                "Unknown compression format %s. One of the followings are allowed %s"
+                % (format, list(cls.FORMATS.keys()))
+            )
+        return fmt
+
+    @classmethod
+    def format_of(cls, path: str) -> str | None:
+        """
+        Returns compression format detected by the file extension, None if not compressed.
+        """
+        _, ext = os.path.splitext(path)
+        return cls.EXTENSIONS.get(ext.lower())
+
+    def open(self, path, mode="rb", format=None, level=None, **kwargs):
+        """
+        Open a compressed file as a stream.
+
+        Args:
+            path (str): File path
+            mode="rb" (str): Same as the builtin open. Text mode is also available.
+            format=None (str): Compression format. Detected by the extension if not given.
+            level=None (int): Compression level when writing
+            kwargs: encoding, errors and newline for text mode
+
+        Returns:
+            file object
+        """
+        fmt = self.normalize_format(format) if format else self.format_of(path)
+        writing = any(m in mode for m in "wax")
+        if fmt == "gz":
+            if writing and level is not None:
+                kwargs["compresslevel"] = level
+            return gzip.open(path, mode, **kwargs)
+        elif fmt == "bz2":
+            if writing and level is not None:
+                kwargs["compresslevel"] = level
+            return bz2.open(path, mode, **kwargs)
+        elif fmt == "xz":
+            if writing and level is not None:
+                kwargs["preset"] = level
+            return lzma.open(path, mode, **kwargs)
+        elif fmt == "zst":
+            zstd = _zstd_module()
+            if zstd.__name__ == "zstandard":
+                if writing and level is not None:
+                    kwargs["cctx"] = zstd.ZstdCompressor(level=level)
+                return zstd.open(path, mode, **kwargs)
+            if writing and level is not None:
+                kwargs["level"] = level
+            return zstd.open(path, mode, **kwargs)
+        raise CliboaException("Unmatched any available compression type %s" % path)
+
+    def compress(self, data: bytes, format: str, level=None) -> bytes:
+        """
+        Compress bytes into one independent stream (gzip member, bz2 stream, xz stream
+        or zstd frame). Concatenated outputs are decompressed as one file.
+        """
+        fmt = self.normalize_format(format)
+        if fmt == "gz":
+            return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+        elif fmt == "bz2":
+            return bz2.compress(data, compresslevel=9 if level is None else level)
+        elif fmt == "xz":
+            return lzma.compress(data, preset=level)
+        zstd = _zstd_module()
+        if zstd.__name__ == "zstandard":
+            return zstd.ZstdCompressor(level=3 if level is None else level).compress(data)
+        return zstd.compress(data, level=level)
+
+    def compress_file(
+        self, src, dest, format, level=None, chunk_size=1048576, threads=1, block_size=4194304
+    ):
+        """
+        Compress a file.
+        If threads is more than 1, the file is divided into block_size bytes,
+        and blocks are compressed in parallel. See open_parallel_writer.
+
+        Args:
+            src (str): Source file path
+            dest (str): Destination file path
+            format (str): Compression format
+            level=None (int): Compression level. Default of each format if None.
+            chunk_size=1048576 (int): Bytes to read at once when threads is 1
+            threads=1 (int): Number of threads to compress blocks
+            block_size=4194304 (int): Bytes of a block to be compressed in a thread
+        """
+        if threads <= 1:
+            writer = self.open(dest, "wb", format=format, level=level)
+        else:
+            writer = self.open_parallel_writer(
+                dest, format, level=level, threads=threads, block_size=block_size
+            )
+        with open(src, "rb") as i, writer as o:
+            while True:
+                buf = i.read(chunk_size if threads <= 1 else block_size)
+                if buf == b"":
+                    break
+                o.write(buf)
+
+    def open_parallel_writer(self, path, format, level=None, threads=2, block_size=4194304):
+        """
+        Open a binary writer which compresses written data block by block in parallel threads.
+        Each block is compressed as an independent stream and written in order like pigz.
+        Compression libraries release the GIL, so threads run on multiple cores.
+
+        Args:
+            path (str): Destination file path
+            format (str): Compression format
+            level=None (int): Compression level. Default of each format if None.
+            threads=2 (int): Number of threads to compress blocks
+            block_size=4194304 (int): Bytes of a block to be compressed in a thread
+
+        Returns:
+            writer which has write and close methods, and supports context manager
+        """
+        return _ParallelCompressWriter(
+            self, open(path, "wb"), self.normalize_format(format), level, threads, block_size
+        )
+
+    def decompress_file(self, src, dest, format=None, chunk_size=1048576):
+        """
+        Decompress a file.
+
+        Args:
+            src (str): Source file path
+            dest (str): Destination file path
+            format=None (str): Compression format. Detected by the extension if not given.
+            chunk_size=1048576 (int): Bytes to read at once
+        """
+        with self.open(src, "rb", format=format) as i, open(dest, "wb") as o:
+            while True:
+                buf = i.read(chunk_size)
+                if buf == b"":
+                    break
+                o.write(buf)
+
+
+class _ParallelCompressWriter(object):
+    def __init__(self, util, fp, format, level, threads, block_size):
+        self._util = util
+        self._fp = fp
+        self._format = format
+        self._level = level
+        self._threads = max(threads, 1)
+        self._block_size = block_size
+        self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        self._futures = deque()
+        self._buffer = bytearray()
+        self._blocks = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        e_type, _, _ = exc
+        if e_type:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._fp.close()
+            self._closed = True
+        else:
+            self.close()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        while len(self._buffer) >= self._block_size:
+            block = bytes(self._buffer[: self._block_size])
+            del self._buffer[: self._block_size]
+            self._submit(block)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            if self._buffer or self._blocks == 0:
+                # Empty input still needs a valid compressed stream
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._futures:
+                self._fp.write(self._futures.popleft().result())
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._fp.close()
+            self._closed = True
+
+    def _submit(self, block: bytes):
+        self._blocks += 1
+        self._futures.append(
+            self._executor.submit(self._util.compress, block, self._format, self._level)
+        )
+        # Keep the number of blocks in memory bounded, and write them in order.
+        while len(self._futures) >= self._threads * 2:
+            self._fp.write(self._futures.popleft().result())
+
+
+def _zstd_module():
+    try:
+        from compression import zstd
+
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        raise CliboaException(
+            "zst format requires python 3.14 or later, or the zstandard package installed."
+        )
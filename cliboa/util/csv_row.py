@@ -0,0 +1,121 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+from itertools import islice
+from operator import itemgetter
+
+from cliboa.util.base import _BaseObject
+
+
+class CsvRowEngine(_BaseObject):
+    """
+    Process csv rows as lists instead of dicts.
+
+    Column names are resolved to indexes once, values are taken with itemgetter,
+    and rows are written by writerows in batches.
+    Rows are handled in the same way as csv.DictReader and csv.DictWriter do.
+    """
+
+    BATCH_SIZE = 10000
+
+    @staticmethod
+    def column_indexes(header, names, ignore_missing=False) -> list[int]:
+        """
+        Resolve column names to indexes.
+        The last one is used for a duplicated name, same as csv.DictReader.
+
+        Args:
+            header (list): Column names of a csv file
+            names (list): Column names to resolve
+            ignore_missing=False (bool): Skip names which are not in header if True,
+                                         raise KeyError if False.
+        """
+        positions = {name: i for i, name in enumerate(header)}
+        indexes = []
+        for name in names:
+            if name in positions:
+                indexes.append(positions[name])
+            elif not ignore_missing:
+                raise KeyError(name)
+        return indexes
+
+    @staticmethod
+    def getter(indexes):
+        """
+        Returns a function which takes values of indexes from a row as a tuple.
+        """
+        if len(indexes) == 0:
+            return lambda row: ()
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda row: (row[index],)
+        return itemgetter(*indexes)
+
+    @staticmethod
+    def records(reader, width, allow_longer=False):
+        """
+        Yields rows which have at least the same length as the header.
+        Blank rows are skipped and short rows are filled with "",
+        same as csv.DictReader and csv.DictWriter do.
+
+        Args:
+            reader: csv reader
+            width (int): Length of the header
+            allow_longer=False (bool): Yield rows which have more fields than the header
+                                       as they are if True. Raise ValueError if False,
+                                       same as csv.DictWriter does.
+        """
+        for row in reader:
+            if len(row) == width:
+                yield row
+            elif not row:
+                continue
+            elif len(row) < width:
+                yield row + [""] * (width - len(row))
+            elif allow_longer:
+                yield row
+            else:
+                raise ValueError("Row has more fields than the header: %s" % row)
+
+    @staticmethod
+    def dicts(reader, header):
+        """
+        Yields rows as dicts, same as csv.DictReader does.
+        """
+        width = len(header)
+        for row in reader:
+            if len(row) == width:
+                yield dict(zip(header, row))
+            elif not row:
+                continue
+            else:
+                d = dict(zip(header, row))
+                if len(row) > width:
+                    d[None] = row[width:]
+                else:
+                    for key in header[len(row) :]:
+                        d[key] = None
+                yield d
+
+    @classmethod
+    def write_rows(cls, writer, rows, batch_size=None):
+        """
+        Write rows by writerows in batches.
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            writer.writerows(batch)
@@ -66,6 +66,11 @@ class DatabaseException(CliboaException):
     pass
 
 
+class LocalInfileDisabled(DatabaseException):
+    # Exception when LOAD DATA LOCAL is not allowed by the server or the client
+    pass
+
+
 class CliboaRuntimeError(CliboaException):
     # Exception when the cliboa runtime environment is misconfigured
     # (e.g. invalid values in cliboa_environment.py)
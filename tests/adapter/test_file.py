@@ -73,3 +73,58 @@ class TestFile(object):
 
         # shutil.rmtree(self._data_dir)
         assert target_files == []
+
+    def test_get_target_files_max_depth(self):
+        deep_dir = os.path.join(self._data_subdir, "deep")
+        os.makedirs(deep_dir)
+        for dir in [self._data_dir, self._data_subdir, deep_dir]:
+            open(os.path.join(dir, "test.csv"), "w").close()
+            open(os.path.join(dir, "other.csv"), "w").close()
+        os.symlink(self._data_subdir, os.path.join(self._data_dir, "link"))
+
+        expected = [
+            os.path.join(self._data_subdir, "deep", "test.csv"),
+            os.path.join(self._data_subdir, "test.csv"),
+            os.path.join(self._data_dir, "test.csv"),
+        ]
+        assert expected == File().get_target_files(self._data_dir, r"test\.csv")
+        assert expected[1:] == File().get_target_files(self._data_dir, r"test\.csv", max_depth=1)
+        assert expected[2:] == File().get_target_files(self._data_dir, r"test\.csv", max_depth=0)
+        assert [] == File().get_target_files(os.path.join(self._data_dir, "none"), ".*")
+
+    def test_get_target_files_cache(self):
+        open(os.path.join(self._data_dir, "test1.csv"), "w").close()
+        file = File()
+        try:
+            assert 1 == len(file.get_target_files(self._data_dir, r"test.*\.csv", cache=True))
+
+            # A new file changes the modification time of the directory
+            open(os.path.join(self._data_dir, "test2.csv"), "w").close()
+            assert 2 == len(file.get_target_files(self._data_dir, r"test.*\.csv", cache=True))
+
+            # The cached listing is used while the modification time is the same
+            stat = os.stat(self._data_dir)
+            open(os.path.join(self._data_dir, "test3.csv"), "w").close()
+            os.utime(self._data_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            assert 2 == len(file.get_target_files(self._data_dir, r"test.*\.csv", cache=True))
+            assert 3 == len(file.get_target_files(self._data_dir, r"test.*\.csv"))
+
+            file.clear_listing_cache(self._data_dir)
+            assert 3 == len(file.get_target_files(self._data_dir, r"test.*\.csv", cache=True))
+        finally:
+            file.clear_listing_cache()
+
+    @pytest.mark.parametrize(
+        "pattern, prefix",
+        [
+            ("test(.*).csv", "test"),
+            (r"^abc_\d+\.csv", "abc_"),
+            (r"data\.csv\.gz", "data.csv.gz"),
+            ("ab+c", "ab"),
+            ("abc?d", "ab"),
+            ("(?i)test", ""),
+            ("test|data", ""),
+        ],
+    )
+    def test_literal_prefix(self, pattern, prefix):
+        assert prefix == File._literal_prefix(pattern)
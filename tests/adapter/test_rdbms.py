@@ -1,7 +1,12 @@
+import io
 from contextlib import ExitStack
 from unittest.mock import MagicMock, Mock, patch
 
+import pytest
+
 from cliboa.adapter.mysql import MysqlAdaptor
+from cliboa.adapter.postgres import PostgresqlAdaptor
+from cliboa.util.exception import DatabaseException
 from tests import BaseCliboaTest
 
 
@@ -30,6 +35,88 @@ class TestRdbms(BaseCliboaTest):
             except Exception:
                 pass
 
+    def test_postgres_copy_from(self):
+        with patch("cliboa.adapter.postgres.psycopg2") as psycopg2:
+            self._create_dbmock(psycopg2)
+            cursor = psycopg2.connect.return_value.cursor.return_value.__enter__.return_value
+            cursor.rowcount = 1
+            f = io.StringIO("id,name\n1,spam\n")
+            with PostgresqlAdaptor(
+                host="dummy", user="test", password="dummypassword", dbname="test"
+            ) as adaptor:
+                assert 1 == adaptor.copy_from("tbl", ["id", "name"], f, delimiter="\t")
+            cursor.copy_expert.assert_called_once_with(
+                "COPY tbl (id,name) FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER '\t')",
+                f,
+                size=1048576,
+            )
+
+    def test_mysql_load_data(self):
+        with patch("cliboa.adapter.mysql.pymysql") as pymysql:
+            self._create_dbmock(pymysql)
+            con = pymysql.connect.return_value
+            con.escape.side_effect = lambda v: "'%s'" % v
+            cursor = con.cursor.return_value.__enter__.return_value
+            cursor.execute.return_value = 2
+            cursor.warning_count = 0
+            with MysqlAdaptor(
+                host="dummy",
+                user="test",
+                password="dummypassword",
+                dbname="test",
+                local_infile=True,
+            ) as adaptor:
+                assert 2 == adaptor.load_data("/tmp/test.csv", "tbl", ["id", "name"], "cp932")
+            assert pymysql.connect.call_args.kwargs["local_infile"] is True
+            cursor.execute.assert_called_once_with(
+                "LOAD DATA LOCAL INFILE %s INTO TABLE tbl CHARACTER SET cp932"
+                " FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY ''"
+                " LINES TERMINATED BY '\n' IGNORE 1 LINES (id,name)",
+                ("/tmp/test.csv",),
+            )
+
+    def test_mysql_load_data_warnings(self):
+        with patch("cliboa.adapter.mysql.pymysql") as pymysql:
+            self._create_dbmock(pymysql)
+            con = pymysql.connect.return_value
+            con.escape.side_effect = lambda v: "'%s'" % v
+            cursor = con.cursor.return_value.__enter__.return_value
+            pymysql.MySQLError = Exception
+            cursor.warning_count = 1
+            cursor.fetchall.return_value = [("Warning", 1062, "Duplicate entry '1' for key")]
+            with pytest.raises(DatabaseException) as e:
+                with MysqlAdaptor(
+                    host="dummy",
+                    user="test",
+                    password="dummypassword",
+                    dbname="test",
+                    local_infile=True,
+                ) as adaptor:
+                    adaptor.load_data("/tmp/test.csv", "tbl", ["id", "name"])
+            assert "Duplicate entry '1' for key" in str(e.value)
+            cursor.execute.assert_called_with("SHOW WARNINGS LIMIT 10")
+            con.rollback.assert_called_once()
+
+    def test_select_stream(self):
+        with patch("cliboa.adapter.postgres.psycopg2") as psycopg2:
+            self._create_dbmock(psycopg2)
+            with PostgresqlAdaptor(
+                host="dummy", user="test", password="dummypassword", dbname="test"
+            ) as adaptor:
+                cursor = adaptor.select_stream("SELECT 1", itersize=100)
+            assert psycopg2.connect.return_value.cursor.call_args.kwargs["name"]
+            assert 100 == cursor.itersize
+            cursor.execute.assert_called_once_with("SELECT 1", None)
+
+        with patch("cliboa.adapter.mysql.pymysql") as pymysql:
+            self._create_dbmock(pymysql)
+            with MysqlAdaptor(
+                host="dummy", user="test", password="dummypassword", dbname="test"
+            ) as adaptor:
+                cursor = adaptor.select_stream("SELECT 1")
+            pymysql.connect.return_value.cursor.assert_called_once_with(pymysql.cursors.SSCursor)
+            cursor.execute.assert_called_once_with("SELECT 1", None)
+
     def _create_dbmock(self, mock_obj):
         mock_con = Mock()
         mock_obj.connect.return_value = mock_con
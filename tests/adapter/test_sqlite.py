@@ -0,0 +1,116 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+import threading
+
+import pytest
+
+from cliboa.adapter.sqlite import SqliteAdapter
+
+
+class TestSqliteAdapter(object):
+    def teardown_method(self, method):
+        SqliteAdapter.close_pool()
+
+    def _create_db(self, dbname, profile="fast"):
+        adapter = SqliteAdapter()
+        adapter.connect(dbname, profile=profile)
+        try:
+            adapter.execute("CREATE TABLE foo (id INTEGER)")
+            adapter.execute_many_insert("foo", ["id"], [{"id": i} for i in range(10)])
+            adapter.commit()
+        finally:
+            adapter.close()
+
+    def test_connect_wal_profile(self, tmp_path):
+        dbname = str(tmp_path / "test.db")
+        self._create_db(dbname, profile="wal")
+
+        adapter = SqliteAdapter()
+        adapter.connect(dbname, profile="wal", pragmas={"cache_size": -1024})
+        try:
+            assert "wal" == adapter.fetch("PRAGMA journal_mode").fetchone()[0]
+            assert -1024 == adapter.fetch("PRAGMA cache_size").fetchone()[0]
+            assert 30000 == adapter.fetch("PRAGMA busy_timeout").fetchone()[0]
+            assert 2 == adapter.fetch("PRAGMA temp_store").fetchone()[0]
+        finally:
+            adapter.close()
+
+    def test_connect_invalid_pragma(self, tmp_path):
+        adapter = SqliteAdapter()
+        with pytest.raises(ValueError):
+            adapter.connect(str(tmp_path / "test.db"), profile="unknown")
+        with pytest.raises(ValueError):
+            adapter.connect(str(tmp_path / "test.db"), pragmas={"cache_size": "1; DROP"})
+
+    def test_pooled_readers_while_writing(self, tmp_path):
+        dbname = str(tmp_path / "test.db")
+        self._create_db(dbname, profile="wal")
+
+        writer = SqliteAdapter()
+        writer.connect(dbname, profile="wal", pooled=True)
+        con = writer._con
+        writer.execute("INSERT INTO foo VALUES (100)")
+
+        results = []
+
+        def read():
+            adapter = SqliteAdapter()
+            adapter.connect(dbname, read_only=True, profile="wal", pooled=True)
+            try:
+                results.append(adapter.fetch("SELECT COUNT(*) FROM foo").fetchone()[0])
+            finally:
+                adapter.close()
+
+        try:
+            threads = [threading.Thread(target=read) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            # Readers see the last committed state while the writer has a transaction
+            assert [10] * 4 == results
+            writer.commit()
+        finally:
+            writer.close()
+
+        # Idle connections are reused
+        adapter = SqliteAdapter()
+        adapter.connect(dbname, profile="wal", pooled=True)
+        try:
+            assert con is adapter._con
+            assert 11 == adapter.fetch("SELECT COUNT(*) FROM foo").fetchone()[0]
+        finally:
+            adapter.close()
+
+    def test_close_pool_of_database(self, tmp_path):
+        dbnames = [str(tmp_path / "test1.db"), str(tmp_path / "test2.db")]
+        cons = []
+        for dbname in dbnames:
+            self._create_db(dbname, profile="wal")
+            adapter = SqliteAdapter()
+            adapter.connect(dbname, profile="wal", pooled=True)
+            cons.append(adapter._con)
+            adapter.close()
+
+        SqliteAdapter.close_pool(dbnames[0])
+        assert not os.path.exists(dbnames[0] + "-wal")
+        assert os.path.exists(dbnames[1] + "-wal")
+
+        adapter = SqliteAdapter()
+        adapter.connect(dbnames[1], profile="wal", pooled=True)
+        try:
+            assert cons[1] is adapter._con
+        finally:
+            adapter.close()
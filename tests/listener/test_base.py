@@ -11,8 +11,9 @@
 # The above copyright notice and this permission notice shall be included in
 # all copies or substantial portions of the Software.
 #
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
+from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.core.executor import _ScenarioExecutor
 from cliboa.listener.scenario import ScenarioStatusListener
 from cliboa.listener.step import StepStatusListener
@@ -38,8 +39,11 @@ class TestScenarioStatusListener:
         Test completion log using mock.
         Ensures completion log is the last log message.
         """
-        self._listener.completion()
+        with patch.object(SqliteAdapter, "close_pool") as close_pool:
+            self._listener.completion()
 
+        # Pooled sqlite connections are closed when the scenario ends
+        close_pool.assert_called_once_with()
         assert self._mock_logger.info.call_count > 0
         args, kwargs = self._mock_logger.info.call_args
         log_message = args[0]
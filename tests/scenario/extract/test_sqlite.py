@@ -13,11 +13,13 @@
 #
 import csv
 import os
+from unittest.mock import patch
 
 import pytest
 
 from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.scenario.extract.sqlite import SqliteExport
+from cliboa.util.exception import CliboaException, InvalidParameter
 
 
 class TestSqliteExport(object):
@@ -123,6 +125,91 @@ class TestSqliteExport(object):
             self._clean(self._DB_NAME)
             self._clean(self._RESULT_FILE)
 
+    def test_ok_query_split_rows(self):
+        test_data = [{"No": i, "TEXT": "T%d" % (i % 3)} for i in range(7)]
+        files = ["result.%02d.csv" % i for i in range(3)]
+        try:
+            self._insert_test_data(test_data)
+
+            instance = SqliteExport()
+            instance._set_arguments(
+                {
+                    "dbname": self._DB_NAME,
+                    "dest_path": self._RESULT_FILE,
+                    "query": "SELECT No, TEXT FROM foo WHERE TEXT != 'T1'",
+                    "order": ["CAST(No AS INTEGER)"],
+                    "split_rows": 2,
+                }
+            )
+            with patch.object(SqliteAdapter, "_BULK_COUNT", 3):
+                instance.execute()
+
+            rows = []
+            for i, file in enumerate(files):
+                with open(file, "r", newline="") as o:
+                    reader = csv.reader(o)
+                    assert ["No", "TEXT"] == next(reader)
+                    rows.append([row[0] for row in reader])
+            assert [["0", "2"], ["3", "5"], ["6"]] == rows
+            assert not os.path.exists(self._RESULT_FILE)
+        finally:
+            self._clean(self._DB_NAME)
+            for file in files:
+                self._clean(file)
+
+    def test_ok_split_column(self):
+        test_data = [{"No": i, "TEXT": ["A", "B", ""][i % 3]} for i in range(9)]
+        files = {"A": "result.A.csv", "B": "result.B.csv", "": "result._empty.csv"}
+        try:
+            self._insert_test_data(test_data)
+
+            for arguments in [
+                {"threads": 1},
+                {"threads": 2},
+                {"threads": 2, "profile": "wal", "pool": True},
+            ]:
+                instance = self._create_instance(
+                    {"order": ["No"], "split_column": "TEXT", **arguments}
+                )
+                instance.execute()
+
+                for value, file in files.items():
+                    with open(file, "r", newline="") as o:
+                        rows = list(csv.DictReader(o))
+                    assert [value] * 3 == [row["TEXT"] for row in rows]
+                    assert [str(i) for i in range(9) if test_data[i]["TEXT"] == value] == [
+                        row["No"] for row in rows
+                    ]
+                assert not os.path.exists("result..csv")
+        finally:
+            # Closing the pooled connections removes the WAL files
+            SqliteAdapter.close_pool()
+            self._clean(self._DB_NAME)
+            for file in files.values():
+                self._clean(file)
+
+    def test_ng_split_column_same_file(self):
+        test_data = [{"No": i, "TEXT": ["a", "A"][i % 2]} for i in range(4)]
+        try:
+            self._insert_test_data(test_data)
+            instance = self._create_instance({"split_column": "TEXT"})
+            with pytest.raises(CliboaException):
+                instance.execute()
+            assert not os.path.exists("result.a.csv")
+            assert not os.path.exists("result.A.csv")
+        finally:
+            self._clean(self._DB_NAME)
+
+    def test_ng_arguments(self):
+        for arguments in [
+            {"tblname": None},
+            {"query": "SELECT * FROM foo"},
+            {"split_rows": 1, "split_column": "No"},
+            {"split_rows": 0},
+        ]:
+            with pytest.raises(InvalidParameter):
+                self._create_instance(arguments)
+
     def _create_instance(self, add_arguments: dict = {}):
         instance = SqliteExport()
         instance._set_arguments(
@@ -13,6 +13,11 @@
 #
 import csv
 import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
 
 from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.scenario.load.sqlite import SqliteImport
@@ -284,12 +289,267 @@ class TestSqliteImport:
             self._clean(TEST_FILE_1)
             self._clean(TEST_FILE_2)
 
+    def test_ok_bulk(self):
+        """
+        Rows are inserted in the same way as bulk is False.
+        Indexes of the existing table are dropped during the import and created again.
+        """
+        TEST_FILE_1 = "sqlite_write_test_1.csv"
+        TEST_FILE_2 = "sqlite_write_test_2.csv"
+        try:
+            with open(TEST_FILE_1, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerows([["No", "TEXT"], ["1", "A"], ["2"], [], ["3", "C", "extra"]])
+            with open(TEST_FILE_2, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerows([["No", "TEXT"], ["4", "D\nE"]])
+
+            results = {}
+            for bulk in [False, True]:
+                self._clean(self.DB_NAME)
+                instance = self._create_instance(TEST_FILE_1, True)
+                instance.execute()
+                adapter = SqliteAdapter()
+                adapter.connect(self.DB_NAME)
+                adapter.add_index(self.TBL_NAME, ["No"])
+                adapter.close()
+
+                instance = SqliteImport()
+                instance._set_arguments(
+                    {
+                        "dbname": self.DB_NAME,
+                        "src_dir": ".",
+                        "src_pattern": TEST_FILE_2,
+                        "tblname": self.TBL_NAME,
+                        "refresh": False,
+                        "bulk": bulk,
+                    }
+                )
+                instance.execute()
+
+                adapter = SqliteAdapter()
+                adapter.connect(self.DB_NAME)
+                cur = adapter.fetch("SELECT * FROM %s" % self.TBL_NAME)
+                results[bulk] = cur.fetchall()
+                cur = adapter.fetch("PRAGMA INDEX_LIST(%s)" % self.TBL_NAME)
+                assert ["foo_No"] == [row[1] for row in cur]
+                adapter.close()
+
+            assert [("1", "A"), ("2", None), ("3", "C"), ("4", "D\nE")] == results[False]
+            assert results[False] == results[True]
+        finally:
+            self._clean(self.DB_NAME)
+            self._clean(TEST_FILE_1)
+            self._clean(TEST_FILE_2)
+
+    def test_ok_infer_types(self):
+        TEST_FILE_1 = "sqlite_write_test_1.csv"
+        TEST_FILE_2 = "sqlite_write_test_2.csv"
+        try:
+            with open(TEST_FILE_1, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerows(
+                    [["id", "price", "code", "name"], ["1", "1.5", "1", "A"], ["2", "", "2", "B"]]
+                )
+            with open(TEST_FILE_2, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerows([["id", "price", "code"], ["10", "2", "007"]])
+
+            for bulk in [False, True]:
+                instance = SqliteImport()
+                instance._set_arguments(
+                    {
+                        "dbname": self.DB_NAME,
+                        "src_dir": ".",
+                        "src_pattern": r"sqlite_write_test_.*.csv",
+                        "tblname": self.TBL_NAME,
+                        "bulk": bulk,
+                        "infer_types": True,
+                    }
+                )
+                instance.execute()
+
+                adapter = SqliteAdapter()
+                adapter.connect(self.DB_NAME)
+                cur = adapter.fetch("PRAGMA TABLE_INFO(%s)" % self.TBL_NAME)
+                assert [
+                    ("id", "INTEGER"),
+                    ("price", "REAL"),
+                    ("code", "TEXT"),
+                    ("name", "TEXT"),
+                ] == [(row[1], row[2]) for row in cur]
+                cur = adapter.fetch("SELECT id FROM %s ORDER BY id" % self.TBL_NAME)
+                assert [(1,), (2,), (10,)] == cur.fetchall()
+                # Empty values of the numeric columns are NULL, and sort before the numbers
+                cur = adapter.fetch("SELECT price FROM %s ORDER BY price" % self.TBL_NAME)
+                assert [(None,), (1.5,), (2.0,)] == cur.fetchall()
+                adapter.close()
+        finally:
+            self._clean(self.DB_NAME)
+            self._clean(TEST_FILE_1)
+            self._clean(TEST_FILE_2)
+
+    def test_ok_concurrent_files(self):
+        files = ["sqlite_write_test_%d.csv" % i for i in range(5)]
+        try:
+            for i, file in enumerate(files):
+                with open(file, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["No", "TEXT"] if i % 2 == 0 else ["No", "NAME"])
+                    writer.writerows([[str(i * 100 + j), "v%d" % j] for j in range(100)])
+
+            instance = SqliteImport()
+            instance._set_arguments(
+                {
+                    "dbname": self.DB_NAME,
+                    "src_dir": ".",
+                    "src_pattern": r"sqlite_write_test_.*.csv",
+                    "tblname": self.TBL_NAME,
+                    "primary_key": "No",
+                    "bulk": True,
+                    "concurrent_files": 2,
+                }
+            )
+            with patch.object(SqliteAdapter, "_BULK_COUNT", 30):
+                instance.execute()
+
+            adapter = SqliteAdapter()
+            adapter.connect(self.DB_NAME)
+            cur = adapter.fetch(
+                'SELECT COUNT(*), COUNT("TEXT"), COUNT(NAME) FROM %s' % self.TBL_NAME
+            )
+            assert (500, 300, 200) == cur.fetchone()
+            adapter.close()
+        finally:
+            self._clean(self.DB_NAME)
+            for file in files:
+                self._clean(file)
+
+    def test_ok_concurrent_files_overlapping_keys(self):
+        files = ["sqlite_write_test_%d.csv" % i for i in range(4)]
+        try:
+            for i, file in enumerate(files):
+                with open(file, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(["No", "TEXT"])
+                    writer.writerows([[str(j), "file%d" % i] for j in range(100)])
+
+            read_batches = SqliteAdapter.read_batches
+
+            def slow_first_file(adapter, src, *args, **kwargs):
+                for batch in read_batches(adapter, src, *args, **kwargs):
+                    if src.endswith(files[0]):
+                        time.sleep(0.01)
+                    yield batch
+
+            results = []
+            for concurrent_files in [1, 3]:
+                instance = SqliteImport()
+                instance._set_arguments(
+                    {
+                        "dbname": self.DB_NAME,
+                        "src_dir": ".",
+                        "src_pattern": r"sqlite_write_test_.*.csv",
+                        "tblname": self.TBL_NAME,
+                        "primary_key": "No",
+                        "refresh": True,
+                        "bulk": True,
+                        "concurrent_files": concurrent_files,
+                    }
+                )
+                # The first file is parsed slowly, so its rows would come last if unordered
+                with (
+                    patch.object(SqliteAdapter, "_BULK_COUNT", 10),
+                    patch.object(SqliteAdapter, "read_batches", slow_first_file),
+                ):
+                    instance.execute()
+
+                adapter = SqliteAdapter()
+                adapter.connect(self.DB_NAME)
+                cur = adapter.fetch('SELECT "TEXT", COUNT(*) FROM %s GROUP BY 1' % self.TBL_NAME)
+                results.append(cur.fetchall())
+                adapter.close()
+            # The last file wins, same as the sequential import
+            assert 1 == len(results[0])
+            assert results[0] == results[1]
+        finally:
+            self._clean(self.DB_NAME)
+            for file in files:
+                self._clean(file)
+
+    def test_ng_concurrent_files_parse_error(self):
+        files = ["sqlite_write_test_%d.csv" % i for i in range(3)]
+        try:
+            for file in files:
+                with open(file, "w", encoding="utf-8", newline="") as f:
+                    f.write("No,TEXT\n1,A\n")
+            with open(files[1], "ab") as f:
+                f.write(b"2,\xff\n")
+
+            instance = SqliteImport()
+            instance._set_arguments(
+                {
+                    "dbname": self.DB_NAME,
+                    "src_dir": ".",
+                    "src_pattern": r"sqlite_write_test_.*.csv",
+                    "tblname": self.TBL_NAME,
+                    "bulk": True,
+                    "concurrent_files": 2,
+                }
+            )
+            with pytest.raises(UnicodeDecodeError):
+                instance.execute()
+        finally:
+            self._clean(self.DB_NAME)
+            for file in files:
+                self._clean(file)
+
     def _dict_factory(self, cursor, row):
         d = {}
         for i, col in enumerate(cursor.description):
             d[col[0]] = row[i]
         return d
 
+    def test_ok_pool_shared_by_steps(self):
+        TEST_FILE = "sqlite_write_test.csv"
+        try:
+            with open(TEST_FILE, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["No", "TEXT"])
+                writer.writerow(["1", "A"])
+
+            with patch("sqlite3.connect", wraps=sqlite3.connect) as connect:
+                for refresh in [True, False]:
+                    instance = SqliteImport()
+                    instance._set_arguments(
+                        {
+                            "dbname": self.DB_NAME,
+                            "src_dir": ".",
+                            "src_pattern": TEST_FILE,
+                            "tblname": self.TBL_NAME,
+                            "refresh": refresh,
+                            "profile": "wal",
+                            "pool": True,
+                        }
+                    )
+                    instance.execute()
+            # The following step reuses the connection of the previous step
+            assert 1 == connect.call_count
+            assert os.path.exists(self.DB_NAME + "-wal")
+
+            SqliteAdapter.close_pool()
+            assert not os.path.exists(self.DB_NAME + "-wal")
+            adapter = SqliteAdapter()
+            adapter.connect(self.DB_NAME)
+            try:
+                assert 2 == adapter.fetch("SELECT COUNT(*) FROM %s" % self.TBL_NAME).fetchone()[0]
+            finally:
+                adapter.close()
+        finally:
+            SqliteAdapter.close_pool()
+            self._clean(self.DB_NAME)
+            self._clean(TEST_FILE)
+
     def _create_instance(self, pattern, refresh, force_insert: bool = False):
         instance = SqliteImport()
         instance._set_arguments(
@@ -1,3 +1,5 @@
+import csv
+import gzip
 from unittest.mock import MagicMock
 
 import pytest
@@ -6,6 +8,7 @@ from cliboa.scenario.extract.mysql import MysqlRead
 from cliboa.scenario.extract.postgres import PostgresqlRead
 from cliboa.scenario.load.mysql import MysqlWrite
 from cliboa.scenario.load.postgres import PostgresqlWrite
+from cliboa.util.exception import DatabaseException, LocalInfileDisabled
 
 
 @pytest.fixture
@@ -106,6 +109,150 @@ class TestRdbmsWrite:
         # Verify data passed
         assert ("val1", "val2") in actual_params or (("val1", "val2"),) in actual_params
 
+    @pytest.mark.parametrize("target_class", [MysqlWrite, PostgresqlWrite])
+    def test_execute_write_commit_interval(self, target_class, mock_adaptor, mock_logger, tmp_path):
+        src = tmp_path / "test.csv"
+        src.write_text("col1,col2\n" + "".join("val%s,x\n" % i for i in range(5)))
+        instance = target_class(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "src_dir": str(tmp_path),
+                "src_pattern": r"test\.csv",
+                "tblname": "dest_table",
+                "chunk_size": 2,
+                "commit_interval": 4,
+            }
+        )
+        instance.execute()
+
+        assert "INSERT INTO dest_table (col1,col2) VALUES (%s,%s)" == (
+            mock_adaptor.insert.call_args.args[0]
+        )
+        assert [
+            [("val0", "x"), ("val1", "x")],
+            [("val2", "x"), ("val3", "x")],
+            [("val4", "x")],
+        ] == [c.args[1] for c in mock_adaptor.insert.call_args_list]
+        assert 1 == mock_adaptor.commit.call_count
+        # Rows are not logged
+        for c in mock_logger.info.call_args_list:
+            assert "val0" not in str(c)
+
+    def test_execute_write_copy(self, mock_adaptor, mock_logger, tmp_path):
+        (tmp_path / "test1.csv").write_text("col1,col2\nval1,x\nval2,y\n")
+        (tmp_path / "test2.csv").write_text("col2,col1\nz,val3\n")
+        loaded = []
+
+        def copy_from(tblname, columns, f):
+            loaded.append((tblname, columns, f.read()))
+            return 1
+
+        mock_adaptor.copy_from.side_effect = copy_from
+        instance = PostgresqlWrite(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "src_dir": str(tmp_path),
+                "src_pattern": r"test.\.csv",
+                "tblname": "dest_table",
+                "load_method": "copy",
+            }
+        )
+        instance.execute()
+
+        assert not mock_adaptor.insert.called
+        assert [
+            ("dest_table", ["col1", "col2"], "col1,col2\nval1,x\nval2,y\n"),
+            ("dest_table", ["col2", "col1"], "col2,col1\nz,val3\n"),
+        ] == sorted(loaded)
+
+    def test_execute_write_load_data(self, mock_adaptor, mock_logger, tmp_path):
+        (tmp_path / "test1.csv").write_bytes(b"col1,col2\r\nval1,x\r\n")
+        with gzip.open(tmp_path / "test2.csv.gz", "wt", newline="") as f:
+            f.write("col2,col1\nz,val3\n")
+        loaded = []
+
+        def load_data(path, tblname, columns, charset, line_terminator):
+            with open(path, "rb") as f:
+                loaded.append((tblname, columns, charset, line_terminator, f.read()))
+            return 1
+
+        mock_adaptor.load_data.side_effect = load_data
+        instance = MysqlWrite(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "src_dir": str(tmp_path),
+                "src_pattern": r"test.\.csv.*",
+                "tblname": "dest_table",
+                "load_method": "load_data",
+            }
+        )
+        instance.execute()
+
+        assert not mock_adaptor.insert.called
+        assert [
+            ("dest_table", ["col1", "col2"], "utf8mb4", "\r\n", b"col1,col2\r\nval1,x\r\n"),
+            ("dest_table", ["col2", "col1"], "utf8mb4", "\n", b"col2,col1\nz,val3\n"),
+        ] == sorted(loaded)
+
+    def test_execute_write_load_data_fallback(self, mock_adaptor, mock_logger, tmp_path):
+        (tmp_path / "test1.csv").write_text("col1,col2\nval1,x\n")
+        (tmp_path / "test2.csv").write_text("col1,col2\nval2,y\n")
+        mock_adaptor.load_data.side_effect = LocalInfileDisabled("LOAD DATA LOCAL is not allowed.")
+        instance = MysqlWrite(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "src_dir": str(tmp_path),
+                "src_pattern": r"test.\.csv",
+                "tblname": "dest_table",
+                "load_method": "load_data",
+            }
+        )
+        instance.execute()
+
+        # The server is asked only once
+        assert 1 == mock_adaptor.load_data.call_count
+        assert [[("val1", "x")], [("val2", "y")]] == sorted(
+            c.args[1] for c in mock_adaptor.insert.call_args_list
+        )
+
+    def test_execute_write_load_data_warnings(self, mock_adaptor, mock_logger, tmp_path):
+        (tmp_path / "test1.csv").write_text("col1,col2\nval1,x\n")
+        mock_adaptor.load_data.side_effect = DatabaseException("LOAD DATA reported 1 warnings.")
+        instance = MysqlWrite(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "src_dir": str(tmp_path),
+                "src_pattern": r"test.\.csv",
+                "tblname": "dest_table",
+                "load_method": "load_data",
+            }
+        )
+        with pytest.raises(DatabaseException):
+            instance.execute()
+
+        # Rows are not inserted again after a partial load
+        assert not mock_adaptor.insert.called
+
 
 class TestRdbmsRead:
     """Tests for Read (Extract) classes: MysqlRead and PostgresqlRead."""
@@ -134,8 +281,8 @@ class TestRdbmsRead:
         # 3. Mock external dependencies
         mock_cursor = MagicMock()
         mock_cursor.description = [("col1",), ("col2",)]
-        mock_cursor.__iter__.return_value = [("val1", "val2"), ("val3", "val4")]
-        mock_adaptor.select.return_value = mock_cursor
+        mock_cursor.fetchmany.side_effect = [[("val1", "val2"), ("val3", "val4")], []]
+        mock_adaptor.select_stream.return_value = mock_cursor
 
         mocker.patch("os.makedirs")
 
@@ -149,8 +296,61 @@ class TestRdbmsRead:
         instance.execute()
 
         # 5. Verification
-        mock_adaptor.select.assert_called_once()
-        assert "SELECT * FROM source_table" in mock_adaptor.select.call_args.args[0]
+        mock_adaptor.select_stream.assert_called_once()
+        assert "SELECT * FROM source_table" in mock_adaptor.select_stream.call_args.args[0]
 
         # Verify file write
         assert file_mock.write.called or file_mock.writerow.called
+
+    @pytest.mark.parametrize("writer_thread", [False, True])
+    def test_execute_read_batches(self, writer_thread, mock_adaptor, mock_logger, tmp_path):
+        instance = PostgresqlRead(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "dest_path": str(tmp_path / "result.csv"),
+                "query": "SELECT col1, col2 FROM source_table",
+                "fetch_size": 2,
+                "writer_thread": writer_thread,
+            }
+        )
+        rows = [("val%s" % i, i) for i in range(5)]
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("col1",), ("col2",)]
+        mock_cursor.fetchmany.side_effect = [rows[0:2], rows[2:4], rows[4:], []]
+        mock_adaptor.select_stream.return_value = mock_cursor
+
+        instance.execute()
+
+        assert "SELECT col1, col2 FROM source_table" == (
+            mock_adaptor.select_stream.call_args.args[0]
+        )
+        mock_cursor.fetchmany.assert_called_with(2)
+        with open(tmp_path / "result.csv", newline="") as f:
+            assert [["col1", "col2"]] + [[v, str(i)] for v, i in rows] == list(csv.reader(f))
+
+    def test_execute_read_writer_error(self, mock_adaptor, mock_logger, tmp_path):
+        instance = MysqlRead(di_adaptor_db=mock_adaptor, di_logger=mock_logger)
+        instance._set_arguments(
+            {
+                "host": "localhost",
+                "dbname": "test_db",
+                "user": "test_user",
+                "password": "password",
+                "dest_path": str(tmp_path / "result.csv"),
+                "tblname": "source_table",
+                "fetch_size": 1,
+                "writer_thread": True,
+            }
+        )
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("col1",)]
+        mock_cursor.fetchmany.side_effect = [[("a",)], [("b",)], [("c",)], []]
+        mock_adaptor.select_stream.return_value = mock_cursor
+        instance.callback_handler = MagicMock(side_effect=ValueError("broken row"))
+
+        with pytest.raises(ValueError):
+            instance.execute()
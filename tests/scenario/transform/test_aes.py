@@ -14,8 +14,11 @@
 import os
 import shutil
 
+import pytest
+
 from cliboa.conf import env
 from cliboa.scenario.transform.aes import AesDecrypt, AesEncrypt
+from cliboa.util.exception import CliboaException
 from tests import BaseCliboaTest
 
 
@@ -111,3 +114,84 @@ class TestAes(BaseCliboaTest):
         with open(os.path.join(self._result_dir, self._file_name), mode="r", encoding="utf-8") as f:
             txt = f.read()
         assert txt == "This is test"
+
+    def test_encrypt_decrypt_gcm_ok(self):
+        data = "".join("%s,spam,ham\n" % i for i in range(10000))
+        with open(os.path.join(self._data_dir, self._file_name), mode="w") as f:
+            f.write(data)
+        open(os.path.join(self._data_dir, "empty.txt"), "w").close()
+
+        # Encryption. Files are replaced since dest_dir is not given.
+        instance = AesEncrypt()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"(test|empty)\.txt",
+                "key_dir": self._data_dir,
+                "key_pattern": r"test\.key",
+                "mode": "gcm",
+                "segment_size": 1000,
+                "threads": 3,
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, self._file_name), mode="rb") as f:
+            encrypted = f.read()
+        assert encrypted.startswith(AesEncrypt.MAGIC)
+        assert b"spam" not in encrypted
+
+        # Decryption
+        instance = AesDecrypt()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"(test|empty)\.txt",
+                "key_dir": self._data_dir,
+                "key_pattern": r"test\.key",
+                "threads": 2,
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, self._file_name), mode="r") as f:
+            assert f.read() == data
+        assert os.path.getsize(os.path.join(self._data_dir, "empty.txt")) == 0
+
+    def test_decrypt_gcm_truncated(self):
+        instance = AesEncrypt()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.txt",
+                "dest_dir": self._result_dir,
+                "key_dir": self._data_dir,
+                "key_pattern": r"test\.key",
+                "mode": "gcm",
+                "segment_size": 4,
+            }
+        )
+        instance.execute()
+
+        # Drop the last segment
+        encrypted_file = os.path.join(self._result_dir, self._file_name)
+        with open(encrypted_file, mode="rb") as f:
+            encrypted = f.read()
+        with open(encrypted_file, mode="wb") as f:
+            f.write(encrypted[: -(4 + AesEncrypt.TAG_SIZE)])
+
+        instance = AesDecrypt()
+        instance._set_arguments(
+            {
+                "src_dir": self._result_dir,
+                "src_pattern": r"test\.txt",
+                "dest_dir": self._data_dir,
+                "key_dir": self._data_dir,
+                "key_pattern": r"test\.key",
+            }
+        )
+        with pytest.raises(CliboaException) as execinfo:
+            instance.execute()
+        assert "Failed to decrypt" in str(execinfo.value)
+        with open(os.path.join(self._data_dir, self._file_name), mode="r") as f:
+            assert f.read() == "This is test"
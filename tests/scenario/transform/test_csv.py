@@ -12,13 +12,19 @@
 # all copies or substantial portions of the Software.
 #
 import csv
+import gzip
+import hashlib
+import hmac
 import os
 import shutil
 from glob import glob
+from unittest.mock import patch
 
 import jsonlines
+import pandas
 import pytest
 
+from cliboa.adapter.sqlite import SqliteAdapter
 from cliboa.conf import env
 from cliboa.scenario.transform.csv import (
     ColumnLengthAdjust,
@@ -37,11 +43,12 @@ from cliboa.scenario.transform.csv import (
     CsvRowDelete,
     CsvSort,
     CsvSplit,
+    CsvSqlQuery,
     CsvToJsonl,
     CsvTypeConvert,
     CsvValueExtract,
 )
-from cliboa.util.exception import InvalidParameter
+from cliboa.util.exception import CliboaException, InvalidParameter
 from tests import BaseCliboaTest
 
 
@@ -179,6 +186,104 @@ class TestCsvColumnHash(TestCsvTransform):
                 )
         assert rows == len(test_csv_data)
 
+    def test_execute_ok_with_compressed_file(self):
+        # create test csv
+        src = os.path.join(self._data_dir, "test.csv.gz")
+        with gzip.open(src, mode="wt", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows([["id", "name", "passwd"], ["1", "spam", "spam1234"]])
+
+        # set the essential attributes
+        instance = CsvColumnHash()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.csv\.gz",
+                "columns": ["passwd"],
+            }
+        )
+        instance.execute()
+        with gzip.open(src, "rt", encoding="utf-8") as o:
+            rows = list(csv.DictReader(o))
+        assert len(rows) == 1
+        assert (
+            "ec77022924e329f8e01deab92a4092ed8b7ec2365f1e719ac4e9686744341d95" == rows[0]["passwd"]
+        )
+
+    def test_execute_ok_with_algorithm(self):
+        cases = [
+            ("sha256", None, None, hashlib.sha256(b"spam1234").hexdigest()),
+            ("sha256", "salt", None, hashlib.sha256(b"saltspam1234").hexdigest()),
+            ("blake2b", None, None, hashlib.blake2b(b"spam1234", digest_size=32).hexdigest()),
+            (
+                "blake2b",
+                None,
+                "secret",
+                hashlib.blake2b(b"spam1234", digest_size=32, key=b"secret").hexdigest(),
+            ),
+            (
+                "hmac-sha256",
+                None,
+                "secret",
+                hmac.new(b"secret", b"spam1234", hashlib.sha256).hexdigest(),
+            ),
+        ]
+        for algorithm, salt, key, expected in cases:
+            test_csv_data = [["id", "passwd"]] + [[str(i), "spam1234"] for i in range(10)]
+            self._create_csv(test_csv_data)
+
+            instance = CsvColumnHash()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": "test.csv",
+                    "columns": ["passwd"],
+                    "algorithm": algorithm,
+                    "salt": salt,
+                    "key": key,
+                }
+            )
+            instance.execute()
+            with open(os.path.join(self._data_dir, "test.csv"), "r") as o:
+                rows = list(csv.DictReader(o))
+            assert [str(i) for i in range(10)] == [r["id"] for r in rows]
+            assert [expected] * 10 == [r["passwd"] for r in rows]
+
+    def test_execute_ok_with_processes(self):
+        test_csv_data = [["id", "name"]] + [[str(i), "spam%s" % (i % 7)] for i in range(1000)]
+        self._create_csv(test_csv_data)
+
+        instance = CsvColumnHash()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "columns": ["id", "name"],
+                "processes": 2,
+            }
+        )
+        with patch("cliboa.scenario.transform.csv.chunk_size_handling") as handling:
+            # Small chunks to be processed in several processes
+            handling.side_effect = lambda func, *args: func(100, *args)
+            instance.execute()
+        with open(os.path.join(self._data_dir, "test.csv"), "r") as o:
+            rows = list(csv.DictReader(o))
+        assert 1000 == len(rows)
+        for i, r in enumerate(rows):
+            assert hashlib.sha256(str(i).encode()).hexdigest() == r["id"]
+            assert hashlib.sha256(("spam%s" % (i % 7)).encode()).hexdigest() == r["name"]
+
+    def test_execute_ng_without_key(self):
+        instance = CsvColumnHash()
+        with pytest.raises(InvalidParameter):
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": "test.csv",
+                    "columns": ["passwd"],
+                    "algorithm": "hmac-sha256",
+                }
+            )
+
 
 class TestCsvColumnExtract(TestCsvTransform):
     def test_execute_ok_with_column_names(self):
@@ -206,6 +311,23 @@ class TestCsvColumnExtract(TestCsvTransform):
                 assert r["key"] == test_csv_data[1][0]
         assert rows == len(test_csv_data)
 
+    def test_execute_ok_with_column_names_in_given_order(self):
+        test_csv_data = [["key", "data", "name"], ["1", "spam,1", "SPAM1"], ["2", "spam2", ""]]
+        self._create_csv(test_csv_data)
+
+        instance = CsvColumnExtract()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "columns": ["name", "data"],
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test.csv"), "r", newline="") as o:
+            assert 'name,data\r\nSPAM1,"spam,1"\r\n,spam2\r\n' == o.read()
+
     def test_execute_ok_with_remain_column_numbers(self):
         # create test csv
         test_csv_data = [["1", "spam"], ["2", "spam"]]
@@ -493,6 +615,52 @@ class TestCsvValueExtract(TestCsvTransform):
                 if i == 2:
                     self.assertEqual(["2", "2", "SPAM2"], row)
 
+    def test_execute_ok_with_groups_and_flags(self):
+        test_csv_data = [["key", "data", "name"]] + [
+            [str(i), "spam%s-%s" % (i, i + 1), "Spam%s" % i] for i in range(100)
+        ]
+        self._create_csv(test_csv_data)
+
+        instance = CsvValueExtract()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "column_regex_pattern": {"data": r"(\d+)-(\d+)", "name": "(?i)^spam[0-5]$"},
+            }
+        )
+        with patch("cliboa.scenario.transform.csv.chunk_size_handling") as handling:
+            handling.side_effect = lambda func, *args: func(30, *args)
+            instance.execute()
+
+        with open(os.path.join(self._data_dir, "test.csv"), "r", newline="") as o:
+            rows = list(csv.reader(o))
+        assert ["key", "data", "name"] == rows[0]
+        assert 101 == len(rows)
+        for i, row in enumerate(rows[1:]):
+            assert [str(i), "%s-%s" % (i, i + 1), "Spam%s" % i if i <= 5 else ""] == row
+
+    def test_execute_ok_with_backreference_and_verbose(self):
+        test_csv_data = [["key", "data", "name"], ["1", "xaay", "ab12"], ["2", "xaby", "cd"]]
+        self._create_csv(test_csv_data)
+
+        instance = CsvValueExtract()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "column_regex_pattern": {
+                    "data": r"(a)\1",
+                    "name": "(?x) [a-z]+ \\d+  # letters and digits",
+                },
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test.csv"), "r", newline="") as o:
+            rows = list(csv.reader(o))
+        assert [["key", "data", "name"], ["1", "aa", "ab12"], ["2", "", ""]] == rows
+
     def test_execute_ok_with_target_multiple_column(self):
         # create test csv
         test_csv_data = [
@@ -554,6 +722,32 @@ class TestCsvValueExtract(TestCsvTransform):
                 if i == 1:
                     self.assertEqual(["1", "", "SPAM1"], row)
 
+    def test_execute_ok_with_output_compression(self):
+        # create test csv
+        test_csv_data = [
+            ["key", "data", "name"],
+            ["1", "spam1", "SPAM1"],
+        ]
+        self._create_csv(test_csv_data)
+
+        # set the essential attributes
+        instance = CsvValueExtract()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "dest_dir": self._result_dir,
+                "column_regex_pattern": {"data": "[0-9]"},
+                "output_compression": "gzip",
+            }
+        )
+
+        instance.execute()
+        output_file = os.path.join(self._result_dir, "test.csv.gz")
+        with gzip.open(output_file, "rt") as o:
+            rows = list(csv.reader(o))
+        assert rows == [["key", "data", "name"], ["1", "1", "SPAM1"]]
+
 
 class TestCsvColumnSelect(TestCsvTransform):
     def test_execute_ok(self):
@@ -1103,6 +1297,28 @@ class TestCsvMergeExclusive(TestCsvTransform):
                 assert r["data"] == test_src_csv_data[2][1]
             assert rows == 1
 
+    def test_execute_ok_with_irregular_rows(self):
+        # BOM, a whitespace-only line and a short row are kept in line with their keys
+        with open(os.path.join(self._data_dir, "test.csv"), "w", encoding="utf-8-sig") as f:
+            f.write("key,data\n1,spam1\n \n2\n3,spam3\n")
+        self._create_csv([["id"], ["1"], ["3"]], fname="alter.csv")
+
+        instance = CsvMergeExclusive()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "src_column": "key",
+                "target_compare_path": os.path.join(self._data_dir, "alter.csv"),
+                "target_column": "id",
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._data_dir, "test.csv"), "r", newline="") as o:
+            rows = list(csv.reader(o))
+        assert [["key", "data"], [" ", ""], ["2", ""]] == rows
+
     def test_execute_ok_with_na(self):
         # create test csv
         test_src_csv_data = [["key", "data"], ["1", "spam1"], ["2", "NA"]]
@@ -1448,6 +1664,19 @@ class TestCsvMerge(TestCsvTransform):
 
 
 class TestCsvConcat(TestCsvTransform):
+    def test_execute_ng_output_compression(self):
+        instance = CsvConcat()
+        with pytest.raises(InvalidParameter):
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test.*\.csv",
+                    "dest_dir": self._data_dir,
+                    "dest_name": "test.csv",
+                    "output_compression": "gz",
+                }
+            )
+
     def test_execute_ok1(self):
         # create test file
         csv_list1 = [["key", "data"], ["c1", "001"], ["c2", "0.01"], ["c3", "spam"]]
@@ -2497,6 +2726,129 @@ class TestCsvSort(TestCsvTransform):
                 assert record_count == 3
 
 
+class TestCsvSqlQuery(TestCsvTransform):
+    def _execute(self, arguments):
+        instance = CsvSqlQuery()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "dest_dir": self._result_dir,
+                "dest_name": "result.csv",
+                **arguments,
+            }
+        )
+        instance.execute()
+        with open(os.path.join(self._result_dir, "result.csv"), "r", newline="") as f:
+            return list(csv.reader(f))
+
+    def test_execute_ok(self):
+        self._create_csv(
+            [["id", "name", "memo"], ["1", "spam", "a"], ["2", "ham", "b"], ["3", "egg", "c"]],
+            fname="users.csv",
+        )
+        self._create_csv([["user_id", "price"], ["1", "100"], ["1", "50"]], fname="orders1.csv")
+        self._create_csv([["user_id", "price"], ["3", "20"]], fname="orders2.csv")
+        self._create_csv([["other"], ["x"]], fname="unused.csv")
+
+        inserted = []
+        insert_rows = SqliteAdapter.insert_rows
+
+        def spy(adapter, tblname, columns, rows, **kwargs):
+            inserted.append((tblname, tuple(columns)))
+            return insert_rows(adapter, tblname, columns, rows, **kwargs)
+
+        for database in ["memory", "file"]:
+            inserted.clear()
+            with patch.object(SqliteAdapter, "insert_rows", spy):
+                rows = self._execute(
+                    {
+                        "tables": {
+                            "users": r"users\.csv",
+                            "orders": r"orders.*\.csv",
+                            "unused": r"unused\.csv",
+                        },
+                        "query": "SELECT u.name, SUM(o.price) AS total FROM users u"
+                        " JOIN orders o ON u.id = o.user_id GROUP BY u.name ORDER BY u.name",
+                        "database": database,
+                    }
+                )
+            assert [["name", "total"], ["egg", "20"], ["spam", "150"]] == rows
+            # Only the referenced columns are loaded
+            assert {("users", ("id", "name")), ("orders", ("user_id", "price"))} == set(inserted)
+            assert [] == glob(os.path.join(self._result_dir, "*.db"))
+
+    def test_execute_ok_count(self):
+        self._create_csv([["id", "name"], ["1", "spam"], ["2", "ham"]], fname="users.csv")
+        rows = self._execute(
+            {"tables": {"users": r"users\.csv"}, "query": "SELECT COUNT(*) AS cnt FROM users"}
+        )
+        assert [["cnt"], ["2"]] == rows
+
+    def test_execute_ok_infer_types(self):
+        self._create_csv(
+            [["id", "price"], ["1", "100"], ["2", ""], ["3", "9.5"]], fname="orders.csv"
+        )
+        rows = self._execute(
+            {
+                "tables": {"orders": r"orders\.csv"},
+                "query": "SELECT id, price FROM orders ORDER BY price",
+                "infer_types": True,
+            }
+        )
+        # The empty price is NULL, not a text which sorts after the numbers
+        assert [["id", "price"], ["2", ""], ["3", "9.5"], ["1", "100.0"]] == rows
+
+    def test_execute_ok_injected_adapter(self):
+        self._create_csv([["id", "name"], ["1", "spam"]], fname="users.csv")
+        adapter = SqliteAdapter()
+        instance = CsvSqlQuery(di_adapter_sqlite=adapter)
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "dest_dir": self._result_dir,
+                "dest_name": "result.csv",
+                "tables": {"users": r"users\.csv"},
+                "query": "SELECT name FROM users",
+            }
+        )
+        with patch.object(adapter, "connect", wraps=adapter.connect) as connect:
+            instance.execute()
+        connect.assert_called_once_with(":memory:")
+
+    def test_execute_ok_parquet(self):
+        pandas.DataFrame(
+            {
+                "id": [1, 2, 3],
+                "score": [1.5, 2.5, None],
+                "at": pandas.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"]),
+            }
+        ).to_parquet(os.path.join(self._data_dir, "scores.parquet"))
+        rows = self._execute(
+            {
+                "tables": {"scores": r"scores\.parquet"},
+                "query": "SELECT id, score, at FROM scores WHERE id >= 2 ORDER BY id",
+            }
+        )
+        assert [
+            ["id", "score", "at"],
+            ["2", "2.5", "2024-01-02 00:00:00"],
+            ["3", "", "2024-01-03 00:00:00"],
+        ] == rows
+
+    def test_execute_ng_table_name(self):
+        for tables in [{}, {"users; DROP": r"users\.csv"}]:
+            with pytest.raises(InvalidParameter):
+                CsvSqlQuery()._set_arguments(
+                    {
+                        "src_dir": self._data_dir,
+                        "dest_dir": self._result_dir,
+                        "dest_name": "result.csv",
+                        "tables": tables,
+                        "query": "SELECT 1",
+                    }
+                )
+
+
 class TestCsvToJsonl(TestCsvTransform):
     def test_convert(self):
         # create test file
@@ -2527,6 +2879,90 @@ class TestCsvToJsonl(TestCsvTransform):
                     elif i == 2:
                         assert "3" == row.get("key")
 
+    def test_convert_pandas(self):
+        csv_list = [
+            ["key", "data", "path"],
+            ["1", "A", "a/b"],
+            ["2", 'B "b"', ""],
+            ["3", "", "日本"],
+        ]
+        self._create_csv(csv_list, fname="test1.csv")
+
+        results = {}
+        for engine in ["python", "pandas"]:
+            instance = CsvToJsonl()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test.*\.csv",
+                    "dest_dir": os.path.join(self._result_dir, engine),
+                    "engine": engine,
+                    "chunk_size": 2,
+                }
+            )
+            instance.execute()
+            with jsonlines.open(os.path.join(self._result_dir, engine, "test1.jsonl")) as reader:
+                results[engine] = list(reader)
+        assert 3 == len(results["python"])
+        assert results["python"] == results["pandas"]
+
+    def test_convert_typed(self):
+        csv_list = [
+            ["id", "price", "flag", "zip", "name"],
+            ["1", "1.5", "true", "007", "a"],
+            ["2", "", "False", "010", "2"],
+            ["3", "2e3", "", "", "c"],
+        ]
+        self._create_csv(csv_list, fname="test1.csv")
+
+        instance = CsvToJsonl()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.*\.csv",
+                "dest_dir": self._result_dir,
+                "engine": "pandas",
+                "typed": True,
+            }
+        )
+        instance.execute()
+        with jsonlines.open(os.path.join(self._result_dir, "test1.jsonl")) as reader:
+            assert [
+                {"id": 1, "price": 1.5, "flag": True, "zip": "007", "name": "a"},
+                {"id": 2, "price": None, "flag": False, "zip": "010", "name": "2"},
+                {"id": 3, "price": 2000.0, "flag": None, "zip": "", "name": "c"},
+            ] == list(reader)
+
+    def test_convert_typed_mismatch(self):
+        csv_list = [["id", "name"], ["1", "a"], ["2", "b"], ["x", "c"]]
+        self._create_csv(csv_list, fname="test1.csv")
+
+        instance = CsvToJsonl()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.*\.csv",
+                "dest_dir": self._result_dir,
+                "engine": "pandas",
+                "typed": True,
+                "chunk_size": 2,
+            }
+        )
+        with pytest.raises(CliboaException) as e:
+            instance.execute()
+        assert "Column id has a value 'x'" in str(e.value)
+
+    def test_typed_requires_pandas(self):
+        instance = CsvToJsonl()
+        with pytest.raises(InvalidParameter):
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test.*\.csv",
+                    "typed": True,
+                }
+            )
+
 
 class TestCsvColumnCopy(TestCsvTransform):
     def test_creation_of_new_column(self):
@@ -2619,6 +3055,25 @@ class TestCsvColumnCopy(TestCsvTransform):
 
 
 class TestCsvColumnReplace(TestCsvTransform):
+    def test_replace_column_ok_with_backreference(self):
+        test_csv_data = [["id", "name", "address"], ["1", "test", "test@aaa.com"], ["2", "", ""]]
+        self._create_csv(test_csv_data)
+
+        instance = CsvColumnReplace()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.csv",
+                "column": "address",
+                "regex_pattern": r"(\w+)@(\w+)",
+                "rep_str": r"\2@\1",
+            }
+        )
+        instance.execute()
+        with open(os.path.join(self._data_dir, "test.csv"), "r") as o:
+            rows = list(csv.DictReader(o))
+        assert ["aaa@test.com", ""] == [r["address"] for r in rows]
+
     def test_replace_column_ok(self):
         # create test csv
         test_csv_data = [["id", "name", "address"], ["1", "test", "test@aaa.com"]]
@@ -2827,6 +3282,26 @@ class TestCsvSplitRows(TestCsvTransform):
                     f"Expected: {expected_data}\nActual: {actual_data}"
                 )
 
+    def test_execute_ok_with_compressed_input(self):
+        with gzip.open(os.path.join(self._data_dir, "test1.csv.gz"), "wt", newline="") as f:
+            csv.writer(f).writerows([["no", "name"], ["1", "alpha"], ["2", "beta"]])
+
+        instance = CsvSplit()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test1\.csv\.gz",
+                "dest_dir": self._result_dir,
+                "method": "rows",
+                "rows": 1,
+            }
+        )
+        instance.execute()
+
+        assert ["test1.00.csv.gz", "test1.01.csv.gz"] == sorted(os.listdir(self._result_dir))
+        with gzip.open(os.path.join(self._result_dir, "test1.01.csv.gz"), "rt", newline="") as f:
+            assert [["no", "name"], ["2", "beta"]] == list(csv.reader(f))
+
 
 class TestCsvSplitGrouped(TestCsvTransform):
     def test_execute_ok(self):
@@ -3041,3 +3516,35 @@ class TestCsvSplitGrouped(TestCsvTransform):
 
         with pytest.raises(Exception):
             instance.execute()
+
+    def test_execute_ok_with_compressed_input(self):
+        with gzip.open(os.path.join(self._data_dir, "test1.csv.gz"), "wt", newline="") as f:
+            csv.writer(f).writerows([["name", "class"], ["alpha", "A"], ["beta", "A"]])
+
+        instance = CsvSplit()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test1\.csv\.gz",
+                "dest_dir": self._result_dir,
+                "method": "grouped",
+                "key_column": "class",
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._result_dir, "A.csv"), newline="") as f:
+            assert [["name", "class"], ["alpha", "A"], ["beta", "A"]] == list(csv.reader(f))
+
+    def test_execute_ng_output_compression(self):
+        instance = CsvSplit()
+        with pytest.raises(InvalidParameter):
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test1\.csv",
+                    "method": "grouped",
+                    "key_column": "class",
+                    "output_compression": "gz",
+                }
+            )
@@ -19,7 +19,9 @@ import shutil
 import tarfile
 import zipfile
 from glob import glob
+from unittest.mock import patch
 
+import openpyxl
 import pytest
 import xlsxwriter
 
@@ -222,6 +224,58 @@ class TestFileTransformFunctions(TestFileTransform):
         with open(os.path.join(self._data_dir, "test2.txt"), encoding="utf-8") as f:
             assert "This is test 2--OK--" == f.read()
 
+    def test_io_writers_compressed_input(self):
+        instance = FileBaseTransform()
+        instance._set_arguments({"src_dir": "", "src_pattern": ""})
+        test_file = os.path.join(self._data_dir, "test.txt.gz")
+        with gzip.open(test_file, "wt", encoding="utf-8") as f:
+            f.write("This is test")
+
+        for reader, writer in instance.io_writers([test_file]):
+            writer.write(reader.read())
+            writer.write("--OK--")
+
+        assert os.path.exists(os.path.join(self._data_dir, "test.txt")) is False
+        with gzip.open(test_file, "rt", encoding="utf-8") as f:
+            assert "This is test--OK--" == f.read()
+
+    def test_io_writers_output_compression(self):
+        instance = FileBaseTransform()
+        instance._set_arguments(
+            {
+                "src_dir": "",
+                "src_pattern": "",
+                "dest_dir": self._out_dir,
+                "output_compression": "bz2",
+            }
+        )
+        files = self._create_files()
+        for reader, writer in instance.io_writers(files):
+            writer.write(reader.read())
+
+        with bz2.open(os.path.join(self._out_dir, "test1.txt.bz2"), "rt", encoding="utf-8") as f:
+            assert "This is test 1" == f.read()
+        with bz2.open(os.path.join(self._out_dir, "test2.txt.bz2"), "rt", encoding="utf-8") as f:
+            assert "This is test 2" == f.read()
+
+    def test_io_files_output_compression_none(self):
+        instance = FileBaseTransform()
+        instance._set_arguments(
+            {
+                "src_dir": "",
+                "src_pattern": "",
+                "dest_dir": self._out_dir,
+                "output_compression": "none",
+            }
+        )
+        test_file = os.path.join(self._data_dir, "test.jsonl.gz")
+        with gzip.open(test_file, "wt", encoding="utf-8") as f:
+            f.write("This is test")
+
+        instance.io_files([test_file], ext="csv", func=self._copy_func)
+        with open(os.path.join(self._out_dir, "test.csv"), encoding="utf-8") as f:
+            assert "This is test" == f.read()
+
     def test_io_writers_invalid_parameter(self):
         instance = FileBaseTransform()
         files = self._create_files()
@@ -251,6 +305,12 @@ class TestFileTransformFunctions(TestFileTransform):
     def _func(self, fi, fo):
         pass
 
+    def _copy_func(self, fi, fo):
+        instance = FileBaseTransform()
+        with instance.open_file(fi, encoding="utf-8") as i:
+            with instance.open_file(fo, "w", encoding="utf-8") as o:
+                o.write(i.read())
+
 
 class TestFileDecompress(TestFileTransform):
     def test_zip(self):
@@ -368,6 +428,50 @@ class TestFileDecompress(TestFileTransform):
         with open(decompressed_file_2, encoding="utf-8") as f:
             assert "This is test 2" == f.read()
 
+    def test_zip_member_pattern_threads(self):
+        with zipfile.ZipFile(os.path.join(self._data_dir, "test.zip"), "w") as zp:
+            for i in range(10):
+                zp.writestr("dir%s/test%s.csv" % (i % 3, i), "test %s" % i)
+                zp.writestr("dir%s/test%s.txt" % (i % 3, i), "test %s" % i)
+
+        instance = FileDecompress()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.zip",
+                "dest_dir": self._out_dir,
+                "member_pattern": r".*\.csv",
+                "threads": 4,
+            }
+        )
+        instance.execute()
+
+        assert 10 == len(glob(os.path.join(self._out_dir, "*", "*.csv")))
+        assert 0 == len(glob(os.path.join(self._out_dir, "*", "*.txt")))
+        with open(os.path.join(self._out_dir, "dir1", "test4.csv"), encoding="utf-8") as f:
+            assert "test 4" == f.read()
+
+    def test_tar_member_pattern(self):
+        self._create_files()
+        with tarfile.open(os.path.join(self._data_dir, "test.tar"), mode="w") as f:
+            f.add(os.path.join(self._data_dir, "test1.txt"), arcname="test1.txt")
+            f.add(os.path.join(self._data_dir, "test2.txt"), arcname="test2.txt")
+
+        instance = FileDecompress()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.tar",
+                "dest_dir": self._out_dir,
+                "member_pattern": r"test2\.txt",
+            }
+        )
+        instance.execute()
+
+        assert os.path.exists(os.path.join(self._out_dir, "test1.txt")) is False
+        with open(os.path.join(self._out_dir, "test2.txt"), encoding="utf-8") as f:
+            assert "This is test 2" == f.read()
+
     def test_unsupported_type(self):
         file1 = os.path.join(self._data_dir, "test.rar")
         with open(file1, mode="w", encoding="utf-8") as f:
@@ -497,6 +601,59 @@ class TestFileCompress(TestFileTransform):
         with open(os.path.join(self._out_dir, "test2.txt"), encoding="utf-8") as f:
             assert "This is test 2" == f.read()
 
+    def test_gz_threads(self):
+        src = os.path.join(self._data_dir, "test.csv")
+        data = "".join("%d,spam,ham\n" % i for i in range(10000))
+        with open(src, "w", encoding="utf-8") as f:
+            f.write(data)
+
+        instance = FileCompress()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.csv",
+                "dest_dir": self._out_dir,
+                "format": "gzip",
+                "level": 1,
+                "threads": 4,
+                "block_size": 1024,
+            }
+        )
+        instance.execute()
+
+        with gzip.open(os.path.join(self._out_dir, "test.csv.gz"), "rt", encoding="utf-8") as f:
+            assert data == f.read()
+
+    def test_xz_decompress(self):
+        self._create_files()
+
+        instance = FileCompress()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.*\.txt",
+                "dest_dir": self._out_dir,
+                "format": "xz",
+                "concurrent_files": 2,
+            }
+        )
+        instance.execute()
+
+        instance = FileDecompress()
+        instance._set_arguments(
+            {
+                "src_dir": self._out_dir,
+                "src_pattern": r"test.*\.txt\.xz",
+                "concurrent_files": 2,
+            }
+        )
+        instance.execute()
+
+        with open(os.path.join(self._out_dir, "test1.txt"), encoding="utf-8") as f:
+            assert "This is test 1" == f.read()
+        with open(os.path.join(self._out_dir, "test2.txt"), encoding="utf-8") as f:
+            assert "This is test 2" == f.read()
+
 
 class TestDateFormatConvert(TestFileTransform):
     def test_convert_ok(self):
@@ -528,6 +685,46 @@ class TestDateFormatConvert(TestFileTransform):
                 assert "2021-01-01 12:00" == row.get("date")
         assert rows == len(obj)
 
+    def test_convert_pandas_engine(self):
+        src = os.path.join(self._data_dir, "test.csv")
+        with open(src, mode="w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["No", "date", "name", "updated"])
+            for i in range(100):
+                writer.writerow([i, "2021/01/%02d 12:00:00" % (i % 3 + 1), "a,b", ""])
+            # Values which do not conform to the inferred format
+            writer.writerow([100, "2021-01-05", "c", "Jan 6 2021"])
+            writer.writerow([101, "", "d", "2021/01/07 08:00:00"])
+
+        outputs = []
+        for engine in ["python", "pandas"]:
+            out_dir = os.path.join(self._out_dir, engine)
+            instance = DateFormatConvert()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test\.csv",
+                    "dest_dir": out_dir,
+                    "columns": ["date", "updated", "nothing"],
+                    "formatter": "%Y-%m-%d %H:%M",
+                    "engine": engine,
+                    "chunk_size": 30,
+                }
+            )
+            instance.execute()
+            with open(os.path.join(out_dir, "test.csv"), mode="rb") as f:
+                outputs.append(f.read())
+            shutil.rmtree(out_dir)
+
+        assert outputs[0] == outputs[1]
+        rows = list(csv.DictReader(outputs[1].decode().splitlines()))
+        assert "2021-01-02 12:00" == rows[1]["date"]
+        assert "a,b" == rows[1]["name"]
+        assert "2021-01-05 00:00" == rows[100]["date"]
+        assert "2021-01-06 00:00" == rows[100]["updated"]
+        assert "" == rows[101]["date"]
+        assert "2021-01-07 08:00" == rows[101]["updated"]
+
 
 @pytest.mark.skip("xlsxwriter is not used in cliboa.")
 class TestExcelConvert(TestFileTransform):
@@ -550,6 +747,71 @@ class TestExcelConvert(TestFileTransform):
         assert "test.csv" in exists_csv[0]
 
 
+class TestExcelConvertOpenpyxl(TestFileTransform):
+    def _create_workbook(self):
+        excel_file = os.path.join(self._data_dir, "test.xlsx")
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for name, rows in [
+            ("first", [["id", "name"], [1, "a"], [2, None]]),
+            ("second", [["key", "value"], ["x", 1.5]]),
+        ]:
+            worksheet = workbook.create_sheet(name)
+            for row in rows:
+                worksheet.append(row)
+        workbook.save(excel_file)
+
+    def _read_csv(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_convert_openpyxl(self):
+        self._create_workbook()
+
+        for sheet in [None, 0, "first", 1, "second"]:
+            instance = ExcelConvert()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test\.xlsx",
+                    "dest_dir": self._out_dir,
+                    "engine": "openpyxl",
+                    "sheet": sheet,
+                }
+            )
+            instance.execute()
+            rows = self._read_csv(os.path.join(self._out_dir, "test.csv"))
+            if sheet in [None, 0, "first"]:
+                assert [["id", "name"], ["1", "a"], ["2", ""]] == rows
+            else:
+                assert [["key", "value"], ["x", "1.5"]] == rows
+
+    def test_convert_all_sheets(self):
+        self._create_workbook()
+
+        for engine, processes in [("openpyxl", 1), ("openpyxl", 2), ("pandas", 1)]:
+            instance = ExcelConvert()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test\.xlsx",
+                    "dest_dir": self._out_dir,
+                    "engine": engine,
+                    "sheet": "all",
+                    "processes": processes,
+                }
+            )
+            instance.execute()
+            first = self._read_csv(os.path.join(self._out_dir, "test_first.csv"))
+            second = self._read_csv(os.path.join(self._out_dir, "test_second.csv"))
+            if engine == "pandas":
+                # pandas writes the row index as the first column
+                first = [row[1:] for row in first]
+                second = [row[1:] for row in second]
+            assert [["id", "name"], ["1", "a"], ["2", ""]] == first
+            assert [["key", "value"], ["x", "1.5"]] == second
+
+
 class TestFileCopy(TestFileTransform):
     def test_execute_ok(self):
         self._create_files()
@@ -828,6 +1090,46 @@ class TestFileDivide(TestFileTransform):
                         assert str(row_index) == line.splitlines()[0]
                         row_index += 1
 
+    def test_execute_compressed(self):
+        with gzip.open(os.path.join(self._data_dir, "test.txt.gz"), "wt") as f:
+            f.write("idx\n")
+            for i in range(5):
+                f.write("%s\n" % str(i))
+
+        for output_compression, ext in [(None, ".txt.gz"), ("none", ".txt")]:
+            instance = FileDivide()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test\.txt\.gz",
+                    "dest_dir": os.path.join(self._out_dir, str(output_compression)),
+                    "divide_rows": 2,
+                    "header": True,
+                    "output_compression": output_compression,
+                }
+            )
+            instance.execute()
+
+            opener = gzip.open if ext.endswith(".gz") else open
+            files = sorted(os.listdir(os.path.join(self._out_dir, str(output_compression))))
+            assert ["test.%d%s" % (i, ext) for i in range(1, 4)] == files
+            with opener(
+                os.path.join(self._out_dir, str(output_compression), "test.3" + ext), "rt"
+            ) as f:
+                assert "idx\n4\n" == f.read()
+
+    def test_execute_output_compression_not_supported(self):
+        instance = FileCopy()
+        with pytest.raises(InvalidParameter):
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test\.txt",
+                    "dest_dir": self._out_dir,
+                    "output_compression": "gz",
+                }
+            )
+
 
 class TestFileRename(TestFileTransform):
     def test_execute_ok(self):
@@ -1254,6 +1556,58 @@ class TestFileConvert(TestFileTransform):
         with pytest.raises(UnicodeEncodeError):
             instance.execute()
 
+    def test_execute_small_chunk(self):
+        STR_UTF8 = "いろはにほへと\r\nちりぬるを\r\n" * 10
+
+        test_file = os.path.join(self._data_dir, "test.txt")
+
+        with open(test_file, "w", encoding="utf-8", newline="") as t:
+            t.write(STR_UTF8)
+
+        # set the essential attributes
+        instance = FileConvert()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.txt",
+                "encoding_from": "utf-8",
+                "encoding_to": "utf-16",
+                "chunk_size": 5,
+            }
+        )
+        instance.execute()
+
+        with open(test_file, encoding="utf-16", newline="") as t:
+            str_output = t.read()
+
+        assert str_output == STR_UTF8
+
+    def test_execute_auto_detect(self):
+        STR_UTF8 = "吾輩は猫である。名前はまだ無い。どこで生れたかとんと見当がつかぬ。\n" * 100
+
+        test_file = os.path.join(self._data_dir, "test.txt")
+
+        with open(test_file, "w", encoding="shift_jis") as t:
+            t.write(STR_UTF8)
+
+        # set the essential attributes
+        instance = FileConvert()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test\.txt",
+                "encoding_from": "auto",
+                "encoding_to": "utf-8",
+                "detect_sample_size": 1024,
+            }
+        )
+        instance.execute()
+
+        with open(test_file, encoding="utf-8") as t:
+            str_output = t.read()
+
+        assert str_output == STR_UTF8
+
 
 class TestFileArchive(TestFileTransform):
     def test_compress_tar(self):
@@ -1324,3 +1678,122 @@ class TestFileArchive(TestFileTransform):
         files = glob(os.path.join(result_dir, "foo.zip"))
         assert 1 == len(files)
         assert "foo.zip" == os.path.basename(files[0])
+
+    def test_compress_zip_parallel(self):
+        for i in range(5):
+            with open(os.path.join(self._data_dir, "test%s.txt" % i), "w") as t:
+                t.write("ABCDEF%s" % i * 1000)
+        with gzip.open(os.path.join(self._data_dir, "test5.txt.gz"), "wt") as t:
+            t.write("GHIJKL")
+
+        instance = FileArchive()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.*\.txt.*",
+                "format": "zip",
+                "dest_name": "foo",
+                "compression": "deflated",
+                "level": 6,
+                "threads": 3,
+                "create_dir": True,
+            }
+        )
+        instance.execute()
+
+        with zipfile.ZipFile(os.path.join(self._data_dir, "foo.zip")) as zp:
+            assert zp.testzip() is None
+            infos = zp.infolist()
+            assert ["foo/test%s.txt" % i for i in range(5)] + ["foo/test5.txt.gz"] == [
+                info.filename for info in infos
+            ]
+            for i in range(5):
+                assert zipfile.ZIP_DEFLATED == infos[i].compress_type
+                assert infos[i].compress_size < infos[i].file_size
+                assert "ABCDEF%s" % i * 1000 == zp.read(infos[i]).decode()
+            assert zipfile.ZIP_STORED == infos[5].compress_type
+            with gzip.open(zp.open(infos[5]), "rt") as f:
+                assert "GHIJKL" == f.read()
+
+    def test_compress_zip_bzip2_parallel(self):
+        for i in range(3):
+            with open(os.path.join(self._data_dir, "test%s.txt" % i), "w") as t:
+                t.write("ABCDEF%s" % i * 1000)
+
+        instance = FileArchive()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.*\.txt",
+                "format": "zip",
+                "dest_name": "foo",
+                "compression": "bzip2",
+                "threads": 2,
+            }
+        )
+        instance.execute()
+
+        with zipfile.ZipFile(os.path.join(self._data_dir, "foo.zip")) as zp:
+            assert zp.testzip() is None
+            for i in range(3):
+                assert zipfile.ZIP_BZIP2 == zp.getinfo("test%s.txt" % i).compress_type
+                assert "ABCDEF%s" % i * 1000 == zp.read("test%s.txt" % i).decode()
+
+    def test_compress_zip_parallel_zip64(self):
+        names = ["test%s.txt" % i for i in range(3)] + ["tëst.txt"]
+        for i, name in enumerate(names):
+            with open(os.path.join(self._data_dir, name), "w") as t:
+                t.write("ABCDEF%s" % i * 1000)
+
+        # Members and offsets over the limit are written with ZIP64 extensions
+        for allow_zip64 in [False, True]:
+            instance = FileArchive()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"t.st.*\.txt",
+                    "format": "zip",
+                    "dest_name": "foo",
+                    "compression": "deflated",
+                    "threads": 2,
+                    "allow_zip64": allow_zip64,
+                }
+            )
+            with patch("zipfile.ZIP64_LIMIT", 100):
+                if allow_zip64:
+                    instance.execute()
+                else:
+                    with pytest.raises(zipfile.LargeZipFile):
+                        instance.execute()
+
+        with zipfile.ZipFile(os.path.join(self._data_dir, "foo.zip")) as zp:
+            assert zp.testzip() is None
+            assert names == zp.namelist()
+            for i, name in enumerate(names):
+                assert "ABCDEF%s" % i * 1000 == zp.read(name).decode()
+
+    def test_compress_tar_gz(self):
+        for i in range(3):
+            with open(os.path.join(self._data_dir, "test%s.txt" % i), "w") as t:
+                t.write("ABCDEF%s" % i * 1000)
+
+        for threads in [1, 2]:
+            instance = FileArchive()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": r"test.*\.txt",
+                    "format": "tar.gz",
+                    "dest_name": "foo",
+                    "threads": threads,
+                    "block_size": 4096,
+                }
+            )
+            instance.execute()
+
+            with tarfile.open(os.path.join(self._data_dir, "foo.tar.gz"), "r:gz") as tar:
+                assert ["test0.txt", "test1.txt", "test2.txt"] == tar.getnames()
+                for i in range(3):
+                    assert (
+                        "ABCDEF%s" % i * 1000 == tar.extractfile("test%s.txt" % i).read().decode()
+                    )
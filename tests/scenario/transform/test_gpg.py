@@ -13,6 +13,7 @@
 #
 import os
 import shutil
+import subprocess
 
 from cliboa.conf import env
 from cliboa.scenario.transform.gpg import GpgDecrypt, GpgEncrypt
@@ -36,6 +37,12 @@ class TestGpg(BaseCliboaTest):
             f.write("This is test")
 
     def tearDown(self):
+        # Stop the agents of the keyrings, which would otherwise serve the next test's keyring
+        for gpg_dir in [self._gpg_dir, os.path.join(self._data_dir, "gpg2")]:
+            if os.path.isdir(gpg_dir):
+                subprocess.run(
+                    ["gpgconf", "--homedir", gpg_dir, "--kill", "gpg-agent"], check=False
+                )
         shutil.rmtree(self._data_dir)
 
     def test_encrypt_decrypt_ok(self):
@@ -72,3 +79,45 @@ class TestGpg(BaseCliboaTest):
         with open(os.path.join(self._result_dir, self._file_name), mode="r", encoding="utf-8") as f:
             txt = f.read()
             assert txt == "This is test"
+
+    def test_encrypt_decrypt_concurrently_with_key_import(self):
+        gpg = Gpg(self._gpg_dir)
+        gpg.generate_key(
+            dest_dir=self._data_dir, name_email="test@email.com", passphrase="password"
+        )
+        for i in range(3):
+            with open(os.path.join(self._data_dir, "test%s.csv" % i), "w") as f:
+                f.write("This is test%s" % i)
+
+        # Encryption
+        instance = GpgEncrypt()
+        instance._set_arguments(
+            {
+                "gnupghome": self._gpg_dir,
+                "src_dir": self._data_dir,
+                "src_pattern": r"test.\.csv",
+                "dest_dir": self._result_dir,
+                "recipients": ["test@email.com"],
+                "concurrent_files": 2,
+            }
+        )
+        instance.execute()
+
+        # Decryption with another keyring where the private key is imported
+        instance = GpgDecrypt()
+        instance._set_arguments(
+            {
+                "gnupghome": os.path.join(self._data_dir, "gpg2"),
+                "src_dir": self._result_dir,
+                "src_pattern": r"test.\.csv\.gpg",
+                "passphrase": "password",
+                "key_dir": self._data_dir,
+                "key_pattern": r"private",
+                "concurrent_files": 2,
+            }
+        )
+        instance.execute()
+
+        for i in range(3):
+            with open(os.path.join(self._result_dir, "test%s.csv" % i)) as f:
+                assert f.read() == "This is test%s" % i
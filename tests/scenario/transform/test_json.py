@@ -232,6 +232,32 @@ class TestJsonlToCsv(TestJsonTransform):
             instance.execute()
         assert "dict contains fields not in fieldnames: 'value'" == str(e.value)
 
+    def test_execute_ok_union_columns(self):
+        data = [
+            {"id": "1", "name": "A"},
+            {"id": "2", "age": "30"},
+            {"value": "v", "id": "3"},
+        ]
+        self._create_jsonl(data, "test_1.json")
+
+        instance = JsonlToCsv()
+        instance._set_arguments(
+            {
+                "src_dir": self._data_dir,
+                "src_pattern": "test.*.json",
+                "dest_dir": self._result_dir,
+                "columns": "union",
+            }
+        )
+        instance.execute()
+        with open(os.path.join(self._result_dir, "test_1.csv"), mode="r", newline="") as f:
+            assert [
+                ["id", "name", "age", "value"],
+                ["1", "A", "", ""],
+                ["2", "", "30", ""],
+                ["3", "", "", "v"],
+            ] == list(csv.reader(f))
+
 
 class TestJsonlAddKeyValue(TestJsonTransform):
     def test_execute_ok_1(self):
@@ -267,12 +293,12 @@ class TestJsonlAddKeyValue(TestJsonTransform):
                 s = []
                 for line in lines:
                     s.append(json.loads(line))
-                self.assertEqual(123456789, s[0].get("id"))
-                self.assertEqual(1234567890, s[1].get("id"))
+                self.assertEqual("123456789", s[0].get("id"))
+                self.assertEqual("1234567890", s[1].get("id"))
                 self.assertEqual("A", s[0].get("name"))
                 self.assertEqual("B", s[1].get("name"))
-                self.assertEqual(25, s[0].get("age"))
-                self.assertEqual(30, s[1].get("age"))
+                self.assertEqual("25", s[0].get("age"))
+                self.assertEqual("30", s[1].get("age"))
                 self.assertIsNone(s[0].get("value"))
                 self.assertEqual(
                     [{"key": "test_key", "value": 999}, {"key": 'test"01"', "value": "true"}],
@@ -314,12 +340,12 @@ class TestJsonlAddKeyValue(TestJsonTransform):
                 s = []
                 for line in lines:
                     s.append(json.loads(line))
-                self.assertEqual(123456789, s[0].get("id"))
-                self.assertEqual(1234567890, s[1].get("id"))
+                self.assertEqual("123456789", s[0].get("id"))
+                self.assertEqual("1234567890", s[1].get("id"))
                 self.assertEqual("A", s[0].get("name"))
                 self.assertEqual("B", s[1].get("name"))
-                self.assertEqual(25, s[0].get("age"))
-                self.assertEqual(30, s[1].get("age"))
+                self.assertEqual("25", s[0].get("age"))
+                self.assertEqual("30", s[1].get("age"))
                 self.assertIsNone(s[0].get("value"))
                 self.assertEqual(
                     [{"key": "test_key", "value": 999}, {"key": 'test"01"', "value": "true"}],
@@ -329,3 +355,35 @@ class TestJsonlAddKeyValue(TestJsonTransform):
                 self.assertEqual(1, s[1].get("number"))
                 self.assertEqual("first", s[0].get("data"))
                 self.assertEqual("first", s[1].get("data"))
+
+    def test_execute_ok_fast(self):
+        data = [
+            {"id": "1", "time": "2024-01-01T00:00:00", "value": {"nested": 1.0}},
+            {},
+        ]
+        self._create_jsonl(data, "test_1.json")
+
+        for fast in [False, True]:
+            instance = JsonlAddKeyValue()
+            instance._set_arguments(
+                {
+                    "src_dir": self._data_dir,
+                    "src_pattern": "test.*.json",
+                    "dest_dir": self._result_dir,
+                    "pairs": {"number": 1, "data": "日本"},
+                    "fast": fast,
+                }
+            )
+            instance.execute()
+            with open(os.path.join(self._result_dir, "test_1.json"), encoding="utf-8") as f:
+                s = [json.loads(line) for line in f]
+            assert [
+                {
+                    "id": "1",
+                    "time": "2024-01-01T00:00:00",
+                    "value": {"nested": 1.0},
+                    "number": 1,
+                    "data": "日本",
+                },
+                {"number": 1, "data": "日本"},
+            ] == s
@@ -0,0 +1,77 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import os
+
+import pytest
+
+from cliboa.util.compression import CompressionUtil, _zstd_module
+from cliboa.util.exception import CliboaException, InvalidParameter
+
+
+def _zstd_available():
+    try:
+        _zstd_module()
+        return True
+    except CliboaException:
+        return False
+
+
+class TestCompressionUtil(object):
+    @pytest.mark.parametrize("format", ["gz", "bz2", "xz", "zst"])
+    @pytest.mark.parametrize("threads", [1, 3])
+    def test_compress_file(self, tmp_path, format, threads):
+        if format == "zst" and not _zstd_available():
+            pytest.skip("zstd is not available.")
+        src = os.path.join(tmp_path, "test.txt")
+        data = b"".join(b"%d,spam,ham\n" % i for i in range(10000))
+        with open(src, "wb") as f:
+            f.write(data)
+
+        dest = src + "." + format
+        CompressionUtil().compress_file(
+            src, dest, format, level=1, threads=threads, block_size=4096
+        )
+        with CompressionUtil().open(dest, "rb") as f:
+            assert f.read() == data
+
+        out = os.path.join(tmp_path, "out.txt")
+        CompressionUtil().decompress_file(dest, out)
+        with open(out, "rb") as f:
+            assert f.read() == data
+
+    @pytest.mark.parametrize("threads", [1, 2])
+    def test_compress_empty_file(self, tmp_path, threads):
+        src = os.path.join(tmp_path, "test.txt")
+        open(src, "w").close()
+
+        CompressionUtil().compress_file(src, src + ".gz", "gz", threads=threads)
+        with CompressionUtil().open(src + ".gz", "rb") as f:
+            assert f.read() == b""
+
+    def test_open_parallel_writer(self, tmp_path):
+        dest = os.path.join(tmp_path, "test.txt.gz")
+        with CompressionUtil().open_parallel_writer(dest, "gz", threads=2, block_size=10) as w:
+            for i in range(100):
+                w.write(b"%d,spam\n" % i)
+        with CompressionUtil().open(dest, "rb") as f:
+            assert f.read() == b"".join(b"%d,spam\n" % i for i in range(100))
+
+    def test_format_of(self):
+        assert CompressionUtil.format_of("a/b.csv.gz") == "gz"
+        assert CompressionUtil.format_of("a/b.csv.ZST") == "zst"
+        assert CompressionUtil.format_of("a/b.csv") is None
+
+    def test_normalize_format_ng(self):
+        with pytest.raises(InvalidParameter):
+            CompressionUtil.normalize_format("lz4")
@@ -0,0 +1,61 @@
+#
+# Copyright BrainPad Inc. All Rights Reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+import csv
+import io
+
+import pytest
+
+from cliboa.util.csv_row import CsvRowEngine
+
+CSV_TEXT = "a,b,c\r\n1,2,3\r\n\r\n4,5\r\n6,7,8,9\r\n"
+
+
+class TestCsvRowEngine(object):
+    def test_column_indexes(self):
+        assert CsvRowEngine.column_indexes(["a", "b", "a"], ["b", "a"]) == [1, 2]
+        assert CsvRowEngine.column_indexes(["a"], ["b", "a"], ignore_missing=True) == [0]
+        with pytest.raises(KeyError):
+            CsvRowEngine.column_indexes(["a"], ["b"])
+
+    def test_getter(self):
+        row = ["x", "y", "z"]
+        assert CsvRowEngine.getter([])(row) == ()
+        assert CsvRowEngine.getter([1])(row) == ("y",)
+        assert CsvRowEngine.getter([2, 0])(row) == ("z", "x")
+
+    def test_records(self):
+        reader = csv.reader(io.StringIO(CSV_TEXT))
+        header = next(reader)
+        rows = CsvRowEngine.records(reader, len(header))
+        assert next(rows) == ["1", "2", "3"]
+        assert next(rows) == ["4", "5", ""]
+        with pytest.raises(ValueError):
+            next(rows)
+
+        reader = csv.reader(io.StringIO(CSV_TEXT))
+        header = next(reader)
+        rows = list(CsvRowEngine.records(reader, len(header), allow_longer=True))
+        assert rows[-1] == ["6", "7", "8", "9"]
+
+    def test_dicts_same_as_dict_reader(self):
+        reader = csv.reader(io.StringIO(CSV_TEXT))
+        header = next(reader)
+        assert list(CsvRowEngine.dicts(reader, header)) == list(
+            csv.DictReader(io.StringIO(CSV_TEXT))
+        )
+
+    def test_write_rows(self):
+        out = io.StringIO()
+        CsvRowEngine.write_rows(csv.writer(out), ([str(i)] for i in range(5)), batch_size=2)
+        assert out.getvalue() == "0\r\n1\r\n2\r\n3\r\n4\r\n"